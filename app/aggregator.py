@@ -0,0 +1,285 @@
+"""
+Incremental CreditFeatures aggregation from detected assets
+
+When images for a loan arrive over time, upstream has to resend every earlier
+asset so the aggregates in `credit_features` can be recomputed. A
+LoanAggregate instead keeps running sums and counts per loan and folds in
+each new batch of DetectedAssets in O(new assets); the features are derived
+from the running state:
+
+- total_asset_value, asset_categories / asset_diversity_score, the has_*_asset
+  flags, has_high_value_assets / high_value_asset_count (estimated value of at
+  least HIGH_VALUE_THRESHOLD)
+- average_asset_condition and average_detection_confidence (rounded to 2
+  decimals, as upstream reports them)
+- primary_device_model (most frequent), unique_devices_count
+- image_span_days, images_per_day and has_recent_images (newest image at most
+  RECENT_DAYS before the latest update), from the image timestamps: ISO 8601
+  (with or without an offset such as "Z") or EXIF "YYYY:MM:DD HH:MM:SS",
+  compared in UTC (timestamps without an offset are taken as UTC)
+- asset_concentration_score: share of the largest category, in percent
+- asset_to_device_ratio: total value over the device tier score
+- the summary's EXIF verification rate, images processed and assets detected
+
+location_stability_score and primary_device_tier_score come from upstream
+signals the assets do not carry; each update may send their latest values.
+
+Assets are identified by `image_source`; an asset already folded in is
+skipped, so a retried update does not count twice. Aggregates live in
+memory per worker process (route a loan's updates to one worker), bounded by
+`max_loans` with the least recently updated loans evicted first, and loans
+idle for `idle_seconds` are dropped.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models import CreditFeatures, DetectedAsset
+from app.rules import FEATURE_INPUTS, request_loan_amount
+from app.settings import settings
+
+HIGH_VALUE_THRESHOLD = 1000.0
+RECENT_DAYS = 30
+
+CATEGORY_FLAGS = {
+    "Transport": "has_transport_asset",
+    "Electronics": "has_electronics_asset",
+    "Livestock": "has_livestock_asset",
+    "Property": "has_property_asset",
+}
+
+EXIF_TIMESTAMP = "%Y:%m:%d %H:%M:%S"
+
+def _parse_timestamp(value: str) -> Optional[datetime]:
+    """
+    An image timestamp as a naive UTC datetime; None when unreadable
+    """
+    try:
+        if value.endswith(("Z", "z")):
+            value = value[:-1] + "+00:00"
+        seen = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            seen = datetime.strptime(value, EXIF_TIMESTAMP)
+        except ValueError:
+            return None
+    if seen.tzinfo is not None:
+        seen = seen.astimezone(timezone.utc).replace(tzinfo=None)
+    return seen
+
+# A new asset with its parsed timestamp, ready to be folded in
+Prepared = Tuple[DetectedAsset, Optional[datetime]]
+
+class LoanAggregate:
+    """
+    Running sums and counts over the detected assets of one loan
+    """
+    __slots__ = (
+        "loan_id", "user_id", "images", "assets_detected", "total_value", "condition_sum", "confidence_sum",
+        "high_value_count", "exif_verified", "categories", "devices", "first_seen", "last_seen",
+        "location_stability_score", "primary_device_tier_score", "loan_amount", "product_code", "updated_at",
+    )
+
+    def __init__(self, loan_id: str, user_id: str):
+        self.loan_id = loan_id
+        self.user_id = user_id
+        self.images: set = set()
+        self.assets_detected = 0
+        self.total_value = 0.0
+        self.condition_sum = 0.0
+        self.confidence_sum = 0.0
+        self.high_value_count = 0
+        self.exif_verified = 0
+        self.categories: Dict[str, int] = {}
+        self.devices: Dict[str, int] = {}
+        self.first_seen: Optional[datetime] = None
+        self.last_seen: Optional[datetime] = None
+        self.location_stability_score = 0
+        self.primary_device_tier_score = 0
+        self.loan_amount: Optional[float] = None
+        self.product_code: Optional[str] = None
+        self.updated_at = time.time()
+
+    def prepare(self, assets: Iterable[DetectedAsset]) -> Tuple[List[Prepared], int]:
+        """
+        The assets not folded in yet, with their timestamps parsed, and how
+        many were skipped as already seen; the aggregate is not changed
+        """
+        prepared: List[Prepared] = []
+        pending = set()
+        skipped = 0
+        for asset in assets:
+            if asset.image_source in self.images or asset.image_source in pending:
+                skipped += 1
+                continue
+            pending.add(asset.image_source)
+            prepared.append((asset, _parse_timestamp(asset.timestamp)))
+        return prepared, skipped
+
+    def add(self, assets: Iterable[DetectedAsset]) -> Tuple[int, int]:
+        """
+        Fold in new assets; returns (added, skipped as already seen)
+        """
+        prepared, skipped = self.prepare(assets)
+        return self.apply(prepared), skipped
+
+    def apply(self, prepared: List[Prepared]) -> int:
+        """
+        Fold in assets from `prepare`; returns the number added
+        """
+        added = 0
+        for asset, seen in prepared:
+            self.images.add(asset.image_source)
+            added += 1
+            self.assets_detected += asset.asset_count
+            self.total_value += asset.estimated_value
+            self.condition_sum += asset.condition_score
+            self.confidence_sum += asset.detection_confidence
+            if asset.estimated_value >= HIGH_VALUE_THRESHOLD:
+                self.high_value_count += 1
+            if asset.exif_verified:
+                self.exif_verified += 1
+            self.categories[asset.asset_category] = self.categories.get(asset.asset_category, 0) + 1
+            self.devices[asset.device_model] = self.devices.get(asset.device_model, 0) + 1
+            if seen is not None:
+                if self.first_seen is None or seen < self.first_seen:
+                    self.first_seen = seen
+                if self.last_seen is None or seen > self.last_seen:
+                    self.last_seen = seen
+        self.updated_at = time.time()
+        return added
+
+    def credit_features(self) -> CreditFeatures:
+        count = len(self.images)
+        span_days = (self.last_seen - self.first_seen).days if self.last_seen is not None else 0
+        updated = datetime.fromtimestamp(self.updated_at, timezone.utc).replace(tzinfo=None)
+        recent = self.last_seen is not None and (updated - self.last_seen).days <= RECENT_DAYS
+        tier = self.primary_device_tier_score
+        features = {
+            "total_asset_value": round(self.total_value, 2),
+            "asset_diversity_score": len(self.categories),
+            "asset_categories": dict(self.categories),
+            "has_high_value_assets": self.high_value_count > 0,
+            "high_value_asset_count": self.high_value_count,
+            "average_asset_condition": round(self.condition_sum / count, 2) if count else 0.0,
+            "location_stability_score": self.location_stability_score,
+            "primary_device_model": max(self.devices, key=self.devices.get) if self.devices else "",
+            "primary_device_tier_score": tier,
+            "unique_devices_count": len(self.devices),
+            "asset_to_device_ratio": round(self.total_value / tier, 2) if tier else 0.0,
+            "image_span_days": span_days,
+            "images_per_day": count // max(1, span_days),
+            "has_recent_images": recent,
+            "asset_concentration_score": round(100 * max(self.categories.values()) / count) if count else 0,
+            "average_detection_confidence": round(self.confidence_sum / count, 2) if count else 0.0,
+        }
+        for category, flag in CATEGORY_FLAGS.items():
+            features[flag] = category in self.categories
+        return CreditFeatures(**features)
+
+    def exif_verification_rate(self) -> float:
+        return 100.0 * self.exif_verified / len(self.images) if self.images else 0.0
+
+    def row(self, features: CreditFeatures) -> List[Any]:
+        """
+        The feature row (laid out like INPUT_FIELDS) of the aggregated assets
+        """
+        values = features.__dict__
+        row = [values[name] for name in FEATURE_INPUTS]
+        row.append(round(self.exif_verification_rate(), 1))
+        row.append(len(self.images))
+        row.append(self.assets_detected)
+        row.append(request_loan_amount(self.loan_amount, self.product_code))
+        return row
+
+    def snapshot(self) -> "LoanSnapshot":
+        features = self.credit_features()
+        return LoanSnapshot(self.loan_id, self.user_id, len(self.images), features, self.row(features))
+
+class LoanSnapshot:
+    """
+    A loan's features and feature row as of one update
+    """
+    __slots__ = ("loan_id", "user_id", "images", "credit_features", "row")
+
+    def __init__(self, loan_id: str, user_id: str, images: int, credit_features: CreditFeatures, row: List[Any]):
+        self.loan_id = loan_id
+        self.user_id = user_id
+        self.images = images
+        self.credit_features = credit_features
+        self.row = row
+
+class LoanAggregator:
+    """
+    LoanAggregates by loan_id, bounded in number and evicted when idle
+    """
+
+    def __init__(self, max_loans: int, idle_seconds: float):
+        self.max_loans = max_loans
+        self.idle_seconds = idle_seconds
+        self.evictions = 0
+        self._loans: "OrderedDict[str, LoanAggregate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, loan_id: str, user_id: str, assets: List[DetectedAsset], signals: Dict[str, Any]) -> Tuple[LoanSnapshot, int, int]:
+        """
+        Fold new assets and the latest upstream signals (non-None values of
+        location_stability_score, primary_device_tier_score, loan_amount,
+        product_code) into a loan's aggregate
+        Returns a snapshot of the loan and the number of assets added and skipped
+        The whole update is prepared before the aggregate is changed, so an
+        update that fails leaves the loan as it was
+        """
+        with self._lock:
+            self._evict_idle(time.time())
+            aggregate = self._loans.get(loan_id)
+            known = aggregate is not None
+            if not known:
+                aggregate = LoanAggregate(loan_id, user_id)
+            prepared, skipped = aggregate.prepare(assets)
+            unknown = [name for name in signals if name not in LoanAggregate.__slots__]
+            if unknown:
+                raise ValueError(f"unknown loan signals: {', '.join(unknown)}")
+            if not known:
+                self._loans[loan_id] = aggregate
+            self._loans.move_to_end(loan_id)
+            for name, value in signals.items():
+                if value is not None:
+                    setattr(aggregate, name, value)
+            added = aggregate.apply(prepared)
+            while len(self._loans) > self.max_loans:
+                self._loans.popitem(last=False)
+                self.evictions += 1
+            return aggregate.snapshot(), added, skipped
+
+    def get(self, loan_id: str) -> Optional[LoanSnapshot]:
+        with self._lock:
+            aggregate = self._loans.get(loan_id)
+            return None if aggregate is None else aggregate.snapshot()
+
+    def discard(self, loan_id: str) -> bool:
+        with self._lock:
+            return self._loans.pop(loan_id, None) is not None
+
+    def _evict_idle(self, now: float) -> None:
+        # Loans are kept in update order, so idle ones are at the front
+        while self._loans:
+            oldest = next(iter(self._loans.values()))
+            if now - oldest.updated_at < self.idle_seconds:
+                break
+            self._loans.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loans": len(self._loans),
+                "images": sum(len(loan.images) for loan in self._loans.values()),
+                "evictions": self.evictions,
+                "max_loans": self.max_loans,
+                "idle_seconds": self.idle_seconds,
+            }
+
+loan_aggregator = LoanAggregator(settings.aggregator_max_loans, settings.aggregator_idle_seconds)
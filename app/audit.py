@@ -0,0 +1,425 @@
+"""
+Score audit log: every issued score, in append-only binary segment files
+
+Each scored request is recorded as one fixed-width record (AUDIT_DTYPE):
+
+- timestamp, user_id, loan_id (ids longer than ID_BYTES keep a prefix and a
+  hash of the rest, see encode_id)
+- input_hash: BLAKE2b-128 of the feature row (float64, laid out like
+  INPUT_FIELDS); requests scored on the async pool record a hash of the
+  request body instead (input_kind INPUT_BODY), and multi-source scores a
+  hash of the request serialized as JSON
+- points: the capped points of every rule component, component_count of them
+  (none for a score replayed from the body cache)
+- credit_score and the rules version that issued it (for multi-source
+  scores, "multi:" and the source engine's version)
+- crc: CRC-32 of the record's other bytes, so a damaged record is detectable
+
+Request handlers only append a tuple to an in-memory queue; a background
+thread turns the queue into records every `flush_seconds` (hashing rows and
+evaluating component points there, off the request path), appends them to
+the current segment and fsyncs it. On a crash, at most the last
+`flush_seconds` of records are lost; on shutdown the queue is drained. When
+the writer falls `max_buffer` records behind, new records are counted as
+dropped instead of growing memory (see /audit/stats).
+
+Segments are named `audit-<start ns>-<pid>.seg`: every worker process writes
+its own, so no locking is needed, and a segment is never modified once it
+has been rotated (at `segment_bytes`). A segment starts with a header: the
+magic, its length and a JSON description (record dtype, rules version and
+component names). Readers map a segment's records directly and ignore a
+partially written last record:
+
+    python -m app.audit query <dir> --loan-id 1111 [--user-id ...] [--since ts] [--until ts]
+"""
+import argparse
+import collections
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.batch import rows_to_matrix
+from app.rules import DEFAULT_RULES, CompiledRules, extract_row
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CSAUDIT1"
+ID_BYTES = 64
+MAX_COMPONENTS = 16
+
+INPUT_ROW = 0
+INPUT_BODY = 1
+
+AUDIT_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("user_id", f"S{ID_BYTES}"),
+    ("loan_id", f"S{ID_BYTES}"),
+    ("rules_version", "S16"),
+    ("input_hash", "S16"),
+    ("input_kind", "u1"),
+    ("component_count", "u1"),
+    ("credit_score", "<i2"),
+    ("points", "<f4", (MAX_COMPONENTS,)),
+    ("crc", "<u4"),
+])
+
+# Queued entry: (timestamp, user_id, loan_id, credit score, points or None,
+# the input: a feature row, a request to extract it from, or a body (bytes,
+# or a model to serialize), and the rules version when not the log's own)
+Entry = Tuple[float, str, str, int, Optional[Sequence[Any]], Any, Any, Optional[str]]
+
+def encode_id(value: str) -> bytes:
+    """
+    An id as stored: its UTF-8 bytes, or for ids longer than ID_BYTES a
+    prefix, '#' and 15 hex digits of a hash of the whole id
+    """
+    data = value.encode()
+    if len(data) <= ID_BYTES:
+        return data
+    return data[:ID_BYTES - 16] + b"#" + hashlib.blake2b(data, digest_size=8).hexdigest()[:15].encode()
+
+def record_crc(record: np.void) -> int:
+    return zlib.crc32(record.tobytes()[:-AUDIT_DTYPE["crc"].itemsize])
+
+class AuditLog:
+    """
+    Queue of issued scores written to segment files by a background thread
+    """
+
+    def __init__(self, directory: Union[str, Path], rules: CompiledRules = DEFAULT_RULES, flush_seconds: float = 1.0,
+                 segment_bytes: int = 64 << 20, max_buffer: int = 100_000, fsync: bool = True):
+        if len(rules.components) > MAX_COMPONENTS:
+            raise ValueError(f"the audit log records at most {MAX_COMPONENTS} rule components")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.rules = rules
+        self.flush_seconds = flush_seconds
+        self.segment_bytes = segment_bytes
+        self.max_buffer = max_buffer
+        self.fsync = fsync
+        self.written = 0
+        self.dropped = 0
+        self.segments = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._queue: Deque[Entry] = collections.deque()
+        self._segment = None
+        self._segment_size = 0
+        self._write_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def _queue_entry(self, entry: Entry) -> None:
+        if len(self._queue) >= self.max_buffer:
+            # The writer is not keeping up; shed rather than grow without bound
+            self.dropped += 1
+            return
+        self._queue.append(entry)
+
+    def add(self, user_id: str, loan_id: str, row: Sequence[Any], credit_score: int, points: Optional[Sequence[Any]] = None) -> None:
+        """
+        Queue one issued score; the feature row is hashed (and the component
+        points, when not given, evaluated) by the writer thread
+        """
+        self._queue_entry((time.time(), user_id, loan_id, credit_score, points, row, None, None))
+
+    def add_rows(self, items: Iterable[Tuple[str, str, Sequence[Any], int]]) -> None:
+        """
+        Queue the scores of a bulk chunk: (user_id, loan_id, feature row,
+        credit score) items, as collected by app.bulk.score_chunk
+        """
+        for user_id, loan_id, row, credit_score in items:
+            self.add(user_id, loan_id, row, credit_score)
+
+    def add_request(self, request, credit_score: int) -> None:
+        """
+        Queue a score issued for a request model; its feature row is
+        extracted by the writer thread
+        """
+        self._queue_entry((time.time(), request.user_id, request.loan_id, credit_score, None, request, None, None))
+
+    def add_body(self, user_id: str, loan_id: str, body: bytes, credit_score: int, points: Optional[Sequence[Any]] = None) -> None:
+        """
+        Queue a score issued without the feature row at hand (the async pool,
+        body cache hits); the request body is hashed instead, and the points
+        are only recorded when given
+        """
+        self._queue_entry((time.time(), user_id, loan_id, credit_score, points, None, body, None))
+
+    def add_source_request(self, request, credit_score: int, rules_version: str) -> None:
+        """
+        Queue a multi-source score; the request model is serialized and
+        hashed by the writer thread, and no component points are recorded
+        """
+        self._queue_entry((time.time(), request.user_id, request.loan_id, credit_score, None, None, request, rules_version))
+
+    def records(self, entries: Sequence[Entry]) -> np.ndarray:
+        """
+        Build the records of queued entries
+        """
+        records = np.zeros(len(entries), dtype=AUDIT_DTYPE)
+        records["timestamp"] = [entry[0] for entry in entries]
+        records["user_id"] = [encode_id(entry[1]) for entry in entries]
+        records["loan_id"] = [encode_id(entry[2]) for entry in entries]
+        records["credit_score"] = [entry[3] for entry in entries]
+        records["rules_version"] = [(entry[7] or self.rules.version).encode()[:16] for entry in entries]
+
+        rows = []
+        for entry in entries:
+            source = entry[5]
+            if source is None:
+                rows.append(None)
+            else:
+                rows.append(source if isinstance(source, (list, tuple)) else extract_row(source))
+        present = [row for row in rows if row is not None]
+        matrix = rows_to_matrix(present) if present else None
+
+        count = len(self.rules.components)
+        hashes = []
+        kinds = []
+        points = np.zeros((len(entries), MAX_COMPONENTS), dtype=np.float32)
+        counts = np.zeros(len(entries), dtype=np.uint8)
+        next_row = 0
+        for i, (entry, row) in enumerate(zip(entries, rows)):
+            given = entry[4]
+            if row is not None:
+                hashes.append(hashlib.blake2b(matrix[next_row].tobytes(), digest_size=16).digest())
+                kinds.append(INPUT_ROW)
+                next_row += 1
+                if given is None:
+                    given = self.rules.score_components(row)[1]
+            else:
+                body = entry[6] if isinstance(entry[6], bytes) else entry[6].json().encode()
+                hashes.append(hashlib.blake2b(body, digest_size=16).digest())
+                kinds.append(INPUT_BODY)
+            if given is not None:
+                points[i, :count] = given
+                counts[i] = count
+        records["input_hash"] = hashes
+        records["input_kind"] = kinds
+        records["points"] = points
+        records["component_count"] = counts
+
+        # CRC of every record's bytes before its crc field
+        data = memoryview(records.view(np.uint8))
+        size = AUDIT_DTYPE.itemsize
+        covered = size - AUDIT_DTYPE["crc"].itemsize
+        records["crc"] = [zlib.crc32(data[start:start + covered]) for start in range(0, len(entries) * size, size)]
+        return records
+
+    def flush(self) -> int:
+        """
+        Write every queued entry; returns the number of records written
+        When the write fails the entries go back to the front of the queue
+        (beyond max_buffer the newest are dropped) and the error is raised;
+        entries whose records cannot even be built are dropped
+        """
+        with self._write_lock:
+            entries = []
+            while self._queue:
+                entries.append(self._queue.popleft())
+            if not entries:
+                return 0
+            try:
+                data = self.records(entries).tobytes()
+            except Exception as e:
+                self._failed(e)
+                self.dropped += len(entries)
+                raise
+            try:
+                if self._segment is None or self._segment_size + len(data) > self.segment_bytes:
+                    self._rotate()
+                self._segment.write(data)
+                self._segment.flush()
+                if self.fsync:
+                    os.fsync(self._segment.fileno())
+            except Exception as e:
+                self._failed(e)
+                self._requeue(entries)
+                self._close_segment()
+                raise
+            self._segment_size += len(data)
+            self.written += len(entries)
+            return len(entries)
+
+    def _failed(self, error: Exception) -> None:
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def _requeue(self, entries: List[Entry]) -> None:
+        room = max(0, self.max_buffer - len(self._queue))
+        self.dropped += max(0, len(entries) - room)
+        self._queue.extendleft(reversed(entries[:room]))
+
+    def _close_segment(self) -> None:
+        # The next flush starts a new segment; a record cut short at the end
+        # of this one is ignored by readers (whole records that reached it
+        # before the failure are written again, so may appear twice)
+        if self._segment is not None:
+            try:
+                self._segment.close()
+            except OSError:
+                pass
+            self._segment = None
+
+    def _rotate(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        path = self.directory / f"audit-{time.time_ns()}-{os.getpid()}.seg"
+        header = json.dumps({
+            "dtype": AUDIT_DTYPE.descr,
+            "rules_version": self.rules.version,
+            "components": [component.name for component in self.rules.components],
+            "created_at": time.time(),
+        }).encode()
+        self._segment = open(path, "xb")
+        self._segment.write(MAGIC + len(header).to_bytes(4, "little") + header)
+        self._segment_size = self._segment.tell()
+        self.segments += 1
+
+    def start(self) -> None:
+        if self._flusher is None:
+            self._stopped.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="audit-flush", daemon=True)
+            self._flusher.start()
+
+    def stop(self) -> None:
+        if self._flusher is not None:
+            self._stopped.set()
+            self._flusher.join()
+            self._flusher = None
+        try:
+            self.flush()
+        finally:
+            with self._write_lock:
+                if self._segment is not None:
+                    self._segment.close()
+                    self._segment = None
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception:
+                # Kept queued for the next flush; the thread must not die
+                logger.exception("audit log flush failed")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "queued": len(self._queue),
+            "written": self.written,
+            "dropped": self.dropped,
+            "segments": self.segments,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+def create_audit_log() -> Optional[AuditLog]:
+    """
+    Audit log configured by CREDIT_AUDIT_DIR (None when unset)
+    """
+    if not settings.audit_dir:
+        return None
+    return AuditLog(
+        settings.audit_dir,
+        flush_seconds=settings.audit_flush_seconds,
+        segment_bytes=settings.audit_segment_bytes,
+        max_buffer=settings.audit_max_buffer,
+        fsync=settings.audit_fsync,
+    )
+
+audit_log = create_audit_log()
+
+# Reading segments
+
+def read_segment(path: Union[str, Path]) -> Tuple[Dict[str, Any], np.ndarray]:
+    """
+    A segment's header and its complete records (memory-mapped, read-only)
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an audit segment")
+        length = int.from_bytes(f.read(4), "little")
+        header = json.loads(f.read(length))
+        offset = f.tell()
+    if np.dtype([tuple(field) for field in header["dtype"]]) != AUDIT_DTYPE:
+        raise ValueError(f"{path} was written with a different record layout")
+    count = (os.path.getsize(path) - offset) // AUDIT_DTYPE.itemsize
+    if count == 0:
+        return header, np.zeros(0, dtype=AUDIT_DTYPE)
+    return header, np.memmap(path, dtype=AUDIT_DTYPE, mode="r", offset=offset, shape=(count,))
+
+def segments(directory: Union[str, Path]) -> List[Path]:
+    """
+    Segment files in the order they were started
+    """
+    return sorted(Path(directory).glob("audit-*.seg"), key=lambda path: int(path.name.split("-")[1]))
+
+def query(directory: Union[str, Path], loan_id: Optional[str] = None, user_id: Optional[str] = None,
+          since: Optional[float] = None, until: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Records matching every given filter, oldest segment first
+    Each segment is filtered with vectorized comparisons over its mapped records
+    """
+    for path in segments(directory):
+        header, records = read_segment(path)
+        mask = np.ones(len(records), dtype=bool)
+        if loan_id is not None:
+            mask &= records["loan_id"] == encode_id(loan_id)
+        if user_id is not None:
+            mask &= records["user_id"] == encode_id(user_id)
+        if since is not None:
+            mask &= records["timestamp"] >= since
+        if until is not None:
+            mask &= records["timestamp"] < until
+        for index in np.flatnonzero(mask).tolist():
+            yield describe(header, records[index], path.name)
+
+def describe(header: Dict[str, Any], record: np.void, segment: str) -> Dict[str, Any]:
+    count = int(record["component_count"])
+    return {
+        "timestamp": float(record["timestamp"]),
+        "user_id": record["user_id"].decode(),
+        "loan_id": record["loan_id"].decode(),
+        "credit_score": int(record["credit_score"]),
+        "rules_version": record["rules_version"].decode(),
+        "points": dict(zip(header["components"], record["points"][:count].tolist())),
+        "input_hash": record["input_hash"].hex(),
+        "input": "body" if record["input_kind"] == INPUT_BODY else "features",
+        "valid": record_crc(record) == int(record["crc"]),
+        "segment": segment,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.audit", description="Query the score audit log")
+    commands = parser.add_subparsers(dest="command", required=True)
+    find = commands.add_parser("query", help="print the records of a loan/user as JSON lines")
+    find.add_argument("directory")
+    find.add_argument("--loan-id")
+    find.add_argument("--user-id")
+    find.add_argument("--since", type=float, help="unix timestamp (inclusive)")
+    find.add_argument("--until", type=float, help="unix timestamp (exclusive)")
+    args = parser.parse_args(argv)
+
+    if args.loan_id is None and args.user_id is None and args.since is None and args.until is None:
+        parser.error("give at least one of --loan-id, --user-id, --since, --until")
+    found = 0
+    for record in query(args.directory, args.loan_id, args.user_id, args.since, args.until):
+        sys.stdout.write(json.dumps(record) + "\n")
+        found += 1
+    print(json.dumps({"records": found}), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+MessagePack encoding of the scoring API for internal callers
+
+Internal services (the asset analysis pipeline, batch schedulers) call the
+scorer with the same payloads as /evaluate_credit, encoded as MessagePack
+instead of JSON: smaller on the wire for the numeric-heavy asset lists and
+cheaper to decode. The messages are the CreditAnalysisRequest and
+CreditResponse models; `schemas()` (served at /internal/schema) documents
+them, so clients can generate their types from it.
+
+- POST /internal/score: one request map in, one response map out, with the
+  same status codes and error bodies as /evaluate_credit/fast.
+- POST /internal/score/stream: a body of concatenated request maps, scored as
+  they arrive; one record per message is streamed back (a CreditResponse, or
+  {"line": n, "error"} with n the 1-based message number) as soon as the
+  messages of each network read are scored, so a caller can keep one
+  connection open and interleave sending requests and reading scores.
+"""
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import msgpack
+from starlette.responses import Response
+
+from app.models import CreditAnalysisRequest, CreditResponse
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+def packb(obj: Any) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True)
+
+def unpackb(body: bytes) -> Any:
+    """
+    Decode one MessagePack message; raises ValueError on malformed or
+    truncated input, or trailing bytes
+    """
+    try:
+        return msgpack.unpackb(body, raw=False)
+    except msgpack.UnpackException as e:
+        raise ValueError(str(e) or type(e).__name__) from e
+
+def encode_messages(records: List[Dict[str, Any]]) -> bytes:
+    packer = msgpack.Packer(use_bin_type=True, autoreset=False)
+    for record in records:
+        packer.pack(record)
+    return packer.bytes()
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+class StreamDecodeError(ValueError):
+    """
+    The stream is not valid MessagePack from message `message_number` on
+    """
+
+    def __init__(self, message_number: int, reason: str):
+        super().__init__(reason)
+        self.message_number = message_number
+
+async def aiter_message_chunks(stream: AsyncIterator[bytes], chunk_size: int) -> AsyncIterator[Tuple[List[Any], int]]:
+    """
+    Group the messages of a MessagePack byte stream into chunks
+    Yields (messages, number of the first message) once per network read
+    (or every `chunk_size` messages), so no message waits for later ones to
+    arrive. Raises StreamDecodeError on malformed input or when the stream
+    ends in the middle of a message.
+    """
+    unpacker = msgpack.Unpacker(raw=False)
+    fed = 0
+    first = 1
+    async for data in stream:
+        if not data:
+            continue
+        unpacker.feed(data)
+        fed += len(data)
+        messages: List[Any] = []
+        try:
+            for message in unpacker:
+                messages.append(message)
+                if len(messages) == chunk_size:
+                    yield messages, first
+                    first += len(messages)
+                    messages = []
+        except (ValueError, msgpack.UnpackException) as e:
+            if messages:
+                yield messages, first
+                first += len(messages)
+            raise StreamDecodeError(first, str(e) or type(e).__name__) from e
+        if messages:
+            yield messages, first
+            first += len(messages)
+    if unpacker.tell() != fed:
+        raise StreamDecodeError(first, "stream ended in the middle of a message")
+
+def schemas() -> Dict[str, Any]:
+    """
+    JSON Schemas of the MessagePack messages (same fields as the JSON API)
+    """
+    return {
+        "media_type": MSGPACK_MEDIA_TYPE,
+        "request": CreditAnalysisRequest.schema(),
+        "response": CreditResponse.schema(),
+        "stream_error": {
+            "title": "StreamError",
+            "type": "object",
+            "properties": {
+                "line": {"title": "Line", "type": "integer"},
+                "error": {"title": "Error", "type": "string"},
+                "user_id": {"title": "User Id", "type": "string"},
+                "loan_id": {"title": "Loan Id", "type": "string"},
+            },
+            "required": ["line", "error"],
+        },
+    }
@@ -0,0 +1,304 @@
+"""
+Bulk scoring of JSON Lines (NDJSON) input
+
+Each input line holds one CreditAnalysisRequest. Lines are read incrementally,
+grouped into chunks, validated and scored with the batch engine, and written
+back as one JSON line per input line: a CreditResponse for scored lines, or an
+error record (`{"line": n, "error": ...}`) for lines that could not be scored.
+Only one chunk is held in memory at a time, whatever the size of the input.
+
+The same pipeline backs the `/evaluate_credit/stream` endpoint and the offline
+command line tool:
+
+    python -m app.bulk score in.jsonl out.jsonl [--chunk-size N] [--workers N]
+
+Use `-` for stdin/stdout. With `--workers` other than 1, chunks are validated
+and scored in a process pool and written back in input order; `--workers 0`
+uses one worker per CPU. Parquet input (`.parquet`, one request per row with
+the same nested layout as the JSON) is read with pyarrow when it is installed.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from app.models import CreditAnalysisRequest, ScoringRequest
+from app.batch import pack_requests, score_matrix
+
+DEFAULT_CHUNK_SIZE = 256
+
+Record = Dict[str, Any]
+
+# A score issued for the audit log: (user_id, loan_id, feature row, credit score)
+AuditItem = Tuple[str, str, List[float], int]
+
+# An input item: a raw NDJSON line, or an already decoded payload (Parquet rows)
+Item = Union[bytes, Dict[str, Any]]
+
+def format_validation_error(error: ValidationError) -> str:
+    """
+    Flatten a pydantic ValidationError into a single line
+    """
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    )
+
+def _error_record(line_number: int, error: str, payload: Any = None) -> Record:
+    record: Record = {"line": line_number, "error": error}
+    if isinstance(payload, dict):
+        for key in ("user_id", "loan_id"):
+            if isinstance(payload.get(key), str):
+                record[key] = payload[key]
+    return record
+
+def score_chunk(lines: List[Item], first_line: int, audit: Optional[List[AuditItem]] = None) -> List[Record]:
+    """
+    Parse, validate and score a chunk of NDJSON lines (or decoded payloads)
+    Returns one record per non-blank line, in input order; with `audit`, an
+    AuditItem is appended to it for every score issued
+    """
+    records: List[Optional[Record]] = []
+    requests: List[CreditAnalysisRequest] = []
+    slots: List[Tuple[int, int]] = []
+
+    for offset, line in enumerate(lines):
+        if isinstance(line, (bytes, bytearray)) and not line.strip():
+            continue
+        line_number = first_line + offset
+        payload = None
+        try:
+            payload = json.loads(line) if isinstance(line, (bytes, bytearray)) else line
+            request = ScoringRequest.parse_obj(payload)
+        except ValueError as e:
+            # json.JSONDecodeError and pydantic's ValidationError both land here
+            message = format_validation_error(e) if isinstance(e, ValidationError) else f"Invalid JSON: {e}"
+            records.append(_error_record(line_number, message, payload))
+            continue
+        slots.append((len(records), line_number))
+        records.append(None)
+        requests.append(request)
+
+    if requests:
+        matrix, errors = pack_requests(requests)
+        scores = score_matrix(matrix, errors).tolist()
+        for index, ((slot, line_number), request, score, error) in enumerate(zip(slots, requests, scores, errors)):
+            if error is None:
+                records[slot] = {"user_id": request.user_id, "loan_id": request.loan_id, "credit_score": score}
+                if audit is not None:
+                    audit.append((request.user_id, request.loan_id, matrix[index].tolist(), score))
+            else:
+                records[slot] = _error_record(line_number, error, {"user_id": request.user_id, "loan_id": request.loan_id})
+
+    return records
+
+def encode_records(records: Iterable[Record]) -> bytes:
+    """
+    Serialize records as NDJSON
+    """
+    return b"".join(json.dumps(record).encode() + b"\n" for record in records)
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Split a stream of arbitrary byte chunks into lines
+    """
+    pending = bytearray()
+    for chunk in chunks:
+        pending += chunk
+        # Only re-split the buffer when the new chunk completes a line
+        if b"\n" not in chunk:
+            continue
+        *lines, rest = pending.split(b"\n")
+        pending = bytearray(rest)
+        for line in lines:
+            yield bytes(line)
+    if pending:
+        yield bytes(pending)
+
+async def aiter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Async version of iter_lines, for request bodies
+    """
+    pending = bytearray()
+    async for chunk in chunks:
+        pending += chunk
+        if b"\n" not in chunk:
+            continue
+        *lines, rest = pending.split(b"\n")
+        pending = bytearray(rest)
+        for line in lines:
+            yield bytes(line)
+    if pending:
+        yield bytes(pending)
+
+def iter_chunks(lines: Iterable[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[List[bytes], int]]:
+    """
+    Group lines into (chunk, first line number) pairs; line numbers start at 1
+    """
+    chunk: List[bytes] = []
+    first_line = 1
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk, first_line
+            first_line += len(chunk)
+            chunk = []
+    if chunk:
+        yield chunk, first_line
+
+async def aiter_chunks(lines: AsyncIterator[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[Tuple[List[bytes], int]]:
+    """
+    Async version of iter_chunks
+    """
+    chunk: List[bytes] = []
+    first_line = 1
+    async for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk, first_line
+            first_line += len(chunk)
+            chunk = []
+    if chunk:
+        yield chunk, first_line
+
+def score_lines(lines: Iterable[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Record]:
+    """
+    Score an iterable of NDJSON lines, yielding one record per non-blank line
+    """
+    for chunk, first_line in iter_chunks(lines, chunk_size):
+        yield from score_chunk(chunk, first_line)
+
+def iter_parquet_rows(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the rows of a Parquet file as payload dicts, one record batch at a time
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Reading Parquet input requires pyarrow (pip install pyarrow)") from None
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield from batch.to_pylist()
+
+def score_file(input_file: Iterable[Item], output_file, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Score NDJSON lines (a binary file object) or payloads into a binary output
+    file object in this process; returns line counts
+    """
+    counts = {"scored": 0, "errors": 0}
+    for chunk, first_line in iter_chunks(input_file, chunk_size):
+        records = score_chunk(chunk, first_line)
+        for record in records:
+            counts["errors" if "error" in record else "scored"] += 1
+        output_file.write(encode_records(records))
+    return counts
+
+def _score_chunk_in_worker(chunk: List[Item], first_line: int,
+                           audit: bool = False) -> Tuple[bytes, int, int, int, float, Optional[List[AuditItem]]]:
+    """
+    Process pool task: returns (encoded records, scored, errors, worker pid,
+    busy seconds, the AuditItems of the chunk when `audit`, else None)
+    """
+    start = time.perf_counter()
+    audited: Optional[List[AuditItem]] = [] if audit else None
+    records = score_chunk(chunk, first_line, audited)
+    errors = sum(1 for record in records if "error" in record)
+    encoded = encode_records(records)
+    return encoded, len(records) - errors, errors, os.getpid(), time.perf_counter() - start, audited
+
+def score_file_parallel(input_file: Iterable[Item], output_file, workers: int = 0,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Score NDJSON lines or payloads with a pool of worker processes
+
+    Chunks are handed out as they are read, with at most two per worker in
+    flight, and results are written strictly in input order. Returns line
+    counts plus per-worker throughput under "workers".
+    """
+    workers = workers or os.cpu_count() or 1
+    counts: Dict[str, Any] = {"scored": 0, "errors": 0}
+    per_worker: Dict[int, Dict[str, float]] = {}
+    pending: Deque[Future] = deque()
+
+    def write_oldest():
+        encoded, scored, errors, pid, busy, _ = pending.popleft().result()
+        output_file.write(encoded)
+        counts["scored"] += scored
+        counts["errors"] += errors
+        stats = per_worker.setdefault(pid, {"records": 0, "busy_seconds": 0.0})
+        stats["records"] += scored + errors
+        stats["busy_seconds"] += busy
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk, first_line in iter_chunks(input_file, chunk_size):
+            if len(pending) >= workers * 2:
+                write_oldest()
+            pending.append(pool.submit(_score_chunk_in_worker, chunk, first_line))
+        while pending:
+            write_oldest()
+
+    counts["workers"] = {
+        pid: dict(stats, records_per_second=stats["records"] / stats["busy_seconds"] if stats["busy_seconds"] else 0.0)
+        for pid, stats in per_worker.items()
+    }
+    return counts
+
+def _open(path: str, mode: str):
+    if path == "-":
+        return (sys.stdin if "r" in mode else sys.stdout).buffer
+    return open(path, mode)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.bulk", description="Bulk credit scoring of JSON Lines files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    score = commands.add_parser("score", help="score every line of an NDJSON file")
+    score.add_argument("input", help="input .jsonl file, or - for stdin")
+    score.add_argument("output", help="output .jsonl file, or - for stdout")
+    score.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="lines scored per vectorized batch")
+    score.add_argument("--workers", type=int, default=1, help="worker processes (1: score in this process, 0: one per CPU)")
+
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1 or args.workers < 0:
+        parser.error("--chunk-size must be positive and --workers non-negative")
+
+    start = time.perf_counter()
+    if args.input.endswith(".parquet"):
+        input_file = None
+        items: Iterable[Item] = iter_parquet_rows(args.input, args.chunk_size)
+    else:
+        input_file = items = _open(args.input, "rb")
+    output_file = _open(args.output, "wb")
+    try:
+        if args.workers == 1:
+            counts = score_file(items, output_file, args.chunk_size)
+        else:
+            counts = score_file_parallel(items, output_file, args.workers, args.chunk_size)
+    finally:
+        if input_file is not None and args.input != "-":
+            input_file.close()
+        if args.output != "-":
+            output_file.close()
+    elapsed = time.perf_counter() - start
+
+    total = counts["scored"] + counts["errors"]
+    print(
+        f"scored {counts['scored']} lines, {counts['errors']} errors "
+        f"in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f} lines/s)",
+        file=sys.stderr,
+    )
+    for pid, stats in sorted(counts.get("workers", {}).items()):
+        print(
+            f"  worker {pid}: {stats['records']} lines, {stats['busy_seconds']:.2f}s busy "
+            f"({stats['records_per_second']:,.0f} lines/s)",
+            file=sys.stderr,
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Idempotent result cache for scoring requests
+
+Upstream retries resend identical requests for the same batch_id/loan_id. Two
+kinds of key are used:
+
+- request_key: batch_id, loan_id and the canonicalized scoring inputs taken
+  from credit_features and summary (the feature row, see app.rules), plus the
+  rule version. Used after the request has been parsed.
+- body_key: a hash of the raw request body. The fast endpoint checks it
+  before decoding, so a byte-identical retry skips parsing entirely.
+
+Entries are bounded in number (least recently used evicted first) and expire
+after a TTL. The in-process backend is a dict per worker; the SQLite backend
+is a local file shared by every uvicorn worker on the host.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+from app.settings import settings
+
+def _digest(*parts: Any) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else repr(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+def request_key(rule_version: str, batch_id: str, loan_id: str, row: Sequence[Any]) -> str:
+    """
+    Key from the ids and the canonical scoring inputs; repr() of the row's
+    numbers is exact, so equal inputs always give equal keys
+    """
+    return _digest("request", rule_version, batch_id, loan_id, list(row))
+
+def body_key(rule_version: str, path: str, body: bytes) -> str:
+    """
+    Key from the raw bytes of a request body
+    """
+    return _digest("body", rule_version, path, body)
+
+class MemoryBackend:
+    """
+    In-process LRU + TTL store
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteBackend:
+    """
+    LRU + TTL store in a local SQLite file, shared between worker processes
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS score_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS score_cache_last_used ON score_cache (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[Any]:
+        db = self._connection()
+        now = time.time()
+        row = db.execute("SELECT value, expires_at FROM score_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            if db.execute("DELETE FROM score_cache WHERE key = ?", (key,)).rowcount:
+                self.evictions += 1
+            return None
+        db.execute("UPDATE score_cache SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        db = self._connection()
+        now = time.time()
+        db.execute(
+            "INSERT OR REPLACE INTO score_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + self.ttl_seconds, now),
+        )
+        # Trim in batches rather than counting rows on every write
+        self._writes += 1
+        if self._writes % 256 == 0:
+            self._trim(db)
+
+    def _trim(self, db: sqlite3.Connection) -> None:
+        excess = self.size() - self.max_entries
+        if excess > 0:
+            deleted = db.execute(
+                "DELETE FROM score_cache WHERE key IN "
+                "(SELECT key FROM score_cache ORDER BY last_used LIMIT ?)",
+                (excess,),
+            ).rowcount
+            self.evictions += deleted
+        self.evictions += db.execute("DELETE FROM score_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def size(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM score_cache").fetchone()[0]
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM score_cache")
+
+class ScoreCache:
+    """
+    Cache front-end with hit/miss/eviction counters (per process)
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.backend.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": self.backend.size(),
+            "max_entries": self.backend.max_entries,
+            "ttl_seconds": self.backend.ttl_seconds,
+        }
+
+def create_cache(backend: str = settings.cache_backend) -> Optional[ScoreCache]:
+    """
+    Build the cache configured by CREDIT_CACHE_* settings (None when disabled)
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return ScoreCache(MemoryBackend(settings.cache_max_entries, settings.cache_ttl_seconds))
+    if backend == "sqlite":
+        return ScoreCache(SQLiteBackend(settings.cache_path, settings.cache_max_entries, settings.cache_ttl_seconds))
+    raise ValueError(f"Unknown cache backend {backend!r} (expected none, memory or sqlite)")
+
+score_cache = create_cache()
@@ -0,0 +1,267 @@
+"""
+Duplicate and fraud-pattern index over detected assets across applicants
+
+Two indexes flag assets that were already submitted by another applicant:
+
+- photos: a 64-bit hash of the asset fingerprint (type, category, estimated
+  value, condition), the device (make, camera model, device model) and the
+  EXIF timestamp. The image file name is left out, so renaming the files of
+  a photo set does not hide it.
+- places: a grid of `grid_degrees` cells over the GPS coordinates (about
+  110 m at the default 0.001), keyed by cell and asset type; an asset of the
+  same type in the same or a neighbouring cell, submitted by another
+  applicant, is flagged.
+
+Each index is a fixed-capacity open-addressing hash table in a memory-mapped
+file: slots of (key, owner, count, last seen) with linear probing over at
+most MAX_PROBES slots. Memory and disk use are bounded by the capacity
+whatever the number of assets; when every slot a key may use is taken, the
+least recently seen one is replaced, so the index keeps the most recent
+submissions. A lookup reads one contiguous run of slots, so checking a
+request costs a few microseconds per asset. Only hashes are stored: the
+owner is a hash of the user_id.
+
+The table files are shared by every worker on the host (writes take an
+exclusive file lock) and persist across restarts. Enable the index with
+CREDIT_DUPLICATE_INDEX_PATH; /evaluate_credit then reports `duplicate_flags`
+for flagged assets.
+"""
+import fcntl
+import hashlib
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.models import DetectedAsset, LazyAssetList
+from app.settings import settings
+
+SLOT_DTYPE = np.dtype([("key", "<u8"), ("owner", "<u8"), ("count", "<u4"), ("seen", "<u4")])
+
+# Slots probed for one key; a key is always within this run of its home slot
+MAX_PROBES = 16
+
+DUPLICATE_PHOTO = "duplicate_photo"
+NEARBY_ASSET = "nearby_asset"
+
+def hash64(*parts: Any) -> int:
+    """
+    Nonzero 64-bit hash of the parts (0 marks an empty slot)
+    """
+    digest = hashlib.blake2b("\x1f".join(str(part) for part in parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+def photo_key(asset) -> int:
+    return hash64(
+        asset.asset_type, asset.asset_category, round(asset.estimated_value, 2), round(asset.condition_score, 2),
+        asset.camera_make, asset.camera_model, asset.device_model, asset.timestamp.strip(),
+    )
+
+def parse_gps(value: Any) -> Optional[Tuple[float, float]]:
+    """
+    (lat, lon) from {"lat", "lon"} / {"latitude", "longitude"} or a
+    [lat, lon] pair; None when missing or out of range
+    """
+    try:
+        if isinstance(value, dict):
+            lat = value.get("lat", value.get("latitude"))
+            lon = value.get("lon", value.get("lng", value.get("longitude")))
+        elif isinstance(value, (list, tuple)) and len(value) == 2:
+            lat, lon = value
+        else:
+            return None
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return None
+    return lat, lon
+
+def detected_assets(request) -> List[DetectedAsset]:
+    """
+    The request's detected assets as models; with lazy asset validation,
+    items that do not validate are left out of the duplicate check
+    """
+    assets = request.analysis_result.detected_assets
+    if not isinstance(assets, LazyAssetList):
+        return assets
+    models = []
+    for item in assets:
+        try:
+            models.append(DetectedAsset.parse_obj(item))
+        except ValueError:
+            continue
+    return models
+
+class HashTable:
+    """
+    Fixed-capacity (key -> owner, count, last seen) table in a memory-mapped file
+    """
+
+    def __init__(self, path: Union[str, Path], capacity: int):
+        if capacity < MAX_PROBES:
+            raise ValueError(f"capacity must be at least {MAX_PROBES}")
+        self.path = Path(path)
+        self.capacity = capacity
+        # Spare slots at the end, so a probe run never wraps around; the
+        # last one (never probed) holds the number of keys in its owner field
+        slots = capacity + MAX_PROBES
+        size = slots * SLOT_DTYPE.itemsize
+        if self.path.exists() and self.path.stat().st_size != size:
+            raise ValueError(f"{self.path} was created with a different capacity")
+        if not self.path.exists():
+            # Sparse: disk blocks are only allocated for slots in use
+            with open(self.path, "wb") as f:
+                f.truncate(size)
+        self._map = np.memmap(self.path, dtype=SLOT_DTYPE, mode="r+", shape=(slots,))
+        # Plain array views of the mapping: indexing them skips the memmap
+        # subclass overhead on every probe
+        self.slots = self._map.view(np.ndarray)
+        self._keys = self.slots["key"]
+        self._owners = self.slots["owner"]
+        self._counts = self.slots["count"]
+        self._seen = self.slots["seen"]
+        self._header = slots - 1
+
+    def _find(self, key: int) -> Tuple[int, List[int]]:
+        # Keys of the probe run as Python ints: one conversion, then list scans
+        start = key % self.capacity
+        return start, self._keys[start:start + MAX_PROBES].tolist()
+
+    def get(self, key: int) -> Optional[Tuple[int, int]]:
+        """
+        (owner, count) of a key, or None
+        """
+        start, run = self._find(key)
+        if key not in run:
+            return None
+        index = start + run.index(key)
+        return int(self._owners[index]), int(self._counts[index])
+
+    def add(self, key: int, owner: int, now: int) -> Tuple[int, int]:
+        """
+        Record one submission of `key` by `owner`
+        Returns the key's first owner and its count before this submission
+        (owner itself and 0 for a new key)
+        """
+        start, run = self._find(key)
+        if key in run:
+            index = start + run.index(key)
+            first_owner, count = int(self._owners[index]), int(self._counts[index])
+            self._counts[index] = min(count + 1, 0xFFFFFFFF)
+            self._seen[index] = now
+            return first_owner, count
+        if 0 in run:
+            index = start + run.index(0)
+            self._owners[self._header] += 1
+        else:
+            # Run full: replace the least recently seen key
+            index = start + int(np.argmin(self._seen[start:start + MAX_PROBES]))
+        self._keys[index] = key
+        self._owners[index] = owner
+        self._counts[index] = 1
+        self._seen[index] = now
+        return owner, 0
+
+    def used(self) -> int:
+        return int(self._owners[self._header])
+
+    def flush(self) -> None:
+        self._map.flush()
+
+class DuplicateIndex:
+    """
+    Photo and place indexes, checked and updated together for each request
+    """
+
+    def __init__(self, path: Union[str, Path], capacity: int = 1 << 24, grid_degrees: float = 0.001):
+        if not grid_degrees > 0:
+            raise ValueError("grid_degrees must be positive")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.grid_degrees = grid_degrees
+        self.photos = HashTable(self.path / "photos.idx", capacity)
+        self.places = HashTable(self.path / "places.idx", capacity)
+        self.checked = 0
+        self.flagged = 0
+        self._lock = threading.Lock()
+        self._lock_file = open(self.path / ".lock", "a")
+
+    def cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.grid_degrees), math.floor(lon / self.grid_degrees)
+
+    def place_key(self, cell: Tuple[int, int], asset_type: str) -> int:
+        return hash64(cell[0], cell[1], asset_type)
+
+    def check(self, user_id: str, assets: Sequence[Any], record: bool = True) -> List[Dict[str, Any]]:
+        """
+        Flags for assets already submitted by another applicant; with
+        `record`, the assets are then added to the indexes under `user_id`
+        """
+        owner = hash64(user_id)
+        now = int(time.time())
+        flags = []
+        with self._lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                for asset in assets:
+                    flags.extend(self._check_asset(asset, owner, now, record))
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self.checked += len(assets)
+            self.flagged += len(flags)
+        return flags
+
+    def _check_asset(self, asset: Any, owner: int, now: int, record: bool) -> List[Dict[str, Any]]:
+        flags = []
+        key = photo_key(asset)
+        if record:
+            first_owner, count = self.photos.add(key, owner, now)
+        else:
+            found = self.photos.get(key)
+            first_owner, count = found if found is not None else (owner, 0)
+        if first_owner != owner:
+            flags.append({"image_source": asset.image_source, "flag": DUPLICATE_PHOTO, "previous_submissions": count})
+
+        gps = parse_gps(asset.gps_coordinates)
+        if gps is not None:
+            row, col = self.cell(*gps)
+            nearby = 0
+            for d_row in (-1, 0, 1):
+                for d_col in (-1, 0, 1):
+                    found = self.places.get(self.place_key((row + d_row, col + d_col), asset.asset_type))
+                    if found is not None and found[0] != owner:
+                        nearby += found[1]
+            if record:
+                self.places.add(self.place_key((row, col), asset.asset_type), owner, now)
+            if nearby:
+                flags.append({"image_source": asset.image_source, "flag": NEARBY_ASSET, "previous_submissions": nearby})
+        return flags
+
+    def flush(self) -> None:
+        with self._lock:
+            self.photos.flush()
+            self.places.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.photos.capacity,
+            "photos": self.photos.used(),
+            "places": self.places.used(),
+            "grid_degrees": self.grid_degrees,
+            "checked_assets": self.checked,
+            "flagged_assets": self.flagged,
+        }
+
+def create_duplicate_index() -> Optional[DuplicateIndex]:
+    """
+    Index configured by CREDIT_DUPLICATE_INDEX_PATH (None when unset)
+    """
+    if not settings.duplicate_index_path:
+        return None
+    return DuplicateIndex(settings.duplicate_index_path, settings.duplicate_index_capacity, settings.duplicate_grid_degrees)
+
+duplicate_index = create_duplicate_index()
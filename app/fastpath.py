@@ -0,0 +1,167 @@
+"""
+Fast request path for scoring: orjson decoding and a strict type check
+
+Pydantic v1 validation dominates the cost of a scoring request. Most payloads
+already carry exactly the JSON types the models declare, and for those
+validation only confirms them. This module derives a strict checker from the
+pydantic models (str, int, float, bool, lists, dicts, nested models) and, when
+a decoded payload passes it, reads the scoring inputs straight out of the dicts
+into a feature row. When a payload does not pass (a missing field, a
+number sent as a string, ...), callers fall back to full pydantic validation,
+so coercion rules and error responses stay exactly those of the models.
+"""
+import json
+import typing
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from app.models import CreditFeatures, LazyAssetList, ScoringRequest
+from app.rules import FEATURE_INPUTS, LOAN_PRODUCTS, parse_exif_rate, request_loan_amount, valid_loan_amount
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+Checker = Callable[[Any], bool]
+
+def loads(body: bytes) -> Any:
+    """
+    Decode a JSON body (orjson when available)
+    """
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode to JSON bytes (orjson when available)
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def _is_str(value: Any) -> bool:
+    return type(value) is str
+
+def _is_int(value: Any) -> bool:
+    return type(value) is int
+
+def _is_float(value: Any) -> bool:
+    # pydantic turns JSON integers into floats for float fields
+    return type(value) is float or type(value) is int
+
+def _is_bool(value: Any) -> bool:
+    return type(value) is bool
+
+def _is_list(value: Any) -> bool:
+    return type(value) is list
+
+def _any(value: Any) -> bool:
+    return True
+
+_SCALARS: Dict[Any, Checker] = {str: _is_str, int: _is_int, float: _is_float, bool: _is_bool, Any: _any}
+
+def _type_checker(annotation: Any) -> Optional[Checker]:
+    if annotation in _SCALARS:
+        return _SCALARS[annotation]
+    if isinstance(annotation, type) and issubclass(annotation, LazyAssetList):
+        return _is_list
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return compile_checker(annotation)
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is list and args:
+        item = _type_checker(args[0])
+        if item is None:
+            return None
+        return lambda value: type(value) is list and all(item(v) for v in value)
+    if origin is dict and len(args) == 2:
+        key, item = _type_checker(args[0]), _type_checker(args[1])
+        if key is None or item is None:
+            return None
+        return lambda value: type(value) is dict and all(key(k) and item(v) for k, v in value.items())
+    return None
+
+def compile_checker(model: typing.Type[BaseModel]) -> Optional[Checker]:
+    """
+    Build a function returning True when a decoded payload has exactly the JSON
+    types `model` declares (extra keys are ignored, as pydantic does)
+    Returns None for models using types the checker does not know
+    """
+    fields = []
+    for name, field in model.__fields__.items():
+        check = _type_checker(field.outer_type_)
+        if check is None:
+            return None
+        fields.append((field.alias, check, field.required, field.allow_none))
+
+    def check_model(value: Any) -> bool:
+        if type(value) is not dict:
+            return False
+        for name, check, required, allow_none in fields:
+            if name not in value:
+                if required:
+                    return False
+                continue
+            item = value[name]
+            if item is None:
+                if not allow_none:
+                    return False
+            elif not check(item):
+                return False
+        return True
+
+    return check_model
+
+_check_request = compile_checker(ScoringRequest)
+
+# pydantic converts JSON integers in float fields; mirror it in the row
+_FLOAT_INPUTS = frozenset(
+    name for name, field in CreditFeatures.__fields__.items() if field.outer_type_ is float
+)
+_CONVERTERS = tuple(float if name in _FLOAT_INPUTS else None for name in FEATURE_INPUTS)
+
+class FastScoringInput:
+    """
+    The parts of a request the scoring endpoint needs, read from a checked payload
+    """
+    __slots__ = ("user_id", "loan_id", "batch_id", "row", "has_assets")
+
+    def __init__(self, user_id: str, loan_id: str, batch_id: str, row: List[Any], has_assets: bool):
+        self.user_id = user_id
+        self.loan_id = loan_id
+        self.batch_id = batch_id
+        self.row = row
+        self.has_assets = has_assets
+
+def parse_fast(payload: Any) -> Optional[FastScoringInput]:
+    """
+    Read the scoring inputs from a decoded payload that passes the strict check
+    Returns None when the payload needs full pydantic validation
+    """
+    if _check_request is None or not _check_request(payload):
+        return None
+
+    loan_amount = payload.get("loan_amount")
+    product_code = payload.get("product_code")
+    if loan_amount is not None and not valid_loan_amount(loan_amount):
+        return None
+    if product_code is not None and product_code not in LOAN_PRODUCTS:
+        return None
+
+    result = payload["analysis_result"]
+    features = result["credit_features"]
+    row = [
+        features[name] if convert is None else convert(features[name])
+        for name, convert in zip(FEATURE_INPUTS, _CONVERTERS)
+    ]
+    row.append(parse_exif_rate(result["summary"]["exif_verification_rate"]))
+    row.append(result["total_images_processed"])
+    row.append(result["total_assets_detected"])
+    row.append(request_loan_amount(None if loan_amount is None else float(loan_amount), product_code))
+    return FastScoringInput(
+        payload["user_id"], payload["loan_id"], payload["batch_id"], row, bool(result["detected_assets"])
+    )
@@ -0,0 +1,248 @@
+"""
+Normalized feature records: a request's scoring inputs, parsed once
+
+A validated request still carries its scoring inputs as model attributes and
+strings (the EXIF rate arrives as "100.0%"). normalize_requests() turns
+requests into compact fixed-width records (a NumPy structured array) holding:
+
+- the ids (UTF-8, at most ID_BYTES bytes each)
+- `inputs`: the feature row laid out like INPUT_FIELDS as float64, the EXIF
+  rate already parsed; `records["inputs"]` is directly the matrix the batch
+  scorer evaluates
+- `error`: why the request cannot be scored (see ERROR_MESSAGES), 0 if it can
+- `asset_count`: the number of detected assets
+
+Records are stored in a `.frec` file: a short header (magic, JSON dtype
+description) followed by the raw records. Files can be appended to and are
+read back memory-mapped, so re-scoring after a rule change does no JSON or
+string parsing at all:
+
+    python -m app.features normalize requests.jsonl book.frec
+    python -m app.features score book.frec scores.jsonl [--rules new_rules.json]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.batch import request_error, rows_to_matrix
+from app.bulk import DEFAULT_CHUNK_SIZE, format_validation_error, iter_chunks
+from app.models import CreditAnalysisRequest, DetectedAsset, LazyAssetList, ScoringRequest
+from app.rules import DEFAULT_RULES, INPUT_FIELDS, CompiledRules, extract_row, load_rules
+
+ID_BYTES = 64
+
+FEATURE_DTYPE = np.dtype([
+    ("user_id", f"S{ID_BYTES}"),
+    ("loan_id", f"S{ID_BYTES}"),
+    ("batch_id", f"S{ID_BYTES}"),
+    ("inputs", np.float64, (len(INPUT_FIELDS),)),
+    ("error", np.uint8),
+    ("asset_count", np.uint32),
+])
+
+# Indexed by the `error` field
+ERROR_MESSAGES = (
+    None,
+    "Asset value cannot be negative",
+    "No assets detected in analysis",
+    "Invalid exif_verification_rate",
+)
+_ERROR_CODES = {message: code for code, message in enumerate(ERROR_MESSAGES) if message}
+
+_MAGIC = b"CRFEAT1\n"
+_EMPTY_ROW = (0.0,) * len(INPUT_FIELDS)
+
+def _encode_id(value: str, name: str) -> bytes:
+    encoded = value.encode()
+    if len(encoded) > ID_BYTES:
+        raise ValueError(f"{name} is longer than {ID_BYTES} bytes")
+    return encoded
+
+def _assets(request: CreditAnalysisRequest) -> List[DetectedAsset]:
+    assets = request.analysis_result.detected_assets
+    if isinstance(assets, LazyAssetList):
+        # Normalization is the one place the lean model's assets get validated
+        return assets.validated()
+    return assets
+
+def check_normalizable(request: CreditAnalysisRequest) -> None:
+    """
+    Raise ValueError for a request normalize_requests() cannot store: an id
+    longer than ID_BYTES, or (lean model) an invalid detected asset
+    """
+    for name in ("user_id", "loan_id", "batch_id"):
+        _encode_id(getattr(request, name), name)
+    _assets(request)
+
+def normalize_requests(requests: Sequence[CreditAnalysisRequest]) -> np.ndarray:
+    """
+    Convert validated requests into FEATURE_DTYPE records
+    Raises ValueError for an id longer than ID_BYTES
+    """
+    records = np.zeros(len(requests), dtype=FEATURE_DTYPE)
+    rows = []
+    for i, request in enumerate(requests):
+        record = records[i]
+        record["user_id"] = _encode_id(request.user_id, "user_id")
+        record["loan_id"] = _encode_id(request.loan_id, "loan_id")
+        record["batch_id"] = _encode_id(request.batch_id, "batch_id")
+
+        error = request_error(request)
+        row = _EMPTY_ROW
+        if error is None:
+            try:
+                row = extract_row(request)
+            except ValueError:
+                error = "Invalid exif_verification_rate"
+        record["error"] = _ERROR_CODES[error] if error else 0
+        rows.append(row)
+
+        record["asset_count"] = len(_assets(request))
+
+    if rows:
+        records["inputs"] = rows_to_matrix(rows)
+    return records
+
+def score_records(records: np.ndarray, rules: CompiledRules = DEFAULT_RULES) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """
+    Score records in one vectorized pass, straight from their `inputs` matrix
+    Returns int64 scores and a per-record error (None for scored records)
+    """
+    scores, score_errors = rules.score_matrix(records["inputs"])
+    errors: List[Optional[str]] = [ERROR_MESSAGES[code] for code in records["error"].tolist()]
+    for row, error in score_errors.items():
+        if errors[row] is None:
+            errors[row] = error
+    return scores, errors
+
+# Record files
+
+def _header() -> bytes:
+    description = json.dumps({"dtype": FEATURE_DTYPE.descr, "fields": list(INPUT_FIELDS)}).encode()
+    header = _MAGIC + len(description).to_bytes(4, "little") + description
+    # Align the first record to 64 bytes
+    return header + b" " * (-len(header) % 64)
+
+def _read_header(f) -> int:
+    """
+    Check a record file's header; returns the offset of the first record
+    """
+    magic = f.read(len(_MAGIC))
+    if magic != _MAGIC:
+        raise ValueError("not a feature record file")
+    length = int.from_bytes(f.read(4), "little")
+    description = json.loads(f.read(length))
+    if description["fields"] != list(INPUT_FIELDS) or np.dtype([tuple(d) for d in description["dtype"]]) != FEATURE_DTYPE:
+        raise ValueError("feature record file was written with a different record layout")
+    offset = len(_MAGIC) + 4 + length
+    return offset + (-offset % 64)
+
+def append_records(path: Union[str, Path], records: np.ndarray) -> None:
+    """
+    Append records to a record file, creating it if needed
+    """
+    path = Path(path)
+    new = not path.exists() or path.stat().st_size == 0
+    if not new:
+        with open(path, "rb") as f:
+            _read_header(f)
+    with open(path, "ab") as f:
+        if new:
+            f.write(_header())
+        f.write(np.ascontiguousarray(records, dtype=FEATURE_DTYPE).tobytes())
+
+def read_records(path: Union[str, Path]) -> np.ndarray:
+    """
+    Memory-map a record file (read-only)
+    """
+    with open(path, "rb") as f:
+        offset = _read_header(f)
+    size = Path(path).stat().st_size - offset
+    if size == 0:
+        return np.zeros(0, dtype=FEATURE_DTYPE)
+    return np.memmap(path, dtype=FEATURE_DTYPE, mode="r", offset=offset, shape=(size // FEATURE_DTYPE.itemsize,))
+
+def parse_lines(lines: Iterable[bytes]) -> Tuple[List[CreditAnalysisRequest], List[str]]:
+    """
+    Validate NDJSON lines; returns the requests and one message per bad line
+    (including requests normalize_requests() could not store)
+    """
+    requests = []
+    failures = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            payload = json.loads(line)
+        except ValueError as e:
+            failures.append(f"Invalid JSON: {e}")
+            continue
+        try:
+            request = ScoringRequest.parse_obj(payload)
+            check_normalizable(request)
+        except ValidationError as e:
+            failures.append(format_validation_error(e))
+            continue
+        except ValueError as e:
+            failures.append(str(e))
+            continue
+        requests.append(request)
+    return requests, failures
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.features", description="Normalized feature record files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    normalize = commands.add_parser("normalize", help="append the requests of an NDJSON file to a record file")
+    normalize.add_argument("input", help="input .jsonl file, or - for stdin")
+    normalize.add_argument("records", help="record file to create or append to")
+    normalize.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    score = commands.add_parser("score", help="score a record file, writing NDJSON results")
+    score.add_argument("records", help="record file")
+    score.add_argument("output", help="output .jsonl file, or - for stdout")
+    score.add_argument("--rules", help="rule definition to score with (default: the active rules)")
+
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+
+    if args.command == "normalize":
+        input_file = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+        written = skipped = 0
+        try:
+            for chunk, _ in iter_chunks(input_file, args.chunk_size):
+                requests, failures = parse_lines(chunk)
+                append_records(args.records, normalize_requests(requests))
+                written += len(requests)
+                skipped += len(failures)
+        finally:
+            if args.input != "-":
+                input_file.close()
+        print(f"wrote {written} records, skipped {skipped} invalid lines in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        return 0
+
+    rules = load_rules(args.rules) if args.rules else DEFAULT_RULES
+    records = read_records(args.records)
+    scores, errors = score_records(records, rules)
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for user_id, loan_id, score_, error in zip(
+            records["user_id"].tolist(), records["loan_id"].tolist(), scores.tolist(), errors
+        ):
+            record: Dict[str, Any] = {"user_id": user_id.decode(), "loan_id": loan_id.decode()}
+            record.update({"error": error} if error else {"credit_score": score_})
+            output.write(json.dumps(record).encode() + b"\n")
+    finally:
+        if args.output != "-":
+            output.close()
+    print(f"scored {len(records)} records with rules {rules.version} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Request body guard: size, asset-count and nesting-depth limits
+
+`BodyGuardMiddleware` reads the body of every POST itself, before any
+endpoint sees it, and answers 413 when a limit is crossed:
+
+- max_body_bytes: a larger Content-Length is rejected before a single byte
+  is read; chunked bodies are cut off when they reach the limit
+  (max_batch_body_bytes for the /batch endpoints)
+- max_detected_assets: elements in any `detected_assets` array
+- max_json_depth: nesting of JSON objects and arrays (e.g. inside the
+  free-form gps_coordinates)
+
+The byte limit is enforced as the body arrives, so a worker holds at most
+the limit per request. The asset count and depth are then checked by
+`check_json_shape`, which only looks at quotes, brackets and commas (no
+values are decoded), so an oversized payload is never parsed or validated.
+Bodies within the limits are passed on unchanged. The MessagePack
+endpoints (msgpack_paths; decided by route, never by the client's
+Content-Type) are only held to the byte limit. The streaming and upload endpoints
+(body_guard_exempt_paths) read unbounded bodies incrementally and are not
+guarded.
+"""
+import re
+from typing import Sequence
+
+import numpy as np
+from starlette.responses import JSONResponse
+
+# A detected_assets key through the bracket opening its list, and a string
+_ASSETS_LIST = re.compile(rb'"detected_assets"\s*:\s*\[')
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+# Every byte but quotes, brackets, commas and the marker of an assets list
+_NOT_STRUCTURE = bytes(c for c in range(256) if c not in b'"{}[],\x01')
+_OPEN, _CLOSE, _ASSETS_OPEN, _COMMA, _QUOTE = (np.uint8(c) for c in b"{}\x01,\"")
+
+class BodyTooLarge(Exception):
+    pass
+
+def check_json_shape(body: bytes, max_depth: int = 32, max_assets: int = 1000) -> None:
+    """
+    Check the nesting depth and detected_assets lengths of a JSON body
+    without parsing it; raises BodyTooLarge. Limits of 0 are not enforced.
+
+    Works on the structure only: every detected_assets list is replaced by
+    a marker byte and everything but quotes, brackets and commas is deleted
+    (in C). When even counting every bracket and comma stays within the
+    limits nothing more is needed; otherwise strings are masked out and the
+    depth after every remaining byte is a cumulative sum (NumPy).
+    """
+    marked = _ASSETS_LIST.sub(b"\x01", body) if max_assets else body
+    if b"\\" in marked:
+        # Escaped quotes: strings are dropped by the regex engine first
+        marked = _STRING.sub(b"", marked)
+    structure = marked.translate(None, _NOT_STRUCTURE)
+    opened = structure.count(b"[") + structure.count(b"{") + structure.count(b"\x01")
+    if (not max_depth or opened <= max_depth) and (b"\x01" not in structure or structure.count(b",") < max_assets):
+        return
+
+    codes = np.frombuffer(structure, dtype=np.uint8)
+    # Every quote left opens or closes a string
+    outside = np.bitwise_xor.accumulate((codes == _QUOTE).view(np.uint8)) == 0
+    # [ and ] differ from { and } by 0x20
+    folded = codes | np.uint8(0x20)
+    opens = ((folded == _OPEN) | (codes == _ASSETS_OPEN)) & outside
+    closes = (folded == _CLOSE) & outside
+    depth = np.cumsum(opens.view(np.int8) - closes.view(np.int8), dtype=np.int32)
+    if max_depth and int(depth.max()) > max_depth:
+        raise BodyTooLarge(f"JSON nesting deeper than {max_depth} levels")
+    if not max_assets:
+        return
+    starts = np.flatnonzero(codes == _ASSETS_OPEN)
+    if not starts.size:
+        return
+    commas = (codes == _COMMA) & outside
+    levels = depth[starts]
+    for level in np.unique(levels).tolist():
+        at_level = starts[levels == level]
+        # Each list ends at the first close back to the enclosing level
+        ends = np.flatnonzero(closes & (depth == level - 1))
+        end_at = np.searchsorted(ends, at_level)
+        stops = np.where(end_at < ends.size, ends[np.minimum(end_at, ends.size - 1)], depth.size)
+        separators = np.flatnonzero(commas & (depth == level))
+        counts = np.searchsorted(separators, stops) - np.searchsorted(separators, at_level)
+        if int(counts.max()) >= max_assets:
+            raise BodyTooLarge(f"more than {max_assets} detected_assets")
+
+class BodyGuardMiddleware:
+    """
+    ASGI middleware enforcing the body limits on POST requests (see module docstring)
+    """
+
+    def __init__(self, app, max_body_bytes: int = 1 << 20, max_batch_body_bytes: int = 32 << 20,
+                 max_detected_assets: int = 1000, max_json_depth: int = 32, exempt_paths: Sequence[str] = (),
+                 msgpack_paths: Sequence[str] = ()):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        self.max_batch_body_bytes = max_batch_body_bytes
+        self.max_detected_assets = max_detected_assets
+        self.max_json_depth = max_json_depth
+        self.exempt_paths = tuple(exempt_paths)
+        self.msgpack_paths = tuple(msgpack_paths)
+
+    def _applies(self, scope) -> bool:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return False
+        return not _under(scope["path"], self.exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        limit = self.max_batch_body_bytes if scope["path"].endswith("/batch") else self.max_body_bytes
+        check_shape = not _under(scope["path"], self.msgpack_paths) and (self.max_json_depth or self.max_detected_assets)
+
+        try:
+            declared = headers.get(b"content-length")
+            if limit and declared is not None and declared.isdigit() and int(declared) > limit:
+                raise BodyTooLarge(f"body larger than {limit} bytes")
+            chunks = []
+            size = 0
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message["type"] != "http.request":
+                    # Client disconnected: nobody to answer
+                    return
+                chunk = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                size += len(chunk)
+                if limit and size > limit:
+                    raise BodyTooLarge(f"body larger than {limit} bytes")
+                chunks.append(chunk)
+            body = b"".join(chunks)
+            if check_shape:
+                check_json_shape(body, self.max_json_depth, self.max_detected_assets)
+        except BodyTooLarge as e:
+            response = JSONResponse({"detail": f"Request too large: {e}"}, status_code=413, headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, _replay(body, receive), send)
+
+def _under(path: str, prefixes: Sequence[str]) -> bool:
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in prefixes)
+
+def _replay(body: bytes, receive):
+    """
+    A receive callable that delivers the buffered body as one message, then
+    defers to the server (for the disconnect)
+    """
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
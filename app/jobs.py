@@ -0,0 +1,426 @@
+"""
+Asynchronous scoring jobs for large NDJSON batches
+
+A job is submitted with `POST /jobs` (an NDJSON upload, or `?path=` naming a
+file under CREDIT_JOBS_INPUT_DIR), answered right away with its id, and scored
+in the background with the bulk pipeline (app.bulk): chunks of lines are
+validated and scored by the batch engine, in a process pool when
+CREDIT_JOBS_WORKERS is not 1, and written to a result file in input order, one
+record per non-blank line exactly like `python -m app.bulk score`. Clients poll
+`GET /jobs/{id}` for status and progress and download
+`GET /jobs/{id}/result` once the job has succeeded.
+
+Jobs live in a SQLite database next to the uploaded inputs and the results
+(CREDIT_JOBS_DIR), so they survive a restart. After every chunk the job
+records how far it has read its input and written its result; a job that was
+interrupted resumes from that checkpoint rather than from the start. Every
+uvicorn worker runs a dispatcher, and claiming a job is a single transaction
+that gives the job a new owner token. While a job runs, a timer refreshes its
+heartbeat several times per CREDIT_JOBS_STALE_SECONDS; a job whose heartbeat
+stopped for that long is handed to another worker. Checkpoints, heartbeats
+and the final status only apply for the current owner, so a runner that lost
+its job (stalled past the limit and requeued) stops at its next write instead
+of running the job a second time alongside the new owner.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.audit import AuditLog, audit_log
+from app.bulk import DEFAULT_CHUNK_SIZE, _score_chunk_in_worker, encode_records, iter_chunks, score_chunk
+from app.settings import settings
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_COLUMNS = (
+    "id", "status", "input_path", "owns_input", "total_bytes", "input_offset", "output_offset",
+    "lines", "scored", "errors", "error", "owner", "created_at", "started_at", "updated_at", "finished_at",
+)
+
+class LostJob(Exception):
+    """
+    The job was requeued and claimed by another runner
+    """
+
+class JobStore:
+    """
+    Job rows in a local SQLite file, shared between worker processes
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        db = self._connection()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, input_path TEXT NOT NULL, owns_input INTEGER NOT NULL, "
+            "total_bytes INTEGER NOT NULL, input_offset INTEGER NOT NULL DEFAULT 0, "
+            "output_offset INTEGER NOT NULL DEFAULT 0, lines INTEGER NOT NULL DEFAULT 0, "
+            "scored INTEGER NOT NULL DEFAULT 0, errors INTEGER NOT NULL DEFAULT 0, error TEXT, owner TEXT, "
+            "created_at REAL NOT NULL, started_at REAL, updated_at REAL NOT NULL, finished_at REAL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _row(self, row: Optional[Tuple]) -> Optional[Dict[str, Any]]:
+        return None if row is None else dict(zip(_COLUMNS, row))
+
+    def create(self, job_id: str, input_path: str, owns_input: bool, total_bytes: int) -> Dict[str, Any]:
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO jobs (id, status, input_path, owns_input, total_bytes, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, input_path, int(owns_input), total_bytes, now, now),
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._row(self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone())
+
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        Mark the oldest queued job as running for `owner` and return it; its
+        `owner` is a token unique to this claim
+        """
+        db = self._connection()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE jobs SET status = ?, owner = ?, started_at = COALESCE(started_at, ?), updated_at = ? "
+                    "WHERE id = ?",
+                    (RUNNING, f"{owner}/{uuid.uuid4().hex[:8]}", now, now, row[0]),
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return None if row is None else self.get(row[0])
+
+    # The updates below apply only while `owner` (the token from claim) still
+    # runs the job, and return whether they did
+
+    def checkpoint(self, job_id: str, owner: str, input_offset: int, output_offset: int, lines: int,
+                   scored: int, errors: int) -> bool:
+        return self._connection().execute(
+            "UPDATE jobs SET input_offset = ?, output_offset = ?, lines = ?, scored = ?, errors = ?, updated_at = ? "
+            "WHERE id = ? AND owner = ? AND status = ?",
+            (input_offset, output_offset, lines, scored, errors, time.time(), job_id, owner, RUNNING),
+        ).rowcount == 1
+
+    def heartbeat(self, job_id: str, owner: str) -> bool:
+        return self._connection().execute(
+            "UPDATE jobs SET updated_at = ? WHERE id = ? AND owner = ? AND status = ?",
+            (time.time(), job_id, owner, RUNNING),
+        ).rowcount == 1
+
+    def owns(self, job_id: str, owner: str) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM jobs WHERE id = ? AND owner = ? AND status = ?", (job_id, owner, RUNNING)
+        ).fetchone() is not None
+
+    def finish(self, job_id: str, owner: str, status: str, error: Optional[str] = None) -> bool:
+        now = time.time()
+        return self._connection().execute(
+            "UPDATE jobs SET status = ?, error = ?, owner = NULL, updated_at = ?, finished_at = ? "
+            "WHERE id = ? AND owner = ? AND status = ?",
+            (status, error, now, now, job_id, owner, RUNNING),
+        ).rowcount == 1
+
+    def release(self, job_id: str, owner: str) -> bool:
+        """
+        Put a running job back in the queue; it resumes from its checkpoint
+        """
+        return self._connection().execute(
+            "UPDATE jobs SET status = ?, owner = NULL, updated_at = ? WHERE id = ? AND owner = ? AND status = ?",
+            (QUEUED, time.time(), job_id, owner, RUNNING),
+        ).rowcount == 1
+
+    def requeue_stale(self, stale_seconds: float) -> int:
+        """
+        Requeue running jobs without a heartbeat for `stale_seconds`
+        """
+        now = time.time()
+        return self._connection().execute(
+            "UPDATE jobs SET status = ?, owner = NULL, updated_at = ? WHERE status = ? AND updated_at < ?",
+            (QUEUED, now, RUNNING, now - stale_seconds),
+        ).rowcount
+
+class JobQueue:
+    """
+    Job submission plus a background dispatcher that runs one job at a time
+    per process, scoring its chunks with `workers` processes (1: in the
+    dispatcher thread, 0: one per CPU)
+    """
+
+    def __init__(self, directory: str, workers: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 poll_seconds: float = 1.0, stale_seconds: float = 60.0, input_dir: Optional[str] = None,
+                 audit_log: Optional[AuditLog] = None):
+        self.directory = Path(directory)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self.input_dir = Path(input_dir).resolve() if input_dir else None
+        self.audit_log = audit_log
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._store: Optional[JobStore] = None
+        self._store_lock = threading.Lock()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def store(self) -> JobStore:
+        # Created on first use, so a service that never receives a job
+        # leaves no files behind
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    (self.directory / "inputs").mkdir(parents=True, exist_ok=True)
+                    (self.directory / "results").mkdir(exist_ok=True)
+                    self._store = JobStore(str(self.directory / "jobs.sqlite3"))
+        return self._store
+
+    def new_upload(self) -> Tuple[str, Path]:
+        """
+        A fresh job id and the path its uploaded input should be written to
+        """
+        job_id = uuid.uuid4().hex
+        self.store
+        return job_id, self.directory / "inputs" / f"{job_id}.jsonl"
+
+    def submit_upload(self, job_id: str, path: Path) -> Dict[str, Any]:
+        """
+        Queue a job for an input written to the path from new_upload()
+        """
+        return self._submit(job_id, path, owns_input=True)
+
+    def submit_path(self, path: str) -> Dict[str, Any]:
+        """
+        Queue a job reading a local file; raises PermissionError outside
+        input_dir and FileNotFoundError for a missing file
+        """
+        if self.input_dir is None:
+            raise PermissionError("Local file jobs are disabled (set CREDIT_JOBS_INPUT_DIR)")
+        resolved = Path(path).resolve()
+        if self.input_dir != resolved and self.input_dir not in resolved.parents:
+            raise PermissionError(f"Input files must be under {self.input_dir}")
+        if not resolved.is_file():
+            raise FileNotFoundError(f"No such input file: {path}")
+        return self._submit(uuid.uuid4().hex, resolved, owns_input=False)
+
+    def _submit(self, job_id: str, path: Path, owns_input: bool) -> Dict[str, Any]:
+        job = self.store.create(job_id, str(path), owns_input, path.stat().st_size)
+        self.start()
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return self.store.list(limit)
+
+    def result_path(self, job_id: str) -> Path:
+        return self.directory / "results" / f"{job_id}.jsonl"
+
+    def start(self, resume: bool = False) -> None:
+        """
+        Start the dispatcher; with `resume`, only when a job database already
+        exists (so queued or interrupted jobs pick up after a restart)
+        """
+        if resume and not (self.directory / "jobs.sqlite3").exists():
+            return
+        if self._dispatcher is None:
+            self._stopped.clear()
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="job-dispatcher", daemon=True)
+            self._dispatcher.start()
+
+    def stop(self) -> None:
+        """
+        Stop after the current chunk; a running job is put back in the queue
+        """
+        if self._dispatcher is not None:
+            self._stopped.set()
+            self._wakeup.set()
+            self._dispatcher.join()
+            self._dispatcher = None
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _dispatch_loop(self) -> None:
+        while not self._stopped.is_set():
+            self.store.requeue_stale(self.stale_seconds)
+            job = self.store.claim(self.owner)
+            if job is None:
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+                continue
+            self.run(job)
+
+    def run(self, job: Dict[str, Any]) -> None:
+        """
+        Score a claimed job from its checkpoint to the end of its input
+        """
+        job_id, owner = job["id"], job["owner"]
+        lost = threading.Event()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, owner, lost, done),
+                                     name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            finished = self._score(job, lost)
+        except LostJob:
+            # The new owner finishes the job
+            return
+        except Exception as e:
+            self.store.finish(job_id, owner, FAILED, f"{type(e).__name__}: {e}")
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+        if not finished:
+            self.store.release(job_id, owner)
+            return
+        if self.store.finish(job_id, owner, SUCCEEDED) and job["owns_input"]:
+            Path(job["input_path"]).unlink(missing_ok=True)
+
+    def _heartbeat(self, job_id: str, owner: str, lost: threading.Event, done: threading.Event) -> None:
+        # Several beats per stale interval, so one late beat is not fatal
+        while not done.wait(self.stale_seconds / 4):
+            if not self.store.heartbeat(job_id, owner):
+                lost.set()
+                return
+
+    def _score(self, job: Dict[str, Any], lost: threading.Event) -> bool:
+        """
+        Returns False when stopped before the end of the input; raises
+        LostJob as soon as another runner owns the job
+        """
+        job_id, owner = job["id"], job["owner"]
+        input_offset, output_offset = job["input_offset"], job["output_offset"]
+        lines, scored, errors = job["lines"], job["scored"], job["errors"]
+        result_path = self.result_path(job_id)
+
+        with open(job["input_path"], "rb") as input_file, open(result_path, "ab") as output_file:
+            # Drop whatever was written after the last checkpoint
+            output_file.truncate(output_offset)
+            input_file.seek(input_offset)
+            chunks = iter_chunks(input_file, self.chunk_size)
+            pending: Deque[Tuple[Any, int, int]] = deque()
+            audit = self.audit_log is not None
+
+            def write_oldest() -> None:
+                nonlocal input_offset, output_offset, lines, scored, errors
+                result, size, count = pending.popleft()
+                if isinstance(result, Future):
+                    encoded, chunk_scored, chunk_errors, _, _, audited = result.result()
+                else:
+                    encoded, chunk_scored, chunk_errors, audited = result
+                if lost.is_set() or not self.store.owns(job_id, owner):
+                    raise LostJob(job_id)
+                output_file.write(encoded)
+                output_file.flush()
+                input_offset += size
+                output_offset += len(encoded)
+                lines += count
+                scored += chunk_scored
+                errors += chunk_errors
+                if not self.store.checkpoint(job_id, owner, input_offset, output_offset, lines, scored, errors):
+                    raise LostJob(job_id)
+                # Scores count as issued once checkpointed: a resumed run
+                # scores the lines after the last checkpoint again
+                if audited:
+                    self.audit_log.add_rows(audited)
+
+            for chunk, first_line in chunks:
+                # Line numbers continue from where an interrupted run stopped
+                first_line += job["lines"]
+                size = sum(len(line) for line in chunk)
+                if self.workers == 1:
+                    audited = [] if audit else None
+                    records = score_chunk(chunk, first_line, audited)
+                    chunk_errors = sum(1 for record in records if "error" in record)
+                    pending.append(((encode_records(records), len(records) - chunk_errors, chunk_errors, audited),
+                                    size, len(chunk)))
+                    write_oldest()
+                else:
+                    if self._pool is None:
+                        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                    pending.append((self._pool.submit(_score_chunk_in_worker, chunk, first_line, audit), size, len(chunk)))
+                    if len(pending) >= self.workers * 2:
+                        write_oldest()
+                if self._stopped.is_set():
+                    while pending:
+                        write_oldest()
+                    return False
+            while pending:
+                write_oldest()
+        return True
+
+def job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The public view of a job row
+    """
+    total = job["total_bytes"]
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "progress": 1.0 if job["status"] == SUCCEEDED else (job["input_offset"] / total if total else 0.0),
+        "lines": job["lines"],
+        "scored": job["scored"],
+        "errors": job["errors"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "status_url": f"/jobs/{job['id']}",
+        "result_url": f"/jobs/{job['id']}/result",
+    }
+
+def create_job_queue() -> JobQueue:
+    """
+    Build the job queue configured by CREDIT_JOBS_* settings
+    """
+    return JobQueue(
+        settings.jobs_dir,
+        workers=settings.jobs_workers,
+        chunk_size=settings.jobs_chunk_size,
+        stale_seconds=settings.jobs_stale_seconds,
+        input_dir=settings.jobs_input_dir,
+        audit_log=audit_log,
+    )
+
+job_queue = create_job_queue()
@@ -1,10 +1,65 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, Tuple, List, Dict, Any
 from datetime import datetime
 
+from app.models import (
+    DetectedAsset,
+    AuthenticityVerification,
+    Summary,
+    CreditFeatures,
+    AnalysisResult,
+    CreditAnalysisRequest,
+    LeanCreditAnalysisRequest,
+    ScoringRequest,
+    CreditResponse,
+    BatchCreditResult,
+    DetailedCreditResponse,
+    JobStatus,
+    LoanAssetsUpdate,
+    LoanScoreResponse,
+    MultiSourceRequest,
+    MultiSourceResponse,
+)
+from app.batch import score_requests
+from app.bulk import DEFAULT_CHUNK_SIZE, aiter_chunks, aiter_lines, encode_records, score_chunk
+from app.rules import CompiledRules, DEFAULT_RULES, INPUT_INDEX, ScoreExplanation, extract_row
+from app.fastpath import loads, parse_fast
+from app.cache import body_key, request_key, score_cache
+from app.metrics import InstrumentedRoute, MetricsMiddleware, metrics, observe_score, observe_scores, stage_timer
+from app.offload import Overloaded, evaluate_body, evaluate_payload, scoring_executor
+from app.settings import settings
+from app.store import feature_store
+from app.jobs import SUCCEEDED, job_queue, job_status
+from app.aggregator import LoanSnapshot, loan_aggregator
+from app.sources import source_engine
+from app.warmup import readiness
+from app.duplicates import detected_assets, duplicate_index
+from app.audit import audit_log
+from app.guard import BodyGuardMiddleware
+from app.shadow import shadow_scorer
+from app.binary import MSGPACK_MEDIA_TYPE, MsgPackResponse, StreamDecodeError, aiter_message_chunks, encode_messages, packb, schemas, unpackb
+
 app = FastAPI(title="Credit Scoring API", version="2.0.0")
+# Per-stage timing of scoring requests (see app.metrics)
+app.router.route_class = InstrumentedRoute
+
+# Oversized bodies are rejected with 413 before any endpoint parses them
+app.add_middleware(
+    BodyGuardMiddleware,
+    max_body_bytes=settings.max_body_bytes,
+    max_batch_body_bytes=settings.max_batch_body_bytes,
+    max_detected_assets=settings.max_detected_assets,
+    max_json_depth=settings.max_json_depth,
+    exempt_paths=[path.strip() for path in settings.body_guard_exempt_paths.split(",") if path.strip()],
+    # Bodies decoded as MessagePack, whatever their Content-Type
+    msgpack_paths=["/internal/score"],
+)
 
 # Add CORS middleware to allow requests from anywhere
 app.add_middleware(
@@ -15,85 +70,77 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-class DetectedAsset(BaseModel):
-    asset_type: str
-    asset_count: int
-    asset_category: str
-    condition_score: float
-    estimated_value: float
-    gps_coordinates: Optional[Any]
-    device_model: str
-    timestamp: str
-    camera_make: str
-    camera_model: str
-    image_source: str
-    detection_confidence: float
-    exif_verified: bool
-
-class AuthenticityVerification(BaseModel):
-    images_with_exif: int
-    images_without_exif: int
-    evaluation_policy: str
-    note: str
-
-class Summary(BaseModel):
-    unique_asset_types: int
-    asset_categories_found: List[str]
-    total_estimated_value: float
-    has_location_data: bool
-    devices_detected: List[str]
-    exif_verification_rate: str
-    authenticity_verification: AuthenticityVerification
-
-class CreditFeatures(BaseModel):
-    total_asset_value: float
-    asset_diversity_score: int
-    asset_categories: Dict[str, int]
-    has_transport_asset: bool
-    has_electronics_asset: bool
-    has_livestock_asset: bool
-    has_property_asset: bool
-    has_high_value_assets: bool
-    high_value_asset_count: int
-    average_asset_condition: float
-    location_stability_score: int
-    primary_device_model: str
-    primary_device_tier_score: int
-    unique_devices_count: int
-    asset_to_device_ratio: float
-    image_span_days: int
-    images_per_day: int
-    has_recent_images: bool
-    asset_concentration_score: int
-    average_detection_confidence: float
-
-class AnalysisResult(BaseModel):
-    batch_id: str
-    loan_id: str
-    analysis_timestamp: str
-    total_images_processed: int
-    total_assets_detected: int
-    credit_features: CreditFeatures
-    detected_assets: List[DetectedAsset]
-    summary: Summary
-
-class CreditAnalysisRequest(BaseModel):
-    message: str
-    batch_id: str
-    user_id: str
-    status: str
-    total_files: int
-    estimated_completion_time: str
-    status_check_url: str
-    loan_id: str
-    analysis_result: AnalysisResult
-
-class CreditResponse(BaseModel):
-    user_id: str
-    loan_id: str
-    credit_score: int
-
-def calculate_comprehensive_credit_score(analysis_data: CreditAnalysisRequest) -> int:
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
+@app.on_event("startup")
+def start_warmup():
+    readiness.start(settings.warmup)
+
+@app.on_event("shutdown")
+def stop_serving():
+    readiness.stop()
+
+@app.on_event("startup")
+def start_metrics():
+    metrics.start()
+
+@app.on_event("shutdown")
+def stop_metrics():
+    metrics.stop()
+
+@app.on_event("shutdown")
+def stop_scoring_executor():
+    scoring_executor.shutdown()
+
+@app.on_event("shutdown")
+def stop_source_engine():
+    source_engine.shutdown()
+
+@app.on_event("startup")
+def resume_jobs():
+    job_queue.start(resume=True)
+
+@app.on_event("shutdown")
+def stop_jobs():
+    job_queue.stop()
+
+@app.on_event("startup")
+def start_feature_store():
+    if feature_store is not None:
+        feature_store.start()
+
+@app.on_event("shutdown")
+def stop_feature_store():
+    if feature_store is not None:
+        feature_store.stop()
+
+@app.on_event("startup")
+def start_audit_log():
+    if audit_log is not None:
+        audit_log.start()
+
+@app.on_event("shutdown")
+def stop_audit_log():
+    if audit_log is not None:
+        audit_log.stop()
+
+@app.on_event("startup")
+def start_shadow_scoring():
+    if shadow_scorer is not None:
+        shadow_scorer.start()
+
+@app.on_event("shutdown")
+def stop_shadow_scoring():
+    if shadow_scorer is not None:
+        shadow_scorer.stop()
+
+@app.on_event("shutdown")
+def flush_duplicate_index():
+    if duplicate_index is not None:
+        duplicate_index.flush()
+
+def calculate_comprehensive_credit_score(analysis_data: CreditAnalysisRequest, rules: CompiledRules = DEFAULT_RULES) -> int:
     """
     Calculate comprehensive credit score using all available asset analysis data
     Score breakdown (out of 100):
@@ -103,144 +150,52 @@ def calculate_comprehensive_credit_score(analysis_data: CreditAnalysisRequest) -
     - Data Authenticity & Verification (15 points)
     - Technology & Device Quality (10 points)
     - Temporal & Behavioral Factors (10 points)
+    Thresholds and points come from the compiled rule tables (app/scoring_rules.json)
     """
-    score = 0
-    credit_features = analysis_data.analysis_result.credit_features
-    summary = analysis_data.analysis_result.summary
-    
-    # Fixed loan amount for comparison
-    LOAN_AMOUNT = 100000.0
-    
-    # 1. Asset Value & Coverage (30 points)
-    asset_value_score = 0
-    coverage_ratio = credit_features.total_asset_value / LOAN_AMOUNT if LOAN_AMOUNT > 0 else 0
-    
-    if coverage_ratio >= 1.0:
-        asset_value_score = 30  # Full coverage
-    elif coverage_ratio >= 0.8:
-        asset_value_score = 25  # 80%+ coverage
-    elif coverage_ratio >= 0.6:
-        asset_value_score = 20  # 60%+ coverage
-    elif coverage_ratio >= 0.4:
-        asset_value_score = 15  # 40%+ coverage
-    elif coverage_ratio >= 0.2:
-        asset_value_score = 10  # 20%+ coverage
-    else:
-        asset_value_score = 5   # Minimal coverage
-    
-    # Bonus for high-value assets
-    if credit_features.has_high_value_assets:
-        asset_value_score += min(5, credit_features.high_value_asset_count * 2)
-    
-    score += min(30, asset_value_score)
-    
-    # 2. Asset Quality & Condition (20 points)
-    condition_score = 0
-    avg_condition = credit_features.average_asset_condition
-    
-    if avg_condition >= 8.0:
-        condition_score = 20  # Excellent condition
-    elif avg_condition >= 7.0:
-        condition_score = 17  # Very good condition
-    elif avg_condition >= 6.0:
-        condition_score = 14  # Good condition
-    elif avg_condition >= 5.0:
-        condition_score = 11  # Fair condition
-    elif avg_condition >= 4.0:
-        condition_score = 8   # Poor condition
-    else:
-        condition_score = 4   # Very poor condition
-    
-    # Detection confidence bonus
-    confidence_bonus = min(3, int(credit_features.average_detection_confidence * 3))
-    condition_score += confidence_bonus
-    
-    score += min(20, condition_score)
-    
-    # 3. Asset Diversity & Portfolio (15 points)
-    diversity_score = 0
-    
-    # Base diversity score
-    diversity_score += min(8, credit_features.asset_diversity_score * 2)
-    
-    # Category bonuses
-    category_bonuses = 0
-    if credit_features.has_transport_asset:
-        category_bonuses += 2
-    if credit_features.has_electronics_asset:
-        category_bonuses += 2
-    if credit_features.has_livestock_asset:
-        category_bonuses += 2
-    if credit_features.has_property_asset:
-        category_bonuses += 3  # Property is most valuable
-    
-    diversity_score += min(7, category_bonuses)
-    score += min(15, diversity_score)
-    
-    # 4. Data Authenticity & Verification (15 points)
-    authenticity_score = 0
-    
-    # EXIF verification rate
-    exif_rate_str = summary.exif_verification_rate.replace('%', '')
-    exif_rate = float(exif_rate_str) if exif_rate_str else 0
-    authenticity_score += int(exif_rate / 100 * 10)  # Up to 10 points for 100% EXIF
-    
-    # Multiple images and processing
-    if analysis_data.analysis_result.total_images_processed > 1:
-        authenticity_score += 2
-    if analysis_data.analysis_result.total_assets_detected > 1:
-        authenticity_score += 2
-    
-    # Location stability
-    location_bonus = min(1, credit_features.location_stability_score / 10)
-    authenticity_score += location_bonus
-    
-    score += min(15, authenticity_score)
-    
-    # 5. Technology & Device Quality (10 points)
-    tech_score = 0
-    
-    # Device tier score
-    device_tier_bonus = min(6, credit_features.primary_device_tier_score * 1.5)
-    tech_score += device_tier_bonus
-    
-    # Asset to device ratio (indicates ownership patterns)
-    if credit_features.asset_to_device_ratio > 2.0:
-        tech_score += 2  # High asset-to-device ratio is positive
-    elif credit_features.asset_to_device_ratio > 1.0:
-        tech_score += 1
-    
-    # Multiple unique devices
-    if credit_features.unique_devices_count > 1:
-        tech_score += 2
-    
-    score += min(10, tech_score)
-    
-    # 6. Temporal & Behavioral Factors (10 points)
-    temporal_score = 0
-    
-    # Recent images indicate active engagement
-    if credit_features.has_recent_images:
-        temporal_score += 3
-    
-    # Asset concentration (focused vs scattered approach)
-    if credit_features.asset_concentration_score >= 80:
-        temporal_score += 2  # Focused asset strategy
-    
-    # Image frequency patterns
-    if credit_features.images_per_day >= 1:
-        temporal_score += 2
-    
-    # Image span indicates documentation consistency
-    if credit_features.image_span_days > 0:
-        temporal_score += min(3, credit_features.image_span_days / 10)
-    
-    score += min(10, temporal_score)
-    
-    # Final adjustments and caps
-    final_score = min(100, max(0, score))
-    
-    return int(final_score)
+    return rules.score(extract_row(analysis_data))
+
+def explain_credit_score(analysis_data: CreditAnalysisRequest, rules: CompiledRules = DEFAULT_RULES) -> ScoreExplanation:
+    """
+    Calculate the credit score together with its breakdown, in one evaluation
+    The result carries the capped points of every component and, through
+    `components()`, what each rule term awarded and the thresholds it reached
+    """
+    return rules.explain(extract_row(analysis_data))
+
+def score_breakdown(explanation: ScoreExplanation) -> Dict[str, float]:
+    """
+    Points per component (as `<component>_score`) and the headline inputs
+    """
+    row = explanation.row
+    breakdown = {f"{name}_score": points for name, points in explanation.points().items()}
+    breakdown["asset_coverage_ratio"] = explanation.rules.scalar_getter("coverage_ratio")(row)
+    breakdown["asset_condition"] = row[INPUT_INDEX["average_asset_condition"]]
+    breakdown["exif_verification_rate"] = row[INPUT_INDEX["exif_verification_rate"]]
+    return breakdown
+
+def score_row(row: List[Any]) -> int:
+    """
+    Score a feature row, recording the score distribution when metrics are on
+    """
+    if not settings.metrics_enabled:
+        return DEFAULT_RULES.score(row)
+    credit_score, points = DEFAULT_RULES.score_components(row)
+    observe_score(DEFAULT_RULES, credit_score, points)
+    return credit_score
+
+def score_row_cached(batch_id: str, loan_id: str, row: List[Any]) -> int:
+    """
+    Score a feature row through the result cache (when enabled)
+    Retried requests for the same batch/loan with the same inputs reuse the score
+    """
+    if score_cache is None:
+        return score_row(row)
+    key = request_key(DEFAULT_RULES.version, batch_id, loan_id, row)
+    credit_score = score_cache.get(key)
+    if credit_score is None:
+        credit_score = score_row(row)
+        score_cache.set(key, credit_score)
+    return credit_score
 
 @app.get("/")
 def read_root():
@@ -258,12 +213,14 @@ def read_root():
         ]
     }
 
-@app.post("/evaluate_credit", response_model=CreditResponse)
-def evaluate_credit(request: CreditAnalysisRequest):
+@app.post("/evaluate_credit", response_model=CreditResponse, response_model_exclude_none=True)
+def evaluate_credit(request: ScoringRequest):
     """
     Evaluate credit application using comprehensive asset analysis data
     Returns credit score out of 100 based on multiple factors
     """
+    timer = stage_timer()
+    timer.lap("validation")
     try:
         # Validate input
         if request.analysis_result.credit_features.total_asset_value < 0:
@@ -273,18 +230,552 @@ def evaluate_credit(request: CreditAnalysisRequest):
             raise HTTPException(status_code=400, detail="No assets detected in analysis")
         
         # Calculate comprehensive credit score
-        credit_score = calculate_comprehensive_credit_score(request)
+        row = extract_row(request)
+        credit_score = score_row_cached(request.batch_id, request.loan_id, row)
+        timer.lap("scoring")
+        if audit_log is not None:
+            audit_log.add(request.user_id, request.loan_id, row, credit_score)
+        if shadow_scorer is not None:
+            shadow_scorer.add(row, credit_score)
+        duplicate_flags = None
+        if duplicate_index is not None:
+            duplicate_flags = duplicate_index.check(request.user_id, detected_assets(request)) or None
+            timer.lap("duplicates")
+        if feature_store is not None:
+            feature_store.add_requests([request])
         
         # Return response with credit score
         return CreditResponse(
             user_id=request.user_id,
             loan_id=request.loan_id,
-            credit_score=credit_score
+            credit_score=credit_score,
+            duplicate_flags=duplicate_flags
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing credit evaluation: {str(e)}")
 
+# OpenAPI for endpoints that read the raw body but accept a ScoringRequest
+RAW_SCORING_REQUEST_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"$ref": f"#/components/schemas/{ScoringRequest.__name__}"}}
+        },
+    },
+    "responses": {
+        "422": {
+            "description": "Validation Error",
+            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/HTTPValidationError"}}},
+        }
+    },
+}
+
+@app.post("/evaluate_credit_detailed", response_model=DetailedCreditResponse)
+def evaluate_credit_detailed(request: ScoringRequest):
+    """
+    Evaluate credit application and explain the score
+    Returns the credit score with the points of each component and, per
+    rule term, the input value, the points awarded and the threshold reached
+    """
+    timer = stage_timer()
+    timer.lap("validation")
+    try:
+        # Validate input
+        if request.analysis_result.credit_features.total_asset_value < 0:
+            raise HTTPException(status_code=400, detail="Asset value cannot be negative")
+        
+        if not request.analysis_result.detected_assets:
+            raise HTTPException(status_code=400, detail="No assets detected in analysis")
+        
+        explanation = explain_credit_score(request)
+        if settings.metrics_enabled:
+            observe_score(DEFAULT_RULES, explanation.credit_score, explanation.component_points)
+        timer.lap("scoring")
+        if audit_log is not None:
+            audit_log.add(request.user_id, request.loan_id, explanation.row, explanation.credit_score, explanation.component_points)
+        if shadow_scorer is not None:
+            shadow_scorer.add(explanation.row, explanation.credit_score)
+        
+        return {
+            "user_id": request.user_id,
+            "loan_id": request.loan_id,
+            "credit_score": explanation.credit_score,
+            "score_breakdown": score_breakdown(explanation),
+            "components": explanation.components(),
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing credit evaluation: {str(e)}")
+
+@app.post(
+    "/evaluate_credit/fast",
+    response_model=CreditResponse,
+    response_class=ORJSONResponse,
+    openapi_extra=RAW_SCORING_REQUEST_OPENAPI,
+)
+async def evaluate_credit_fast(request: Request):
+    """
+    Same contract as /evaluate_credit, optimized for throughput
+    The raw body is decoded with orjson and, when every field already has the
+    declared JSON type, scored without building the pydantic models; other
+    payloads go through full validation and get the usual 422 errors
+    """
+    timer = stage_timer()
+    body = await request.body()
+    cache_key = None
+    if score_cache is not None:
+        # A byte-identical retry of a scored request skips decoding entirely
+        cache_key = body_key(DEFAULT_RULES.version, "/evaluate_credit/fast", body)
+        cached = score_cache.get(cache_key)
+        if cached is not None:
+            user_id, loan_id, credit_score = cached
+            if audit_log is not None:
+                audit_log.add_body(user_id, loan_id, body, credit_score)
+            if shadow_scorer is not None:
+                shadow_scorer.add_body(body, credit_score)
+            return ORJSONResponse({"user_id": user_id, "loan_id": loan_id, "credit_score": credit_score})
+
+    try:
+        payload = loads(body)
+    except ValueError as e:
+        raise RequestValidationError([ErrorWrapper(e, ("body", getattr(e, "pos", 0)))])
+    timer.lap("parse")
+
+    try:
+        parsed = parse_fast(payload)
+        if parsed is None:
+            try:
+                analysis = ScoringRequest.parse_obj(payload)
+            except ValidationError as e:
+                raise RequestValidationError([ErrorWrapper(e, ("body",))])
+            user_id, loan_id, batch_id = analysis.user_id, analysis.loan_id, analysis.batch_id
+            row = extract_row(analysis)
+            has_assets = bool(analysis.analysis_result.detected_assets)
+        else:
+            user_id, loan_id, batch_id = parsed.user_id, parsed.loan_id, parsed.batch_id
+            row, has_assets = parsed.row, parsed.has_assets
+        timer.lap("validation")
+
+        # Validate input
+        if row[INPUT_INDEX["total_asset_value"]] < 0:
+            raise HTTPException(status_code=400, detail="Asset value cannot be negative")
+
+        if not has_assets:
+            raise HTTPException(status_code=400, detail="No assets detected in analysis")
+
+        credit_score = score_row_cached(batch_id, loan_id, row)
+        timer.lap("scoring")
+        if audit_log is not None:
+            audit_log.add(user_id, loan_id, row, credit_score)
+        if shadow_scorer is not None:
+            shadow_scorer.add(row, credit_score)
+    
+    except (HTTPException, RequestValidationError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing credit evaluation: {str(e)}")
+
+    if cache_key is not None:
+        score_cache.set(cache_key, [user_id, loan_id, credit_score])
+    return ORJSONResponse({"user_id": user_id, "loan_id": loan_id, "credit_score": credit_score})
+
+@app.post(
+    "/evaluate_credit/async",
+    response_model=CreditResponse,
+    response_class=ORJSONResponse,
+    openapi_extra=RAW_SCORING_REQUEST_OPENAPI,
+)
+async def evaluate_credit_async(request: Request):
+    """
+    Same contract as /evaluate_credit, with backpressure
+    Decoding, validation and scoring run on a bounded thread or process pool
+    (CREDIT_ASYNC_*); when the pool and its queue are full the request is
+    rejected at once with 503 (or 429) and a Retry-After header
+    """
+    timer = stage_timer()
+    body = await request.body()
+    timer.lap("parse")
+    cache_key = None
+    if score_cache is not None:
+        cache_key = body_key(DEFAULT_RULES.version, "/evaluate_credit/async", body)
+        cached = score_cache.get(cache_key)
+        if cached is not None:
+            user_id, loan_id, credit_score = cached
+            if audit_log is not None:
+                audit_log.add_body(user_id, loan_id, body, credit_score)
+            if shadow_scorer is not None:
+                shadow_scorer.add_body(body, credit_score)
+            return ORJSONResponse({"user_id": user_id, "loan_id": loan_id, "credit_score": credit_score})
+
+    try:
+        status_code, content, points = await scoring_executor.run(evaluate_body, body)
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=settings.async_overload_status,
+            detail="Scoring capacity exhausted, retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    timer.lap("scoring")
+
+    if status_code != 200:
+        return ORJSONResponse(content, status_code=status_code)
+    if settings.metrics_enabled:
+        observe_score(DEFAULT_RULES, content["credit_score"], points)
+    if audit_log is not None:
+        audit_log.add_body(content["user_id"], content["loan_id"], body, content["credit_score"], points)
+    if shadow_scorer is not None:
+        shadow_scorer.add_body(body, content["credit_score"])
+    if cache_key is not None:
+        score_cache.set(cache_key, [content["user_id"], content["loan_id"], content["credit_score"]])
+    return ORJSONResponse(content)
+
+@app.post("/evaluate_credit/batch", response_model=List[BatchCreditResult])
+def evaluate_credit_batch(batch: List[ScoringRequest]):
+    """
+    Evaluate many credit applications in a single call
+    All requests are scored together by the vectorized engine; each result
+    carries either the credit score or the reason the request was rejected
+    """
+    timer = stage_timer()
+    timer.lap("validation")
+    try:
+        results = score_requests(batch)
+        timer.lap("scoring")
+        if audit_log is not None:
+            for request, result in zip(batch, results):
+                if result.credit_score is not None:
+                    audit_log.add_request(request, result.credit_score)
+        if settings.metrics_enabled:
+            observe_scores(result.credit_score for result in results if result.credit_score is not None)
+        return results
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing batch credit evaluation: {str(e)}")
+
+@app.post("/evaluate_credit/multi", response_model=MultiSourceResponse)
+def evaluate_credit_multi(request: MultiSourceRequest):
+    """
+    Evaluate a credit application from every available data source
+    Asset analysis, bank, M-Pesa and call-log data are scored independently
+    and combined with the configured weights; missing sources are skipped
+    """
+    timer = stage_timer()
+    timer.lap("validation")
+    result = source_engine.evaluate(request)
+    timer.lap("scoring")
+    if result.error is not None:
+        raise HTTPException(status_code=400, detail=result.error)
+    if audit_log is not None:
+        audit_log.add_source_request(request, result.credit_score, f"multi:{source_engine.version}")
+    return result
+
+@app.post("/evaluate_credit/multi/batch", response_model=List[MultiSourceResponse])
+def evaluate_credit_multi_batch(batch: List[MultiSourceRequest]):
+    """
+    Evaluate many multi-source applications in a single call
+    Each source is scored for the whole batch by the vectorized engine; each
+    result carries either the credit score or the reason it was rejected
+    """
+    timer = stage_timer()
+    timer.lap("validation")
+    results = source_engine.evaluate_batch(batch)
+    timer.lap("scoring")
+    if audit_log is not None:
+        for request, result in zip(batch, results):
+            if result.credit_score is not None:
+                audit_log.add_source_request(request, result.credit_score, f"multi:{source_engine.version}")
+    return results
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming response that can be produced while the request body is still
+    being read. StreamingResponse normally also listens for the client
+    disconnecting, which would consume request body messages meant for the
+    body reader.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def _stream_scores(request: Request, chunk_size: int):
+    async for chunk, first_line in aiter_chunks(aiter_lines(request.stream()), chunk_size):
+        audited = [] if audit_log is not None else None
+        records = await run_in_threadpool(score_chunk, chunk, first_line, audited)
+        if audited:
+            audit_log.add_rows(audited)
+        if settings.metrics_enabled:
+            observe_scores(record["credit_score"] for record in records if "credit_score" in record)
+        yield encode_records(records)
+
+@app.post("/evaluate_credit/stream")
+async def evaluate_credit_stream(request: Request, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Evaluate an NDJSON body of credit applications (one request per line)
+    Lines are scored as they arrive and streamed back as NDJSON: a
+    CreditResponse per scored line, or {"line", "error"} for lines that
+    could not be scored
+    """
+    if chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive")
+    return NDJSONStreamingResponse(_stream_scores(request, chunk_size))
+
+@app.post("/internal/score", response_class=MsgPackResponse)
+async def internal_score(request: Request):
+    """
+    MessagePack variant of /evaluate_credit/fast for internal callers
+    The body is a request map and the response a CreditResponse map (or
+    {"detail"} with a 4xx/5xx status), with the same checks and status codes
+    as the JSON endpoint; see /internal/schema
+    """
+    timer = stage_timer()
+    body = await request.body()
+    try:
+        payload = unpackb(body)
+    except ValueError as e:
+        return MsgPackResponse(
+            {"detail": [{"loc": ["body"], "msg": f"Invalid MessagePack: {e}", "type": "value_error.msgpack"}]},
+            status_code=422,
+        )
+    timer.lap("parse")
+    status_code, content, points = evaluate_payload(payload)
+    timer.lap("scoring")
+    if status_code == 200:
+        if settings.metrics_enabled:
+            observe_score(DEFAULT_RULES, content["credit_score"], points)
+        if audit_log is not None:
+            audit_log.add_body(content["user_id"], content["loan_id"], body, content["credit_score"], points)
+        if shadow_scorer is not None:
+            shadow_scorer.add_body(body, content["credit_score"], decode=unpackb)
+    return MsgPackResponse(content, status_code=status_code)
+
+class MsgPackStreamingResponse(NDJSONStreamingResponse):
+    media_type = MSGPACK_MEDIA_TYPE
+
+async def _stream_binary_scores(request: Request, chunk_size: int):
+    try:
+        async for chunk, first in aiter_message_chunks(request.stream(), chunk_size):
+            audited = [] if audit_log is not None else None
+            records = await run_in_threadpool(score_chunk, chunk, first, audited)
+            if audited:
+                audit_log.add_rows(audited)
+            if settings.metrics_enabled:
+                observe_scores(record["credit_score"] for record in records if "credit_score" in record)
+            yield encode_messages(records)
+    except StreamDecodeError as e:
+        # The rest of the stream cannot be framed: report it and stop
+        yield packb({"line": e.message_number, "error": f"Invalid MessagePack: {e}"})
+
+@app.post("/internal/score/stream")
+async def internal_score_stream(request: Request, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Evaluate a MessagePack stream of credit applications (concatenated maps)
+    Messages are scored as they arrive and answered with one map each, in
+    order: a CreditResponse, or {"line", "error"} for messages that could
+    not be scored (line is the 1-based message number)
+    """
+    if chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive")
+    return MsgPackStreamingResponse(_stream_binary_scores(request, chunk_size))
+
+@app.get("/internal/schema")
+def internal_schema():
+    """
+    JSON Schemas of the MessagePack request, response and stream error messages
+    """
+    return schemas()
+
+def score_loan(loan: LoanSnapshot, added: int = 0, skipped: int = 0) -> LoanScoreResponse:
+    # Same checks as /evaluate_credit, on the aggregated assets
+    if loan.credit_features.total_asset_value < 0:
+        raise HTTPException(status_code=400, detail="Asset value cannot be negative")
+    if not loan.images:
+        raise HTTPException(status_code=400, detail="No assets detected in analysis")
+    credit_score = score_row(loan.row)
+    if audit_log is not None:
+        audit_log.add(loan.user_id, loan.loan_id, loan.row, credit_score)
+    if shadow_scorer is not None:
+        shadow_scorer.add(loan.row, credit_score)
+    return LoanScoreResponse(
+        user_id=loan.user_id,
+        loan_id=loan.loan_id,
+        credit_score=credit_score,
+        new_assets=added,
+        duplicate_assets=skipped,
+        total_images=loan.images,
+        credit_features=loan.credit_features,
+    )
+
+@app.post("/loans/{loan_id}/assets", response_model=LoanScoreResponse)
+def update_loan_assets(loan_id: str, update: LoanAssetsUpdate):
+    """
+    Add newly detected assets to a loan and score it on the aggregated assets
+    Only the new assets are processed; credit_features are computed from the
+    running aggregate instead of being taken from upstream
+    """
+    timer = stage_timer()
+    timer.lap("validation")
+    signals = update.dict(include={"location_stability_score", "primary_device_tier_score", "loan_amount", "product_code"})
+    loan, added, skipped = loan_aggregator.update(loan_id, update.user_id, update.detected_assets, signals)
+    response = score_loan(loan, added, skipped)
+    timer.lap("scoring")
+    return response
+
+@app.get("/loans/{loan_id}/features", response_model=LoanScoreResponse)
+def get_loan_features(loan_id: str):
+    """
+    Current aggregated features and score of a loan
+    """
+    loan = loan_aggregator.get(loan_id)
+    if loan is None:
+        raise HTTPException(status_code=404, detail="Loan not found (never updated, or evicted)")
+    return score_loan(loan)
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(request: Request, path: Optional[str] = None):
+    """
+    Submit a scoring job: an NDJSON body (one request per line), or `path`,
+    a local NDJSON file under CREDIT_JOBS_INPUT_DIR
+    Returns the job right away; poll its status_url and download result_url
+    once it has succeeded
+    """
+    if path is not None:
+        try:
+            job = job_queue.submit_path(path)
+        except PermissionError as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    else:
+        # File and database work stays off the event loop; an upload that is
+        # not fully received (client disconnect) leaves no file behind
+        job_id, upload = await run_in_threadpool(job_queue.new_upload)
+        try:
+            f = await run_in_threadpool(open, upload, "wb")
+            try:
+                async for chunk in request.stream():
+                    await run_in_threadpool(f.write, chunk)
+            finally:
+                await run_in_threadpool(f.close)
+            job = await run_in_threadpool(job_queue.submit_upload, job_id, upload)
+        except BaseException:
+            upload.unlink(missing_ok=True)
+            raise
+    status = job_status(job)
+    return ORJSONResponse(status, status_code=202, headers={"Location": status["status_url"]})
+
+@app.get("/jobs", response_model=List[JobStatus])
+def list_jobs(limit: int = 100):
+    """
+    The most recent jobs, newest first
+    """
+    return [job_status(job) for job in job_queue.list(limit)]
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    """
+    Status and progress of a job
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    """
+    The NDJSON result of a succeeded job: one record per non-blank input
+    line, as from /evaluate_credit/stream
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return FileResponse(job_queue.result_path(job_id), media_type="application/x-ndjson")
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Score cache counters (hits, misses, evictions) for this worker
+    """
+    if score_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **score_cache.stats()}
+
+@app.get("/executor/stats")
+def executor_stats():
+    """
+    Admission counters of the /evaluate_credit/async pool for this worker
+    """
+    return scoring_executor.stats()
+
+@app.get("/audit/stats")
+def audit_stats():
+    """
+    Records queued, written and dropped by this worker's audit log
+    """
+    if audit_log is None:
+        return {"enabled": False}
+    return {"enabled": True, **audit_log.stats()}
+
+@app.get("/shadow/report")
+def shadow_report():
+    """
+    Candidate rule versions compared with production on this worker's
+    traffic: agreement, score deltas, and shadow work dropped under load
+    """
+    if shadow_scorer is None:
+        return {"enabled": False}
+    return {"enabled": True, **shadow_scorer.report()}
+
+@app.get("/duplicates/stats")
+def duplicates_stats():
+    """
+    Size and flag counters of the duplicate index (this worker's counters)
+    """
+    if duplicate_index is None:
+        return {"enabled": False}
+    return {"enabled": True, **duplicate_index.stats()}
+
+@app.get("/aggregator/stats")
+def aggregator_stats():
+    """
+    Loans and images held by the incremental aggregator of this worker
+    """
+    return loan_aggregator.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """
+    Prometheus text exposition of the request, stage and score metrics,
+    summed over all workers when CREDIT_METRICS_DIR is set
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "service": "credit-scoring-api"}
\ No newline at end of file
+    return {"status": "healthy", "service": "credit-scoring-api"}
+
+@app.get("/health/live")
+def liveness_check():
+    """
+    Liveness: the worker is up and answering (restart it if this fails)
+    """
+    return {"status": "alive", "service": "credit-scoring-api"}
+
+@app.get("/health/ready")
+def readiness_check():
+    """
+    Readiness: the worker has warmed up and is not shutting down
+    Answers 503 while starting, stopping, or when the warmup failed
+    """
+    status = readiness.status()
+    return ORJSONResponse(status, status_code=200 if readiness.serving else 503)
\ No newline at end of file
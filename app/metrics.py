@@ -0,0 +1,405 @@
+"""
+Prometheus-style metrics for the scoring API
+
+Recorded per request:
+
+- credit_requests_total{path,method,status} and
+  credit_request_duration_seconds{path}: by MetricsMiddleware
+- credit_request_size_bytes{path}: request body bytes (its _sum is the
+  total payload volume)
+- credit_stage_duration_seconds{path,stage}: time spent in each stage of a
+  scoring request: parse (body read + JSON decode), validation, scoring and
+  serialization. Scoring endpoints mark the stage boundaries with
+  `stage_timer().lap(stage)`; InstrumentedRoute opens the timer and times
+  the parse stage of FastAPI-parsed bodies.
+- credit_score and credit_component_points{component}: distribution of
+  computed scores and of each component's capped points (cache hits are not
+  observed again)
+
+Metrics are plain counters and fixed-bucket histograms updated under one lock,
+cheap enough to leave on under full load. GET /metrics renders them in the
+Prometheus text format. With several uvicorn workers, set CREDIT_METRICS_DIR:
+every worker then writes a snapshot of its metrics to that directory (once per
+CREDIT_METRICS_FLUSH_SECONDS) and /metrics, whichever worker serves it, sums
+the snapshots of all workers. Snapshots of stopped workers are kept so that
+counters never go backwards; clear the directory when redeploying.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.routing import Match
+
+from app.settings import settings
+
+Labels = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+SCORE_BUCKETS = (10, 20, 30, 40, 50, 60, 70, 80, 90, 100)
+POINTS_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 25, 30)
+
+class Histogram:
+    """
+    Fixed-bucket histogram; counts are per bucket (cumulated when rendered)
+    """
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+class MetricFamily:
+    def __init__(self, name: str, kind: str, help: str, labelnames: Sequence[str], buckets: Sequence[float] = ()):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+class MetricsRegistry:
+    """
+    Counters and histograms of one process, plus snapshot files for
+    aggregating several worker processes
+    """
+
+    def __init__(self, directory: Optional[str] = None, flush_seconds: float = 1.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_seconds = flush_seconds
+        self.families: Dict[str, MetricFamily] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.families[name] = MetricFamily(name, "counter", help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.families[name] = MetricFamily(name, "histogram", help, labelnames, buckets)
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1) -> None:
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        buckets = self.families[name].buckets
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(len(buckets) + 1)
+            histogram.counts[bisect_left(buckets, value)] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def observe_many(self, name: str, observations: Iterable[Tuple[Labels, float]]) -> None:
+        """
+        Several observations of one family under a single lock acquisition
+        """
+        buckets = self.families[name].buckets
+        with self._lock:
+            for labels, value in observations:
+                key = (name, labels)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(len(buckets) + 1)
+                histogram.counts[bisect_left(buckets, value)] += 1
+                histogram.sum += value
+                histogram.count += 1
+
+    def snapshot(self) -> Dict[str, List[Any]]:
+        """
+        The current values as JSON-serializable lists
+        """
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [
+                    [name, list(labels), list(h.counts), h.sum, h.count]
+                    for (name, labels), h in self._histograms.items()
+                ],
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # Multi-worker aggregation
+
+    def _snapshot_path(self) -> Path:
+        return self.directory / f"metrics-{os.getpid()}.json"
+
+    def flush(self) -> None:
+        """
+        Write this process's snapshot to the metrics directory (atomically)
+        """
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._snapshot_path()
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, path)
+
+    def start(self) -> None:
+        """
+        Start flushing snapshots in the background (no-op without a directory)
+        """
+        if self.directory is None or self._flusher is not None:
+            return
+        self._stopped.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def stop(self) -> None:
+        if self._flusher is not None:
+            self._stopped.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.wait(self.flush_seconds):
+            self.flush()
+
+    def collect(self) -> List[Dict[str, List[Any]]]:
+        """
+        Snapshots to report: this process's live values plus, with a metrics
+        directory, the latest snapshot of every other worker
+        """
+        snapshots = [self.snapshot()]
+        if self.directory is None or not self.directory.is_dir():
+            return snapshots
+        own = self._snapshot_path().name
+        for path in sorted(self.directory.glob("metrics-*.json")):
+            if path.name == own:
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # removed or being replaced while we read it
+        return snapshots
+
+    def render(self) -> str:
+        """
+        All metrics, summed over the collected snapshots, in the Prometheus
+        text exposition format
+        """
+        counters: Dict[Tuple[str, Labels], float] = {}
+        histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        for snapshot in self.collect():
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts, total, count in snapshot["histograms"]:
+                family = self.families.get(name)
+                if family is None or len(counts) != len(family.buckets) + 1:
+                    continue
+                key = (name, tuple(labels))
+                histogram = histograms.get(key)
+                if histogram is None:
+                    histogram = histograms[key] = Histogram(len(counts))
+                for i, n in enumerate(counts):
+                    histogram.counts[i] += n
+                histogram.sum += total
+                histogram.count += count
+
+        lines: List[str] = []
+        for family in self.families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            if family.kind == "counter":
+                for (name, labels), value in sorted(counters.items()):
+                    if name == family.name:
+                        lines.append(f"{name}{_format_labels(family.labelnames, labels)} {_format_value(value)}")
+                continue
+            for (name, labels), histogram in sorted(histograms.items()):
+                if name != family.name:
+                    continue
+                cumulative = 0
+                for bound, n in zip(family.buckets + (float("inf"),), histogram.counts):
+                    cumulative += n
+                    le = _format_labels(family.labelnames + ("le",), labels + (_format_value(bound),))
+                    lines.append(f"{name}_bucket{le} {cumulative}")
+                plain = _format_labels(family.labelnames, labels)
+                lines.append(f"{name}_sum{plain} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{plain} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+metrics = MetricsRegistry(settings.metrics_dir, settings.metrics_flush_seconds)
+metrics.counter("credit_requests_total", "HTTP requests by path, method and status code", ("path", "method", "status"))
+metrics.histogram("credit_request_duration_seconds", "Time from request start to the end of the response", ("path",))
+metrics.histogram("credit_request_size_bytes", "Request body size", ("path",), SIZE_BUCKETS)
+metrics.histogram("credit_stage_duration_seconds", "Time spent per stage of a scoring request", ("path", "stage"))
+metrics.histogram("credit_score", "Computed credit scores", (), SCORE_BUCKETS)
+metrics.histogram("credit_component_points", "Capped points awarded per score component", ("component",), POINTS_BUCKETS)
+
+def observe_score(rules, credit_score: int, points: Sequence[float]) -> None:
+    """
+    Record a computed score and its per-component points
+    """
+    metrics.observe("credit_score", (), credit_score)
+    metrics.observe_many(
+        "credit_component_points",
+        [((component.name,), value) for component, value in zip(rules.components, points)],
+    )
+
+def observe_scores(scores: Iterable[int]) -> None:
+    """
+    Record computed scores (batch and streaming paths)
+    """
+    metrics.observe_many("credit_score", [((), score) for score in scores])
+
+# Per-request stage timing
+
+class StageTimer:
+    """
+    Records the time since the previous lap as the duration of `stage`
+    """
+    __slots__ = ("path", "last", "stage")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.last = time.perf_counter()
+        self.stage: Optional[str] = None
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        metrics.observe("credit_stage_duration_seconds", (self.path, stage), now - self.last)
+        self.last = now
+        self.stage = stage
+
+class _NullTimer:
+    __slots__ = ()
+    stage = None
+
+    def lap(self, stage: str) -> None:
+        pass
+
+_NULL_TIMER = _NullTimer()
+_current_timer: ContextVar = ContextVar("credit_stage_timer", default=_NULL_TIMER)
+
+def stage_timer():
+    """
+    The stage timer of the request being handled (a no-op timer outside
+    instrumented routes or with metrics disabled)
+    """
+    return _current_timer.get()
+
+class _TimedRequest(Request):
+    """
+    Request whose JSON decoding (including reading the body) is timed as
+    the parse stage
+    """
+
+    async def json(self) -> Any:
+        value = await super().json()
+        _current_timer.get().lap("parse")
+        return value
+
+class InstrumentedRoute(APIRoute):
+    """
+    Route that opens a StageTimer for each request and, once the endpoint has
+    finished scoring, times the rest of the handler as serialization
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if not settings.metrics_enabled:
+            return handler
+        path = self.path
+
+        async def instrumented_handler(request: Request):
+            timer = StageTimer(path)
+            token = _current_timer.set(timer)
+            try:
+                response = await handler(_TimedRequest(request.scope, request.receive))
+                if timer.stage == "scoring":
+                    timer.lap("serialization")
+                return response
+            finally:
+                _current_timer.reset(token)
+
+        return instrumented_handler
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests, request bytes and overall latency
+
+    `routes` is the application's route list. Requests are labelled with
+    the path template of the route they match (e.g. /jobs/{job_id}); paths
+    that match no route are reported as "unmatched" to keep the label set
+    bounded.
+    """
+
+    def __init__(self, app, routes: Sequence[Any]):
+        self.app = app
+        self.routes = routes
+
+    def _path_label(self, scope) -> str:
+        label = "unmatched"
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match is Match.FULL:
+                return route.path
+            if match is Match.PARTIAL and label == "unmatched":
+                # Path matched, method did not (405)
+                label = route.path
+        return label
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        received = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def status_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, status_send)
+        finally:
+            path = self._path_label(scope)
+            metrics.inc("credit_requests_total", (path, scope["method"], str(status)))
+            metrics.observe("credit_request_duration_seconds", (path,), time.perf_counter() - start)
+            metrics.observe("credit_request_size_bytes", (path,), received)
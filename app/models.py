@@ -0,0 +1,319 @@
+from pydantic import BaseModel, parse_obj_as, validator
+from typing import Optional, List, Dict, Any
+
+from app.rules import LOAN_PRODUCTS, valid_loan_amount
+from app.settings import settings
+
+class DetectedAsset(BaseModel):
+    asset_type: str
+    asset_count: int
+    asset_category: str
+    condition_score: float
+    estimated_value: float
+    gps_coordinates: Optional[Any]
+    device_model: str
+    timestamp: str
+    camera_make: str
+    camera_model: str
+    image_source: str
+    detection_confidence: float
+    exif_verified: bool
+
+class AuthenticityVerification(BaseModel):
+    images_with_exif: int
+    images_without_exif: int
+    evaluation_policy: str
+    note: str
+
+class Summary(BaseModel):
+    unique_asset_types: int
+    asset_categories_found: List[str]
+    total_estimated_value: float
+    has_location_data: bool
+    devices_detected: List[str]
+    exif_verification_rate: str
+    authenticity_verification: AuthenticityVerification
+
+class CreditFeatures(BaseModel):
+    total_asset_value: float
+    asset_diversity_score: int
+    asset_categories: Dict[str, int]
+    has_transport_asset: bool
+    has_electronics_asset: bool
+    has_livestock_asset: bool
+    has_property_asset: bool
+    has_high_value_assets: bool
+    high_value_asset_count: int
+    average_asset_condition: float
+    location_stability_score: int
+    primary_device_model: str
+    primary_device_tier_score: int
+    unique_devices_count: int
+    asset_to_device_ratio: float
+    image_span_days: int
+    images_per_day: int
+    has_recent_images: bool
+    asset_concentration_score: int
+    average_detection_confidence: float
+
+class AnalysisResult(BaseModel):
+    batch_id: str
+    loan_id: str
+    analysis_timestamp: str
+    total_images_processed: int
+    total_assets_detected: int
+    credit_features: CreditFeatures
+    detected_assets: List[DetectedAsset]
+    summary: Summary
+
+def _check_loan_amount(cls, value):
+    if value is not None and not valid_loan_amount(value):
+        raise ValueError("loan_amount must be a positive number")
+    return value
+
+def _check_product_code(cls, value):
+    if value is not None and value not in LOAN_PRODUCTS:
+        raise ValueError(f"unknown product code {value!r}")
+    return value
+
+class CreditAnalysisRequest(BaseModel):
+    message: str
+    batch_id: str
+    user_id: str
+    status: str
+    total_files: int
+    estimated_completion_time: str
+    status_check_url: str
+    loan_id: str
+    analysis_result: AnalysisResult
+    # Scored against loan_amount, else the product's amount, else the rules' default
+    loan_amount: Optional[float] = None
+    product_code: Optional[str] = None
+
+    _loan_amount = validator("loan_amount", allow_reuse=True)(_check_loan_amount)
+    _product_code = validator("product_code", allow_reuse=True)(_check_product_code)
+
+class LazyAssetList(list):
+    """
+    detected_assets kept as the raw decoded items
+
+    Scoring only needs to know whether any assets were detected, so the items
+    are not validated on the hot path; validated() builds the DetectedAsset
+    models on demand (e.g. for audit) and raises ValidationError like the full
+    model would.
+    """
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value):
+        if not isinstance(value, list):
+            raise TypeError("value is not a valid list")
+        return cls(value)
+
+    @classmethod
+    def __modify_schema__(cls, field_schema):
+        # Document the same item schema as the fully validated model
+        field_schema.update(type="array", items=DetectedAsset.schema())
+
+    def validated(self) -> List[DetectedAsset]:
+        return parse_obj_as(List[DetectedAsset], list(self))
+
+class LeanAnalysisResult(BaseModel):
+    batch_id: str
+    loan_id: str
+    analysis_timestamp: str
+    total_images_processed: int
+    total_assets_detected: int
+    credit_features: CreditFeatures
+    detected_assets: LazyAssetList
+    summary: Summary
+
+class LeanCreditAnalysisRequest(BaseModel):
+    """
+    CreditAnalysisRequest without per-item validation of detected_assets
+    """
+    message: str
+    batch_id: str
+    user_id: str
+    status: str
+    total_files: int
+    estimated_completion_time: str
+    status_check_url: str
+    loan_id: str
+    analysis_result: LeanAnalysisResult
+    # Scored against loan_amount, else the product's amount, else the rules' default
+    loan_amount: Optional[float] = None
+    product_code: Optional[str] = None
+
+    _loan_amount = validator("loan_amount", allow_reuse=True)(_check_loan_amount)
+    _product_code = validator("product_code", allow_reuse=True)(_check_product_code)
+
+    def to_full(self) -> CreditAnalysisRequest:
+        """
+        Validate the complete request, including every detected asset
+        """
+        return CreditAnalysisRequest.parse_obj(self.dict())
+
+# Model the scoring endpoints parse requests into
+ScoringRequest = LeanCreditAnalysisRequest if settings.lazy_asset_validation else CreditAnalysisRequest
+
+class BankData(BaseModel):
+    """
+    Bank statement metrics for the statement period
+    """
+    opening_balance: float
+    closing_balance: float
+    average_balance: float
+    net_cash_flow: float
+    turnover: float
+    deposit_count: int
+    total_deposits: float
+    average_deposit: float
+    deposit_std: float
+    withdrawal_count: int
+    total_withdrawals: float
+    average_withdrawal: float
+    withdrawal_std: float
+    main_withdrawals: float
+    bank_charges: float
+    active_days: int
+    percentage_active_days: float
+    days_since_last_transaction: int
+    has_bounced_cheques: bool
+    has_betting_transactions: bool
+    has_salary_inflow: bool
+    has_loan_repayment: bool
+
+class MpesaFeatures(BaseModel):
+    """
+    M-Pesa mobile money transaction metrics for the statement period
+    """
+    total_inflow: float
+    total_outflow: float
+    average_balance: float
+    balance_volatility: float
+    transaction_count: int
+    active_days: int
+    paybill_count: int
+    paybill_amount: float
+    merchant_payment_count: int
+    merchant_spend: float
+    customer_transfer_count: int
+    customer_transfer_amount: float
+    airtime_purchase_count: int
+    airtime_amount: float
+    recurring_payment_count: int
+    unique_recipients: int
+
+class CallLogAnalysis(BaseModel):
+    """
+    Call log behaviour metrics
+    """
+    total_calls: int
+    call_frequency: float
+    unique_contacts: int
+    stable_contacts_ratio: float
+    night_vs_day: float
+    missed_only: float
+    average_call_duration: float
+    geographic_pattern: float
+
+class MultiSourceRequest(BaseModel):
+    """
+    One applicant's data from every available source; any source may be missing
+    """
+    user_id: str
+    loan_id: str
+    assets: Optional[CreditAnalysisRequest] = None
+    bank: Optional[BankData] = None
+    mpesa: Optional[MpesaFeatures] = None
+    call_logs: Optional[CallLogAnalysis] = None
+
+class DuplicateFlag(BaseModel):
+    image_source: str
+    # duplicate_photo: the same photo (asset, device, timestamp) was submitted
+    # by another applicant; nearby_asset: another applicant submitted an asset
+    # of the same type within about one GPS grid cell
+    flag: str
+    previous_submissions: int
+
+class CreditResponse(BaseModel):
+    user_id: str
+    loan_id: str
+    credit_score: int
+    # Only reported when the duplicate index is enabled and flagged an asset
+    duplicate_flags: Optional[List[DuplicateFlag]] = None
+
+class BatchCreditResult(BaseModel):
+    user_id: str
+    loan_id: str
+    credit_score: Optional[int] = None
+    error: Optional[str] = None
+
+class MultiSourceResponse(BaseModel):
+    user_id: str
+    loan_id: str
+    credit_score: Optional[int] = None
+    # Score (0-100) of every source present in the request
+    source_scores: Dict[str, int] = {}
+    missing_sources: List[str] = []
+    error: Optional[str] = None
+
+class ComponentBreakdown(BaseModel):
+    name: str
+    description: str
+    points: float
+    max_points: float
+    capped: bool
+    # One entry per rule term: its input(s), value, points awarded and the
+    # threshold reached (ladders) or whether it applied / hit its cap
+    terms: List[Dict[str, Any]]
+
+class DetailedCreditResponse(BaseModel):
+    user_id: str
+    loan_id: str
+    credit_score: int
+    # <component>_score points plus the headline inputs behind them
+    score_breakdown: Dict[str, float]
+    components: List[ComponentBreakdown]
+
+class LoanAssetsUpdate(BaseModel):
+    """
+    New detected assets for a loan, plus the latest upstream signals the
+    assets do not carry (omitted values keep their previous value)
+    """
+    user_id: str
+    detected_assets: List[DetectedAsset]
+    location_stability_score: Optional[int] = None
+    primary_device_tier_score: Optional[int] = None
+    loan_amount: Optional[float] = None
+    product_code: Optional[str] = None
+
+    _loan_amount = validator("loan_amount", allow_reuse=True)(_check_loan_amount)
+    _product_code = validator("product_code", allow_reuse=True)(_check_product_code)
+
+class LoanScoreResponse(BaseModel):
+    user_id: str
+    loan_id: str
+    credit_score: int
+    new_assets: int
+    duplicate_assets: int
+    total_images: int
+    credit_features: CreditFeatures
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    progress: float
+    lines: int
+    scored: int
+    errors: int
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    status_url: str
+    result_url: str
@@ -0,0 +1,178 @@
+"""
+Bounded executor with admission control for async request handling
+
+Plain `def` endpoints run on AnyIO's shared threadpool: under a burst every
+request is accepted, queues for one of its 40 threads and waits as long as it
+takes. The async endpoint instead hands the CPU work (decoding, validation
+and scoring of the body) to a BoundedExecutor: a pool of `workers` threads or
+processes with room for `max_queue` waiting requests. When both are full the
+request is turned away at once with 503 (or 429) and a `Retry-After` header,
+so callers back off instead of latency growing without limit.
+
+Work submitted to the pool is a plain function of the raw body returning
+`(status, content, component points)`, so the same code runs in a thread or
+in a worker process.
+"""
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+
+from app.fastpath import loads, parse_fast
+from app.models import ScoringRequest
+from app.rules import DEFAULT_RULES, INPUT_INDEX, extract_row
+from app.settings import settings
+
+class Overloaded(Exception):
+    """
+    Raised when the executor's workers and queue are all taken
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"executor at capacity, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class BoundedExecutor:
+    """
+    Thread or process pool that admits at most `workers + max_queue`
+    requests at a time
+
+    The admission count is only touched from the event loop and released
+    when the pool finishes a task (not when the awaiting request goes away),
+    so it always matches the work actually held by the pool.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 0, max_queue: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind {kind!r} (expected thread or process)")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.capacity = self.workers + max_queue
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        # Smoothed time from admission to completion, for Retry-After
+        self.latency_seconds = 0.0
+        self._pool: Optional[Executor] = None
+
+    @property
+    def pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scoring")
+        return self._pool
+
+    def retry_after(self) -> int:
+        """
+        Seconds a rejected caller should wait: about one queue drain time
+        """
+        return max(1, math.ceil(self.latency_seconds))
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `fn(*args)` in the pool, or raise Overloaded when it is full
+        """
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise Overloaded(self.retry_after())
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        start = time.perf_counter()
+
+        def release(_future) -> None:
+            self.in_flight -= 1
+            self.completed += 1
+            elapsed = time.perf_counter() - start
+            self.latency_seconds += 0.1 * (elapsed - self.latency_seconds)
+
+        try:
+            future = self.pool.submit(fn, *args)
+        except BaseException:
+            self.in_flight -= 1
+            raise
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(release, f))
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_seconds": self.latency_seconds,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+def _validation_errors(error: Exception, loc: Tuple[Any, ...]) -> List[Dict[str, Any]]:
+    # The same error list FastAPI renders for a RequestValidationError
+    return jsonable_encoder(RequestValidationError([ErrorWrapper(error, loc)]).errors())
+
+def evaluate_body(body: bytes) -> Tuple[int, Dict[str, Any], Optional[List[Any]]]:
+    """
+    Decode, validate and score one /evaluate_credit request body
+
+    Returns (HTTP status, JSON content, points per component); the content
+    and status are those /evaluate_credit/fast would respond with.
+    """
+    try:
+        payload = loads(body)
+    except ValueError as e:
+        return 422, {"detail": _validation_errors(e, ("body", getattr(e, "pos", 0)))}, None
+    return evaluate_payload(payload)
+
+def evaluate_payload(payload: Any) -> Tuple[int, Dict[str, Any], Optional[List[Any]]]:
+    """
+    Validate and score one decoded request payload (see evaluate_body)
+    """
+    try:
+        parsed = parse_fast(payload)
+        if parsed is None:
+            try:
+                analysis = ScoringRequest.parse_obj(payload)
+            except ValidationError as e:
+                return 422, {"detail": _validation_errors(e, ("body",))}, None
+            user_id, loan_id = analysis.user_id, analysis.loan_id
+            row = extract_row(analysis)
+            has_assets = bool(analysis.analysis_result.detected_assets)
+        else:
+            user_id, loan_id = parsed.user_id, parsed.loan_id
+            row, has_assets = parsed.row, parsed.has_assets
+
+        # Validate input
+        if row[INPUT_INDEX["total_asset_value"]] < 0:
+            return 400, {"detail": "Asset value cannot be negative"}, None
+
+        if not has_assets:
+            return 400, {"detail": "No assets detected in analysis"}, None
+
+        credit_score, points = DEFAULT_RULES.score_components(row)
+
+    except Exception as e:
+        return 500, {"detail": f"Error processing credit evaluation: {str(e)}"}, None
+
+    return 200, {"user_id": user_id, "loan_id": loan_id, "credit_score": credit_score}, points
+
+def create_executor() -> BoundedExecutor:
+    """
+    Build the executor configured by CREDIT_ASYNC_* settings
+    """
+    return BoundedExecutor(settings.async_executor, settings.async_workers, settings.async_max_queue)
+
+scoring_executor = create_executor()
@@ -0,0 +1,661 @@
+"""
+Declarative scoring rules, compiled into flat lookup tables
+
+A rule definition (JSON, or YAML when PyYAML is installed) lists the score
+components in evaluation order. Each component sums a few terms and is capped
+at `max_points`:
+
+- ladder: look the input up in ascending `breakpoints` (bisect) and award the
+  matching entry of `points`; `>=` thresholds by default, `>` when `strict`
+- linear: `input / divisor * multiplier`, optionally truncated to an int and
+  capped; applied only when the `when` input is positive
+- flags: add `weights[input]` for every truthy input, optionally capped
+
+`coverage_ratio` is total_asset_value over the request's loan amount: the
+`loan_amount` input when the request gave one (directly or through its
+product code, see LOAN_PRODUCTS), the rule set's `loan_amount` otherwise.
+
+The definition is compiled once into breakpoint/points tables. The scalar path
+runs them through `bisect` in a scorer generated as straight-line Python, the
+batch path through NumPy; both follow the operation order of the original
+hand-written ladders, so the scores are identical.
+"""
+import json
+import operator
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.settings import settings
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("scoring_rules.json")
+DEFAULT_PRODUCTS_PATH = Path(__file__).with_name("loan_products.json")
+
+# Numeric CreditFeatures fields, in model order
+FEATURE_INPUTS = (
+    "total_asset_value",
+    "asset_diversity_score",
+    "has_transport_asset",
+    "has_electronics_asset",
+    "has_livestock_asset",
+    "has_property_asset",
+    "has_high_value_assets",
+    "high_value_asset_count",
+    "average_asset_condition",
+    "location_stability_score",
+    "primary_device_tier_score",
+    "unique_devices_count",
+    "asset_to_device_ratio",
+    "image_span_days",
+    "images_per_day",
+    "has_recent_images",
+    "asset_concentration_score",
+    "average_detection_confidence",
+)
+
+# Layout of a feature row: the CreditFeatures inputs followed by the inputs
+# taken from the summary and the analysis result, and the loan amount
+# (0.0 when the request leaves it to the rule set's default)
+INPUT_FIELDS = FEATURE_INPUTS + (
+    "exif_verification_rate",
+    "total_images_processed",
+    "total_assets_detected",
+    "loan_amount",
+)
+INPUT_INDEX = {name: index for index, name in enumerate(INPUT_FIELDS)}
+
+# Inputs computed from the row and the rule set
+DERIVED_INPUTS = ("coverage_ratio",)
+
+Row = Sequence[Any]
+
+def parse_exif_rate(rate: str) -> float:
+    """
+    Parse an EXIF verification rate such as "100.0%"
+    """
+    exif_rate_str = rate.replace('%', '')
+    return float(exif_rate_str) if exif_rate_str else 0
+
+def extract_row(analysis_data) -> List[Any]:
+    """
+    Extract the scoring inputs of a request as a row laid out like INPUT_FIELDS
+    """
+    result = analysis_data.analysis_result
+    values = result.credit_features.__dict__
+    row = [values[name] for name in FEATURE_INPUTS]
+    row.append(parse_exif_rate(result.summary.exif_verification_rate))
+    row.append(result.total_images_processed)
+    row.append(result.total_assets_detected)
+    row.append(request_loan_amount(analysis_data.loan_amount, analysis_data.product_code))
+    return row
+
+def request_loan_amount(loan_amount: Optional[float], product_code: Optional[str]) -> float:
+    """
+    The loan amount input of a request: its own amount, else its product's,
+    else 0.0 (score against the rule set's `loan_amount`)
+    Raises KeyError for a product code missing from LOAN_PRODUCTS
+    """
+    if loan_amount is not None:
+        return loan_amount
+    if product_code is not None:
+        return LOAN_PRODUCTS[product_code]
+    return 0.0
+
+def valid_loan_amount(value: Any) -> bool:
+    return 0 < value < float("inf")
+
+class CompiledTerm:
+    """
+    One compiled term: `evaluate(row)` for a single row and
+    `evaluate_columns(matrix)` for a batch
+    """
+    kind = ""
+    evaluate: Callable[[Row], Any]
+
+    def evaluate_columns(self, matrix: np.ndarray, errors: Dict[int, str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def source(self, ns: "_Namespace") -> List[str]:
+        """
+        Python statements adding this term to `points`, for the generated scorer
+        """
+        raise NotImplementedError
+
+    def explain_source(self, ns: "_Namespace") -> List[str]:
+        """
+        Like `source`, for the generated explainer; ladders also append their
+        position to `rungs`
+        """
+        return self.source(ns)
+
+    def describe(self, row: Row, points: Any, rung: Optional[int]) -> Dict[str, Any]:
+        """
+        What this term awarded for `row` and why, for a ScoreExplanation
+        """
+        raise NotImplementedError
+
+class LadderTerm(CompiledTerm):
+    kind = "ladder"
+
+    def __init__(self, rules: "CompiledRules", input_name: str, breakpoints: List[float], points: List[Any], strict: bool):
+        self.input_name = input_name
+        self.breakpoints = tuple(breakpoints)
+        self.points = tuple(points)
+        self.strict = strict
+        self._breakpoint_array = np.array(self.breakpoints, dtype=np.float64)
+        self._point_array = np.array(self.points, dtype=np.float64)
+        self._column = rules.column_getter(input_name)
+
+        get = self._get = rules.scalar_getter(input_name)
+        breakpoints_ = self.breakpoints
+        points_ = self.points
+        bisect = bisect_left if strict else bisect_right
+
+        def evaluate(row):
+            value = get(row)
+            # NaN fails every threshold, but bisect would place it past the end
+            if value != value:
+                return points_[0]
+            return points_[bisect(breakpoints_, value)]
+
+        self.evaluate = evaluate
+
+    def index(self, value: Any) -> int:
+        """
+        Position of `value` on the ladder (index into `points`)
+        """
+        if value != value:
+            return 0
+        return (bisect_left if self.strict else bisect_right)(self.breakpoints, value)
+
+    def source(self, ns):
+        value = ns.input(self.input_name)
+        breakpoints = ns.const(self.breakpoints)
+        points = ns.const(self.points)
+        bisect = ns.const(bisect_left if self.strict else bisect_right)
+        return [
+            f"x = {value}",
+            f"points += {points}[{bisect}({breakpoints}, x)] if x == x else {ns.const(self.points[0])}",
+        ]
+
+    def explain_source(self, ns):
+        value = ns.input(self.input_name)
+        breakpoints = ns.const(self.breakpoints)
+        bisect = ns.const(bisect_left if self.strict else bisect_right)
+        return [
+            f"x = {value}",
+            f"i = {bisect}({breakpoints}, x) if x == x else 0",
+            f"points += {ns.const(self.points)}[i]",
+            "rungs.append(i)",
+        ]
+
+    def describe(self, row, points, rung):
+        # The threshold the value reached, and the next one up
+        return {
+            "type": self.kind,
+            "input": self.input_name,
+            "value": self._get(row),
+            "points": points,
+            "comparison": ">" if self.strict else ">=",
+            "threshold": self.breakpoints[rung - 1] if rung > 0 else None,
+            "next_threshold": self.breakpoints[rung] if rung < len(self.breakpoints) else None,
+        }
+
+    def evaluate_columns(self, matrix, errors):
+        values = self._column(matrix)
+        index = np.searchsorted(self._breakpoint_array, values, side="left" if self.strict else "right")
+        index[np.isnan(values)] = 0
+        return self._point_array[index]
+
+class LinearTerm(CompiledTerm):
+    kind = "linear"
+
+    def __init__(self, rules: "CompiledRules", input_name: str, divisor: Any, multiplier: Any,
+                 truncate: bool, cap: Optional[Any], when: Optional[str]):
+        self.input_name = input_name
+        self.divisor = divisor
+        self.multiplier = multiplier
+        self.truncate = truncate
+        self.cap = cap
+        self.when = when
+        self._column = rules.column_getter(input_name)
+        self._when_column = rules.column_getter(when) if when is not None else None
+
+        get = self._get = rules.scalar_getter(input_name)
+        gate = self._gate = rules.scalar_getter(when) if when is not None else None
+
+        def evaluate(row):
+            if gate is not None and not gate(row) > 0:
+                return 0
+            value = get(row)
+            if divisor != 1:
+                value = value / divisor
+            if multiplier != 1:
+                value = value * multiplier
+            if truncate:
+                value = int(value)
+            if cap is not None:
+                value = min(cap, value)
+            return value
+
+        self.evaluate = evaluate
+
+    def source(self, ns):
+        value = ns.input(self.input_name)
+        if self.divisor != 1:
+            value = f"{value} / {ns.const(self.divisor)}"
+        if self.multiplier != 1:
+            value = f"({value}) * {ns.const(self.multiplier)}"
+        if self.truncate:
+            value = f"int({value})"
+        if self.cap is not None:
+            value = f"min({ns.const(self.cap)}, {value})"
+        if self.when is None:
+            return [f"points += {value}"]
+        return [f"if {ns.input(self.when)} > 0:", f"    points += {value}"]
+
+    def describe(self, row, points, rung):
+        return {
+            "type": self.kind,
+            "input": self.input_name,
+            "value": self._get(row),
+            "points": points,
+            "applied": self._gate is None or self._gate(row) > 0,
+            "at_cap": self.cap is not None and points == self.cap,
+        }
+
+    def evaluate_columns(self, matrix, errors):
+        values = self._column(matrix)
+        if self.divisor != 1:
+            values = values / self.divisor
+        if self.multiplier != 1:
+            values = values * self.multiplier
+        applies = self._when_column(matrix) > 0 if self._when_column is not None else None
+        if self.truncate:
+            # int() raises on NaN/infinity; record the rows the scalar path would reject
+            bad = ~np.isfinite(values)
+            if applies is not None:
+                bad &= applies
+            for row in np.flatnonzero(bad).tolist():
+                if row not in errors:
+                    errors[row] = (
+                        "cannot convert float NaN to integer" if np.isnan(values[row])
+                        else "cannot convert float infinity to integer"
+                    )
+            values = np.trunc(values)
+        if self.cap is not None:
+            # fmin mirrors min(cap, value), which keeps the cap when value is NaN
+            values = np.fmin(self.cap, values)
+        if applies is not None:
+            values = np.where(applies, values, 0.0)
+        return values
+
+class FlagsTerm(CompiledTerm):
+    kind = "flags"
+
+    def __init__(self, rules: "CompiledRules", weights: Dict[str, Any], cap: Optional[Any]):
+        self.weights = dict(weights)
+        self.cap = cap
+        self._columns = [(rules.column_getter(name), weight) for name, weight in self.weights.items()]
+
+        flags = self._flags = tuple((rules.scalar_getter(name), weight) for name, weight in self.weights.items())
+
+        def evaluate(row):
+            value = 0
+            for get, weight in flags:
+                if get(row):
+                    value += weight
+            if cap is not None:
+                value = min(cap, value)
+            return value
+
+        self.evaluate = evaluate
+
+    def source(self, ns):
+        lines = ["flags = 0"]
+        for name, weight in self.weights.items():
+            lines.append(f"if {ns.input(name)}:")
+            lines.append(f"    flags += {ns.const(weight)}")
+        if self.cap is not None:
+            lines.append(f"points += min({ns.const(self.cap)}, flags)")
+        else:
+            lines.append("points += flags")
+        return lines
+
+    def describe(self, row, points, rung):
+        return {
+            "type": self.kind,
+            "inputs": [name for name, (get, _) in zip(self.weights, self._flags) if get(row)],
+            "points": points,
+            "at_cap": self.cap is not None and points == self.cap,
+        }
+
+    def evaluate_columns(self, matrix, errors):
+        values = np.zeros(matrix.shape[0])
+        for column, weight in self._columns:
+            values = values + np.where(column(matrix) != 0, weight, 0)
+        if self.cap is not None:
+            values = np.fmin(self.cap, values)
+        return values
+
+class CompiledComponent:
+    def __init__(self, name: str, description: str, max_points: Any, terms: List[CompiledTerm]):
+        self.name = name
+        self.description = description
+        self.max_points = max_points
+        self.terms = terms
+
+class CompiledRules:
+    """
+    A rule definition compiled into lookup tables
+
+    Rows are laid out like `fields`: INPUT_FIELDS for the asset analysis
+    rules, a source's own fields for the other data sources (app.sources).
+    `coverage_ratio` is only derived for the asset layout.
+    """
+
+    def __init__(self, definition: Dict[str, Any], fields: Sequence[str] = INPUT_FIELDS):
+        self.definition = definition
+        self.fields = tuple(fields)
+        self.input_index = {name: index for index, name in enumerate(self.fields)}
+        self.version = str(definition.get("version", "unversioned"))
+        self.loan_amount = definition.get("loan_amount", 100000.0)
+        self.min_score = definition.get("min_score", 0)
+        self.max_score = definition.get("max_score", 100)
+        self.components = [self._compile_component(c) for c in _require(definition, "components", "rules")]
+        self.score = self._generate_scorer()
+        self.score_components = self._generate_scorer(components=True)
+        self.explain = self._generate_explainer()
+
+    def derives_coverage(self, name: str) -> bool:
+        return name == "coverage_ratio" and self.fields == INPUT_FIELDS
+
+    def index(self, name: str) -> int:
+        try:
+            return self.input_index[name]
+        except KeyError:
+            raise ValueError(f"Unknown rule input {name!r}") from None
+
+    def scalar_getter(self, name: str) -> Callable[[Row], Any]:
+        if self.derives_coverage(name):
+            total_asset_value = INPUT_INDEX["total_asset_value"]
+            requested = INPUT_INDEX["loan_amount"]
+            loan_amount = self.loan_amount
+            if loan_amount > 0:
+                return lambda row: row[total_asset_value] / (row[requested] or loan_amount)
+            return lambda row: row[total_asset_value] / row[requested] if row[requested] else 0
+        return operator.itemgetter(self.index(name))
+
+    def column_getter(self, name: str) -> Callable[[np.ndarray], np.ndarray]:
+        if self.derives_coverage(name):
+            total_asset_value = INPUT_INDEX["total_asset_value"]
+            requested = INPUT_INDEX["loan_amount"]
+            loan_amount = self.loan_amount
+
+            def coverage_ratio(matrix):
+                # Every row divides by its own amount, so mixed loan amounts
+                # (and products) stay one vectorized pass
+                amounts = matrix[:, requested]
+                given = amounts != 0
+                if loan_amount > 0:
+                    return matrix[:, total_asset_value] / np.where(given, amounts, loan_amount)
+                return np.where(given, matrix[:, total_asset_value] / np.where(given, amounts, 1.0), 0.0)
+
+            return coverage_ratio
+        index = self.index(name)
+        return lambda matrix: matrix[:, index]
+
+    def _compile_component(self, spec: Dict[str, Any]) -> CompiledComponent:
+        name = _require(spec, "name", "component")
+        terms = [self._compile_term(term, name) for term in _require(spec, "terms", name)]
+        return CompiledComponent(name, spec.get("description", name), _require(spec, "max_points", name), terms)
+
+    def _compile_term(self, spec: Dict[str, Any], component: str) -> CompiledTerm:
+        kind = spec.get("type")
+        if kind == "ladder":
+            breakpoints = list(_require(spec, "breakpoints", component))
+            points = list(_require(spec, "points", component))
+            if breakpoints != sorted(breakpoints):
+                raise ValueError(f"{component}: ladder breakpoints must be ascending")
+            if len(points) != len(breakpoints) + 1:
+                raise ValueError(f"{component}: a ladder needs one more points entry than breakpoints")
+            return LadderTerm(self, _require(spec, "input", component), breakpoints, points, bool(spec.get("strict", False)))
+        if kind == "linear":
+            divisor = spec.get("divisor", 1)
+            if divisor == 0:
+                raise ValueError(f"{component}: linear divisor cannot be zero")
+            return LinearTerm(
+                self,
+                _require(spec, "input", component),
+                divisor,
+                spec.get("multiplier", 1),
+                bool(spec.get("truncate", False)),
+                spec.get("cap"),
+                spec.get("when"),
+            )
+        if kind == "flags":
+            return FlagsTerm(self, _require(spec, "weights", component), spec.get("cap"))
+        raise ValueError(f"{component}: unknown term type {kind!r}")
+
+    def _generate_scorer(self, components: bool = False) -> Callable[[Row], Any]:
+        """
+        Generate `score(row) -> int` as straight-line Python over the tables
+
+        The generated function performs exactly the operations of the terms'
+        `evaluate` closures, without the per-term call overhead. With
+        `components`, it returns `(score, [capped points per component])`.
+        """
+        ns = _Namespace(self)
+        lines = ["def score(row):", "    score = 0"]
+        if components:
+            lines.append("    parts = []")
+        for component in self.components:
+            lines.append(f"    # {component.name}")
+            lines.append("    points = 0")
+            for term in component.terms:
+                lines.extend("    " + line for line in term.source(ns))
+            if components:
+                lines.append(f"    points = min({ns.const(component.max_points)}, points)")
+                lines.append("    parts.append(points)")
+                lines.append("    score += points")
+            else:
+                lines.append(f"    score += min({ns.const(component.max_points)}, points)")
+        total = f"int(min({ns.const(self.max_score)}, max({ns.const(self.min_score)}, score)))"
+        lines.append(f"    return {total}, parts" if components else f"    return {total}")
+        code = "\n".join(lines)
+        exec(compile(code, f"<rules {self.version}>", "exec"), ns.values)
+        score = ns.values["score"]
+        if components:
+            score.__doc__ = "Score one feature row; returns (score, points per component)"
+        else:
+            score.__doc__ = "Score one feature row (laid out like the rules' fields)"
+        return score
+
+    def _generate_explainer(self) -> Callable[[Row], "ScoreExplanation"]:
+        """
+        Generate `explain(row) -> ScoreExplanation`: the scorer's operations,
+        also keeping every term's and component's points and each ladder's
+        position. A term is added to a fresh `points` (0 + value == value)
+        and then to its component's running total, so every sum is the one
+        `score` computes.
+        """
+        ns = _Namespace(self)
+        lines = ["def explain(row):", "    score = 0", "    parts = []", "    terms = []", "    rungs = []"]
+        for component in self.components:
+            lines.append(f"    # {component.name}")
+            lines.append("    points = 0")
+            for term in component.terms:
+                lines.append("    outer = points")
+                lines.append("    points = 0")
+                lines.extend("    " + line for line in term.explain_source(ns))
+                lines.append("    terms.append(points)")
+                lines.append("    points = outer + points")
+            lines.append(f"    points = min({ns.const(component.max_points)}, points)")
+            lines.append("    parts.append(points)")
+            lines.append("    score += points")
+        total = f"int(min({ns.const(self.max_score)}, max({ns.const(self.min_score)}, score)))"
+        lines.append(f"    return {ns.const(ScoreExplanation)}({ns.const(self)}, row, {total}, parts, terms, rungs)")
+        code = "\n".join(lines)
+        exec(compile(code, f"<rules {self.version} explain>", "exec"), ns.values)
+        explain = ns.values["explain"]
+        explain.__doc__ = "Score one feature row, keeping the points of every component and term"
+        return explain
+
+    def score_matrix(self, matrix: np.ndarray) -> Tuple[np.ndarray, Dict[int, str]]:
+        """
+        Score a (rows x fields) float64 matrix (or ColumnMatrix) in one vectorized pass
+        Returns int64 scores plus errors for rows the scalar path would reject
+        """
+        errors: Dict[int, str] = {}
+        score = np.zeros(matrix.shape[0])
+        for component in self.components:
+            points = np.zeros(matrix.shape[0])
+            for term in component.terms:
+                points = points + term.evaluate_columns(matrix, errors)
+            score = score + np.fmin(component.max_points, points)
+        score = np.fmin(self.max_score, np.fmax(self.min_score, score))
+        return score.astype(np.int64), errors
+
+class ColumnMatrix:
+    """
+    Matrix-like view over separate column arrays (one per INPUT_FIELDS entry)
+
+    `score_matrix` only reads whole columns (`matrix[:, i]`) and the row
+    count, so columnar data (e.g. memory-mapped column files) can be scored
+    without first being copied into one 2-D array.
+    """
+
+    def __init__(self, columns: Sequence[np.ndarray]):
+        if len(columns) != len(INPUT_FIELDS):
+            raise ValueError(f"expected {len(INPUT_FIELDS)} columns, got {len(columns)}")
+        self.columns = columns
+        self.shape = (len(columns[0]), len(columns))
+
+    def __getitem__(self, key):
+        rows, index = key
+        return self.columns[index][rows]
+
+class ScoreExplanation:
+    """
+    A score with the points of every component and term, from one evaluation
+
+    Holds the feature row and the lists the explainer filled in; nothing is
+    copied or described until `components()` / `to_dict()` is called.
+    """
+    __slots__ = ("rules", "row", "credit_score", "component_points", "term_points", "rungs")
+
+    def __init__(self, rules: CompiledRules, row: Row, credit_score: int,
+                 component_points: List[Any], term_points: List[Any], rungs: List[int]):
+        self.rules = rules
+        self.row = row
+        self.credit_score = credit_score
+        self.component_points = component_points
+        self.term_points = term_points
+        self.rungs = rungs
+
+    def points(self) -> Dict[str, Any]:
+        """
+        Capped points per component name
+        """
+        return {component.name: points for component, points in zip(self.rules.components, self.component_points)}
+
+    def components(self) -> List[Dict[str, Any]]:
+        """
+        Per component: points, cap, and what each term awarded and why
+        """
+        described = []
+        terms = iter(self.term_points)
+        rungs = iter(self.rungs)
+        for component, points in zip(self.rules.components, self.component_points):
+            term_details = []
+            raw = 0
+            for term in component.terms:
+                term_points = next(terms)
+                raw = raw + term_points
+                rung = next(rungs) if term.kind == "ladder" else None
+                term_details.append(term.describe(self.row, term_points, rung))
+            described.append({
+                "name": component.name,
+                "description": component.description,
+                "points": points,
+                "max_points": component.max_points,
+                "capped": raw > component.max_points,
+                "terms": term_details,
+            })
+        return described
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"credit_score": self.credit_score, "components": self.components()}
+
+class _Namespace:
+    """
+    Names bound into the generated scorer: constants and input expressions
+    """
+
+    def __init__(self, rules: CompiledRules):
+        self.rules = rules
+        self.values: Dict[str, Any] = {}
+
+    def const(self, value: Any) -> str:
+        name = f"c{len(self.values)}"
+        self.values[name] = value
+        return name
+
+    def input(self, name: str) -> str:
+        if self.rules.derives_coverage(name):
+            total_asset_value = f"row[{INPUT_INDEX['total_asset_value']}]"
+            requested = f"row[{INPUT_INDEX['loan_amount']}]"
+            loan_amount = self.rules.loan_amount
+            if loan_amount > 0:
+                return f"({total_asset_value} / ({requested} or {self.const(loan_amount)}))"
+            return f"({total_asset_value} / {requested} if {requested} else 0)"
+        return f"row[{self.rules.index(name)}]"
+
+def _require(spec: Dict[str, Any], key: str, where: str) -> Any:
+    if key not in spec:
+        raise ValueError(f"{where}: missing {key!r}")
+    return spec[key]
+
+def compile_rules(definition: Dict[str, Any], fields: Sequence[str] = INPUT_FIELDS) -> CompiledRules:
+    """
+    Compile a rule definition (as loaded from JSON/YAML)
+    """
+    return CompiledRules(definition, fields)
+
+def load_definition(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Load a rule definition file (.json, .yaml or .yml)
+    """
+    path = Path(path)
+    with open(path) as f:
+        if path.suffix in (".yaml", ".yml"):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def load_rules(path: Union[str, Path]) -> CompiledRules:
+    """
+    Load and compile a rule definition file (.json, .yaml or .yml)
+    """
+    return compile_rules(load_definition(path))
+
+def load_products(path: Union[str, Path]) -> Dict[str, float]:
+    """
+    Load a loan product catalog: {"products": {code: {"loan_amount": ...}}}
+    Returns the loan amount per product code
+    """
+    with open(path) as f:
+        catalog = json.load(f)
+    products = {}
+    for code, product in _require(catalog, "products", "product catalog").items():
+        loan_amount = _require(product, "loan_amount", code)
+        if not valid_loan_amount(loan_amount):
+            raise ValueError(f"{code}: loan_amount must be a positive number")
+        products[code] = float(loan_amount)
+    return products
+
+# Loaded once at startup; restart to pick up a changed rules file
+DEFAULT_RULES = load_rules(settings.rules_path or DEFAULT_RULES_PATH)
+LOAN_PRODUCTS = load_products(settings.products_path or DEFAULT_PRODUCTS_PATH)
@@ -0,0 +1,132 @@
+"""
+Production serving entry point
+
+    python -m app.serve [--host 0.0.0.0] [--port $PORT] [--workers N]
+                        [--no-warmup] [--access-log] [--log-level info]
+
+Runs the API under uvicorn with a serving profile instead of uvicorn's
+single-process defaults:
+
+- workers: CREDIT_SERVE_WORKERS or --workers (default 1), 0 meaning one
+  per CPU this process may use (its CPU affinity, capped by a cgroup CPU
+  quota when the container has one)
+- uvloop and httptools when they are installed (pip install uvloop
+  httptools), else asyncio and h11
+- every worker warms up (app.warmup) before /health/ready reports it ready;
+  /health/live answers as soon as the worker is up
+- no per-request access log unless --access-log (request counts and latency
+  are on /metrics)
+
+With one worker the app is imported here and served in this process; with
+several, uvicorn spawns each worker, which imports the app itself (ship
+precompiled bytecode, `python -m compileall app`, so that import is fast).
+Per-worker state (score cache, aggregator, metrics) follows the settings
+described in the README; set CREDIT_METRICS_DIR so /metrics sums all workers.
+The /loans aggregates are not shared at all: with several workers, a load
+balancer must route every request for a loan to the same worker (sticky on
+the loan_id in the path), which is warned about at startup.
+"""
+import argparse
+import importlib.util
+import math
+import os
+import sys
+from typing import Optional
+
+from app.settings import settings
+
+def _cgroup_cpu_limit() -> Optional[int]:
+    """
+    CPUs allowed by a cgroup v2 (cpu.max) or v1 (cfs quota) limit, if any
+    """
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return max(1, math.ceil(quota / period))
+    except (OSError, ValueError):
+        pass
+    return None
+
+def available_cpus() -> int:
+    """
+    CPUs this process can actually run on
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    return min(cpus, limit) if limit is not None else cpus
+
+def worker_count(requested: int = 0) -> int:
+    return requested if requested > 0 else available_cpus()
+
+def multi_worker_warning(workers: int) -> Optional[str]:
+    """
+    What breaks with several workers, or None with one
+    """
+    if workers <= 1:
+        return None
+    return (
+        f"warning: {workers} workers each keep their own /loans/{{loan_id}}/assets aggregates; "
+        "route every request for a loan to the same worker, or run one worker"
+    )
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") is not None else "asyncio"
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=settings.serve_workers, help="0: one per available CPU")
+    parser.add_argument("--no-warmup", action="store_true", help="report ready without warming up")
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    if args.no_warmup:
+        # Read by every worker's settings, spawned workers included
+        os.environ["CREDIT_WARMUP"] = "false"
+        settings.warmup = False
+    workers = worker_count(args.workers)
+    loop, http = event_loop(), http_protocol()
+    print(f"Serving on {args.host}:{args.port} with {workers} worker(s), loop={loop}, http={http}", flush=True)
+    warning = multi_worker_warning(workers)
+    if warning is not None:
+        print(warning, file=sys.stderr, flush=True)
+
+    if workers == 1:
+        from app.main import app
+        target = app
+    else:
+        target = "app.main:app"
+    uvicorn.run(
+        target,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        access_log=args.access_log,
+        log_level=args.log_level,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from pydantic import BaseSettings
+from typing import Optional
+
+class Settings(BaseSettings):
+    """
+    Runtime configuration, read from CREDIT_* environment variables
+    """
+    # Scoring rule definition (JSON or YAML); defaults to app/scoring_rules.json
+    rules_path: Optional[str] = None
+    # Loan product catalog (product code -> loan amount); defaults to
+    # app/loan_products.json
+    products_path: Optional[str] = None
+    # /evaluate_credit/multi: data sources, their weights and rules; defaults
+    # to app/source_rules.json
+    source_rules_path: Optional[str] = None
+    # Parse scoring requests without validating each detected asset
+    # (LeanCreditAnalysisRequest); the assets stay available for audit
+    lazy_asset_validation: bool = False
+    # Score cache: "none", "memory" (per worker) or "sqlite" (shared file)
+    cache_backend: str = "memory"
+    cache_max_entries: int = 100000
+    cache_ttl_seconds: float = 3600.0
+    cache_path: str = "score_cache.sqlite3"
+    # /metrics: with a directory set, every worker writes its metrics there
+    # and /metrics reports the sum over all workers on the host
+    metrics_enabled: bool = True
+    metrics_dir: Optional[str] = None
+    metrics_flush_seconds: float = 1.0
+    # /evaluate_credit/async: "thread" or "process" pool of async_workers
+    # (0: one per CPU) with async_max_queue waiting requests; beyond that,
+    # requests are rejected with async_overload_status and Retry-After
+    async_executor: str = "thread"
+    async_workers: int = 0
+    async_max_queue: int = 64
+    async_overload_status: int = 503
+    # Columnar feature store (app.store) that /evaluate_credit appends every
+    # scored request to, flushed from a background thread
+    feature_store_path: Optional[str] = None
+    feature_store_flush_seconds: float = 1.0
+    # /loans/{loan_id}/assets: incremental per-loan aggregates kept in memory
+    # (per worker) for at most aggregator_max_loans loans, dropped after
+    # aggregator_idle_seconds without an update
+    aggregator_max_loans: int = 100000
+    aggregator_idle_seconds: float = 86400.0
+    # Score audit log (app.audit): every issued score is written to segment
+    # files under audit_dir by a background thread every audit_flush_seconds,
+    # rotating at audit_segment_bytes; beyond audit_max_buffer queued records
+    # new ones are dropped (and counted) rather than stalling requests
+    audit_dir: Optional[str] = None
+    audit_flush_seconds: float = 1.0
+    audit_segment_bytes: int = 64 << 20
+    audit_max_buffer: int = 100000
+    audit_fsync: bool = True
+    # Duplicate and fraud-pattern index (app.duplicates) that /evaluate_credit
+    # checks detected assets against: hash table slots per index (memory and
+    # disk stay bounded by this) and the GPS grid cell size in degrees
+    duplicate_index_path: Optional[str] = None
+    duplicate_index_capacity: int = 1 << 24
+    duplicate_grid_degrees: float = 0.001
+    # Shadow scoring (app.shadow): comma-separated rule files scored against
+    # live traffic by a background thread every shadow_flush_seconds, using
+    # at most shadow_budget of one CPU; work beyond the budget (or beyond
+    # shadow_max_queue queued scores) is dropped, see /shadow/report
+    shadow_rules: Optional[str] = None
+    shadow_budget: float = 0.05
+    shadow_flush_seconds: float = 0.5
+    shadow_max_queue: int = 100000
+    # Request body guard (app.guard): POST bodies over max_body_bytes
+    # (max_batch_body_bytes for the /batch endpoints), with more than
+    # max_detected_assets assets in a detected_assets list or JSON nested
+    # deeper than max_json_depth are rejected with 413 before being parsed;
+    # 0 disables a limit. The streaming and upload endpoints are exempt
+    max_body_bytes: int = 1 << 20
+    max_batch_body_bytes: int = 32 << 20
+    max_detected_assets: int = 1000
+    max_json_depth: int = 32
+    body_guard_exempt_paths: str = "/evaluate_credit/stream,/internal/score/stream,/jobs"
+    # /jobs: job database, uploads and results live in jobs_dir; chunks are
+    # scored by jobs_workers processes (1: in the dispatcher thread, 0: one
+    # per CPU). Local file jobs may only read files under jobs_input_dir
+    jobs_dir: str = "jobs"
+    jobs_workers: int = 0
+    jobs_chunk_size: int = 1000
+    jobs_stale_seconds: float = 60.0
+    jobs_input_dir: Optional[str] = None
+
+    # python -m app.serve: uvicorn workers (0: one per available CPU) and
+    # whether each worker warms up before /health/ready reports it ready.
+    # One by default: the /loans aggregates live in each worker's memory
+    serve_workers: int = 1
+    warmup: bool = True
+
+    class Config:
+        env_prefix = "CREDIT_"
+
+settings = Settings()
@@ -0,0 +1,265 @@
+"""
+Shadow scoring: candidate rule versions scored against live traffic
+
+Every score issued by the scoring endpoints is also queued, with its feature
+row, for the candidate rule sets registered here (CREDIT_SHADOW_RULES). A
+background thread scores the queued rows with every candidate in one
+vectorized pass per candidate (`CompiledRules.score_matrix`) and compares
+the results with the production scores; responses are never affected.
+
+The request path only appends a tuple to a bounded queue. The shadow work is
+held to a hard CPU budget: the worker may use at most `budget` of one CPU
+(a token bucket refilled at `budget` seconds per second, holding at most one
+second's worth). When traffic outgrows the budget, or the worker falls
+`max_queue` entries behind, shadow work is dropped and counted instead of
+competing with requests for the CPU (and the GIL).
+
+`report()` (served at /shadow/report) summarizes, per candidate version: how
+many scores were compared, how often the candidate agreed, scored higher or
+lower, and the distribution of score deltas (candidate - production).
+"""
+import collections
+import logging
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.batch import rows_to_matrix
+from app.fastpath import loads, parse_fast
+from app.models import ScoringRequest
+from app.rules import DEFAULT_RULES, CompiledRules, extract_row, load_rules
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Queued entry: (feature row, or a request body and the function decoding
+# it, and the production score)
+Entry = Tuple[Any, Optional[Callable[[bytes], Any]], int]
+
+def body_row(body: bytes, decode: Callable[[bytes], Any] = loads) -> List[Any]:
+    """
+    Feature row of a request body, as the scoring endpoints extract it
+    """
+    payload = decode(body)
+    parsed = parse_fast(payload)
+    if parsed is not None:
+        return parsed.row
+    return extract_row(ScoringRequest.parse_obj(payload))
+
+class VersionStats:
+    """
+    Running comparison of one candidate rule version with production
+    """
+
+    def __init__(self, rules: CompiledRules, production: CompiledRules):
+        self.rules = rules
+        # Deltas are counted in a histogram over every possible difference
+        self.offset = int(production.max_score - rules.min_score)
+        span = self.offset + int(rules.max_score - production.min_score)
+        self.deltas = np.zeros(span + 1, dtype=np.int64)
+        self.errors = 0
+
+    def update(self, matrix: np.ndarray, production_scores: np.ndarray) -> None:
+        scores, errors = self.rules.score_matrix(matrix)
+        valid = np.ones(len(scores), dtype=bool)
+        if errors:
+            valid[list(errors)] = False
+            self.errors += len(errors)
+        delta = scores[valid] - production_scores[valid]
+        self.deltas += np.bincount(np.clip(delta + self.offset, 0, len(self.deltas) - 1), minlength=len(self.deltas))
+
+    def summary(self) -> Dict[str, Any]:
+        compared = int(self.deltas.sum())
+        values = np.arange(len(self.deltas)) - self.offset
+        summary: Dict[str, Any] = {
+            "compared": compared,
+            "agreed": int(self.deltas[self.offset]),
+            "higher": int(self.deltas[self.offset + 1:].sum()),
+            "lower": int(self.deltas[:self.offset].sum()),
+            "errors": self.errors,
+        }
+        if not compared:
+            return summary
+        nonzero = np.flatnonzero(self.deltas)
+        absolute = np.bincount(np.abs(values), weights=self.deltas)
+        cumulative = np.cumsum(absolute)
+        summary.update({
+            "disagreement_rate": round(1.0 - summary["agreed"] / compared, 6),
+            "mean_delta": round(float((values * self.deltas).sum()) / compared, 4),
+            "mean_abs_delta": round(float((np.abs(values) * self.deltas).sum()) / compared, 4),
+            "min_delta": int(values[nonzero[0]]),
+            "max_delta": int(values[nonzero[-1]]),
+            "abs_delta_quantiles": {
+                name: int(np.searchsorted(cumulative, q * compared))
+                for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+            },
+            # Non-empty buckets only: {delta: count}
+            "delta_histogram": {str(int(values[i])): int(self.deltas[i]) for i in nonzero},
+        })
+        return summary
+
+class ShadowScorer:
+    """
+    Queue of issued scores compared with candidate rule versions by a
+    background thread
+    """
+
+    def __init__(self, candidates: Sequence[CompiledRules], production: CompiledRules = DEFAULT_RULES,
+                 budget: float = 0.05, flush_seconds: float = 0.5, max_queue: int = 100_000, max_batch: int = 8192):
+        if not 0 < budget <= 1:
+            raise ValueError("budget must be a fraction of one CPU, in (0, 1]")
+        self.production = production
+        self.versions: Dict[str, VersionStats] = {}
+        for rules in candidates:
+            self.register(rules)
+        self.budget = budget
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.processed = 0
+        self.dropped_queue_full = 0
+        self.dropped_over_budget = 0
+        self.undecodable = 0
+        self.failed = 0
+        self.failed_batches = 0
+        self.busy_seconds = 0.0
+        self._tokens = budget
+        self._refilled = time.monotonic()
+        self._queue: Deque[Entry] = collections.deque()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def register(self, rules: CompiledRules) -> None:
+        """
+        Add a candidate rule version (laid out like INPUT_FIELDS)
+        """
+        if rules.fields != self.production.fields:
+            raise ValueError(f"rules {rules.version} do not score asset analysis rows")
+        if rules.version == self.production.version or rules.version in self.versions:
+            raise ValueError(f"rules version {rules.version!r} is already being scored")
+        self.versions[rules.version] = VersionStats(rules, self.production)
+
+    def _queue_entry(self, entry: Entry) -> None:
+        if len(self._queue) >= self.max_queue:
+            self.dropped_queue_full += 1
+            return
+        self._queue.append(entry)
+
+    def add(self, row: Sequence[Any], credit_score: int) -> None:
+        """
+        Queue a score issued for a feature row
+        """
+        self._queue_entry((row, None, credit_score))
+
+    def add_body(self, body: bytes, credit_score: int, decode: Callable[[bytes], Any] = loads) -> None:
+        """
+        Queue a score issued without the feature row at hand (the async pool,
+        body cache hits, MessagePack requests); the worker extracts the row
+        """
+        self._queue_entry((body, decode, credit_score))
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.budget, self._tokens + (now - self._refilled) * self.budget)
+        self._refilled = now
+        return self._tokens
+
+    def process(self) -> int:
+        """
+        Compare queued scores while the CPU budget lasts; whatever is still
+        queued once it is spent is dropped. A batch that raises is logged
+        and counted as failed. Returns the number compared
+        """
+        with self._lock:
+            compared = 0
+            while self._queue and self._refill() > 0:
+                began = time.perf_counter()
+                entries = []
+                while self._queue and len(entries) < self.max_batch:
+                    entries.append(self._queue.popleft())
+                try:
+                    compared += self._compare(entries)
+                except Exception:
+                    logger.exception("shadow scoring batch failed")
+                    self.failed += len(entries)
+                    self.failed_batches += 1
+                spent = time.perf_counter() - began
+                self._tokens -= spent
+                self.busy_seconds += spent
+            if self._queue:
+                dropped = len(self._queue)
+                self._queue.clear()
+                self.dropped_over_budget += dropped
+            self.processed += compared
+            return compared
+
+    def _compare(self, entries: List[Entry]) -> int:
+        rows = []
+        scores = []
+        for source, decode, credit_score in entries:
+            if decode is not None:
+                try:
+                    source = body_row(source, decode)
+                except ValueError:
+                    self.undecodable += 1
+                    continue
+            rows.append(source)
+            scores.append(credit_score)
+        if not rows:
+            return 0
+        matrix = rows_to_matrix(rows)
+        production_scores = np.array(scores, dtype=np.int64)
+        for stats in self.versions.values():
+            stats.update(matrix, production_scores)
+            # Hand the GIL back to request threads between candidates rather
+            # than at the interpreter's switch interval (5 ms)
+            time.sleep(0)
+        return len(rows)
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._stopped.clear()
+            self._refilled = time.monotonic()
+            self._worker = threading.Thread(target=self._run, name="shadow-scoring", daemon=True)
+            self._worker.start()
+
+    def stop(self) -> None:
+        if self._worker is not None:
+            self._stopped.set()
+            self._worker.join()
+            self._worker = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_seconds):
+            self.process()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "production_version": self.production.version,
+            "budget": self.budget,
+            "queued": len(self._queue),
+            "processed": self.processed,
+            "dropped_queue_full": self.dropped_queue_full,
+            "dropped_over_budget": self.dropped_over_budget,
+            "undecodable": self.undecodable,
+            "failed": self.failed,
+            "failed_batches": self.failed_batches,
+            "busy_seconds": round(self.busy_seconds, 6),
+            "versions": {version: stats.summary() for version, stats in self.versions.items()},
+        }
+
+def create_shadow_scorer() -> Optional[ShadowScorer]:
+    """
+    Shadow scorer for the rule files in CREDIT_SHADOW_RULES (comma-separated;
+    None when unset)
+    """
+    if not settings.shadow_rules:
+        return None
+    candidates = [load_rules(path.strip()) for path in settings.shadow_rules.split(",") if path.strip()]
+    return ShadowScorer(candidates, DEFAULT_RULES, settings.shadow_budget, settings.shadow_flush_seconds,
+                        settings.shadow_max_queue)
+
+shadow_scorer = create_shadow_scorer()
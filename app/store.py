@@ -0,0 +1,377 @@
+"""
+Columnar feature store for portfolio-wide re-scoring and what-if analysis
+
+A store is a directory holding one raw binary file per column (the ids, each
+INPUT_FIELDS input, the normalization error code, the asset count and
+the append time) plus `meta.json` with the row count:
+
+    book/
+      meta.json
+      user_id.bin  loan_id.bin  batch_id.bin  error.bin  appended_at.bin
+      total_asset_value.bin  asset_diversity_score.bin  ...
+
+Rows come in as normalized feature records (app.features) and are appended
+column by column under a file lock, so several workers can append to one
+store. `meta.json` is rewritten last: a crash mid-append leaves at most some
+unreferenced bytes, which the next append truncates away. Readers memory-map
+the columns and only see rows counted in `meta.json`.
+
+Appending:
+- from the API: set CREDIT_FEATURE_STORE_PATH and every request scored by
+  /evaluate_credit is buffered and appended about once a second
+- from files: `python -m app.store import book/ requests.jsonl|records.frec`
+
+What-if analysis re-scores every row against an alternate rule definition,
+straight from the mapped columns, and reports how the scores move:
+
+    python -m app.store whatif book/ --rules new_rules.json [--changes changed.jsonl]
+"""
+import argparse
+import fcntl
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from app.features import FEATURE_DTYPE, normalize_requests, parse_lines, read_records
+from app.bulk import DEFAULT_CHUNK_SIZE, iter_chunks
+from app.rules import DEFAULT_RULES, INPUT_FIELDS, ColumnMatrix, CompiledRules, load_rules
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Column name -> dtype: the record fields, with `inputs` split per field
+COLUMNS: Dict[str, np.dtype] = {}
+for _name in FEATURE_DTYPE.names:
+    if _name == "inputs":
+        COLUMNS.update((field, np.dtype(np.float64)) for field in INPUT_FIELDS)
+    else:
+        COLUMNS[_name] = FEATURE_DTYPE[_name]
+COLUMNS["appended_at"] = np.dtype(np.float64)
+
+# Rows scored per vectorized pass by the what-if runner
+WHATIF_CHUNK_ROWS = 1_000_000
+
+class FeatureStore:
+    """
+    Append-only columnar store of normalized feature records
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._meta_path = self.path / "meta.json"
+        if not self._meta_path.exists():
+            with self._locked():
+                if not self._meta_path.exists():
+                    self._write_meta(0)
+        meta = json.loads(self._meta_path.read_text())
+        layout = {name: np.dtype(dtype) for name, dtype in meta["columns"].items()}
+        if layout != COLUMNS:
+            raise ValueError(f"{self.path} was written with a different column layout")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self.path / ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write_meta(self, rows: int) -> None:
+        meta = {"rows": rows, "columns": {name: dtype.str for name, dtype in COLUMNS.items()}}
+        tmp = self._meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self._meta_path)
+
+    def __len__(self) -> int:
+        return json.loads(self._meta_path.read_text())["rows"]
+
+    def append(self, records: np.ndarray, appended_at: Optional[float] = None) -> int:
+        """
+        Append FEATURE_DTYPE records; returns the new row count
+        """
+        if records.dtype != FEATURE_DTYPE:
+            raise ValueError("records must have app.features.FEATURE_DTYPE")
+        appended_at = time.time() if appended_at is None else appended_at
+        with self._locked():
+            rows = len(self)
+            if len(records) == 0:
+                return rows
+            for name, dtype in COLUMNS.items():
+                if name in INPUT_FIELDS:
+                    values = records["inputs"][:, INPUT_FIELDS.index(name)]
+                elif name == "appended_at":
+                    values = np.full(len(records), appended_at)
+                else:
+                    values = records[name]
+                with open(self.path / f"{name}.bin", "ab+") as f:
+                    # Drop bytes left behind by an interrupted append
+                    f.truncate(rows * dtype.itemsize)
+                    f.seek(0, os.SEEK_END)
+                    f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+            rows += len(records)
+            self._write_meta(rows)
+        return rows
+
+    def column(self, name: str, rows: Optional[int] = None) -> np.ndarray:
+        """
+        Memory-map one column (read-only)
+        """
+        dtype = COLUMNS[name]
+        rows = len(self) if rows is None else rows
+        if rows == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.path / f"{name}.bin", dtype=dtype, mode="r", shape=(rows,))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Every column, mapped at one consistent row count
+        """
+        rows = len(self)
+        return {name: self.column(name, rows) for name in COLUMNS}
+
+class BufferedAppender:
+    """
+    Collects records from request handlers and appends them to a store from
+    a background thread, so a request never waits on the store's file lock
+    """
+
+    def __init__(self, store: FeatureStore, flush_seconds: float = 1.0, max_buffer: int = 100_000):
+        self.store = store
+        self.flush_seconds = flush_seconds
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self.failures = 0
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def add(self, records: np.ndarray) -> None:
+        with self._lock:
+            if self._buffered >= self.max_buffer:
+                # The store is not keeping up; shed rather than grow without bound
+                self.dropped += len(records)
+                return
+            self._buffer.append(records)
+            self._buffered += len(records)
+
+    def add_requests(self, requests) -> None:
+        """
+        Normalize and buffer scored requests; requests that cannot be stored
+        (an id longer than ID_BYTES, an invalid lazily validated asset) are
+        counted as dropped rather than failing the request
+        """
+        try:
+            records = normalize_requests(requests)
+        except ValueError:
+            self.dropped += len(requests)
+            return
+        self.add(records)
+
+    def flush(self) -> None:
+        """
+        Append the buffered records; when the append fails they are put back
+        in front of the buffer (beyond max_buffer, counted as dropped) and
+        the error is raised
+        """
+        with self._lock:
+            buffer, self._buffer, self._buffered = self._buffer, [], 0
+        if not buffer:
+            return
+        try:
+            self.store.append(np.concatenate(buffer))
+        except Exception:
+            self._restore(buffer)
+            raise
+
+    def _restore(self, buffer: List[np.ndarray]) -> None:
+        with self._lock:
+            self.failures += 1
+            kept, room = [], self.max_buffer - self._buffered
+            for records in buffer:
+                if len(records) > room:
+                    self.dropped += len(records)
+                    continue
+                kept.append(records)
+                room -= len(records)
+            self._buffer = kept + self._buffer
+            self._buffered += sum(len(records) for records in kept)
+
+    def start(self) -> None:
+        if self._flusher is None:
+            self._stopped.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="feature-store-flush", daemon=True)
+            self._flusher.start()
+
+    def stop(self) -> None:
+        if self._flusher is not None:
+            self._stopped.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception:
+                # Kept buffered for the next flush; the thread must not die
+                logger.exception("feature store append failed")
+
+def create_appender() -> Optional[BufferedAppender]:
+    """
+    Appender for the store configured by CREDIT_FEATURE_STORE_PATH (None when unset)
+    """
+    if not settings.feature_store_path:
+        return None
+    return BufferedAppender(FeatureStore(settings.feature_store_path), settings.feature_store_flush_seconds)
+
+feature_store = create_appender()
+
+# What-if analysis
+
+def _histogram(counts: np.ndarray, low: int) -> Dict[str, int]:
+    return {str(low + i): int(n) for i, n in enumerate(counts.tolist()) if n}
+
+def what_if(store: FeatureStore, rules: CompiledRules, baseline: CompiledRules = DEFAULT_RULES,
+            chunk_rows: int = WHATIF_CHUNK_ROWS, changes=None) -> Dict[str, Any]:
+    """
+    Re-score every row with `baseline` and `rules`; returns counts, score
+    histograms for both, the histogram of score deltas and summary statistics
+
+    With `changes` (a binary file object), one NDJSON line is written per
+    row whose score or error differs.
+    """
+    columns = store.columns()
+    rows = len(columns["error"])
+    baseline_counts = np.zeros(101, dtype=np.int64)
+    candidate_counts = np.zeros(101, dtype=np.int64)
+    delta_counts = np.zeros(201, dtype=np.int64)
+    totals = {"rows": rows, "scored": 0, "errors": 0, "changed": 0, "increased": 0, "decreased": 0,
+              "newly_rejected": 0, "newly_accepted": 0}
+    delta_sum = 0
+
+    for start in range(0, rows, chunk_rows):
+        stop = min(rows, start + chunk_rows)
+        matrix = ColumnMatrix([columns[name][start:stop] for name in INPUT_FIELDS])
+        rejected = columns["error"][start:stop] != 0
+        before, before_errors = baseline.score_matrix(matrix)
+        after, after_errors = rules.score_matrix(matrix)
+        before_bad = rejected.copy()
+        after_bad = rejected.copy()
+        before_bad[list(before_errors)] = True
+        after_bad[list(after_errors)] = True
+
+        both = ~before_bad & ~after_bad
+        before_ok, after_ok = before[both], after[both]
+        delta = after_ok - before_ok
+        baseline_counts += np.bincount(np.clip(before[~before_bad], 0, 100), minlength=101)
+        candidate_counts += np.bincount(np.clip(after[~after_bad], 0, 100), minlength=101)
+        delta_counts += np.bincount(np.clip(delta, -100, 100) + 100, minlength=201)
+        delta_sum += int(delta.sum())
+        totals["scored"] += int(both.sum())
+        totals["errors"] += int((before_bad & after_bad).sum())
+        totals["increased"] += int((delta > 0).sum())
+        totals["decreased"] += int((delta < 0).sum())
+        totals["newly_rejected"] += int((~before_bad & after_bad).sum())
+        totals["newly_accepted"] += int((before_bad & ~after_bad).sum())
+
+        changed = np.flatnonzero((before != after) & both | (before_bad != after_bad))
+        totals["changed"] += len(changed)
+        if changes is not None:
+            for i in changed.tolist():
+                changes.write(json.dumps({
+                    "user_id": columns["user_id"][start + i].decode(),
+                    "loan_id": columns["loan_id"][start + i].decode(),
+                    "before": None if before_bad[i] else int(before[i]),
+                    "after": None if after_bad[i] else int(after[i]),
+                }).encode() + b"\n")
+
+    return {
+        "baseline_rules": baseline.version,
+        "rules": rules.version,
+        **totals,
+        "mean_delta": delta_sum / totals["scored"] if totals["scored"] else 0.0,
+        "baseline_histogram": _histogram(baseline_counts, 0),
+        "histogram": _histogram(candidate_counts, 0),
+        "delta_histogram": _histogram(delta_counts, -100),
+    }
+
+def import_file(store: FeatureStore, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Append the requests of an NDJSON file, or the records of a .frec file
+    """
+    counts = {"appended": 0, "skipped": 0}
+    if path.endswith(".frec"):
+        records = read_records(path)
+        for start in range(0, len(records), WHATIF_CHUNK_ROWS):
+            chunk = np.asarray(records[start:start + WHATIF_CHUNK_ROWS])
+            store.append(chunk)
+            counts["appended"] += len(chunk)
+        return counts
+    with (sys.stdin.buffer if path == "-" else open(path, "rb")) as f:
+        for chunk, _ in iter_chunks(f, chunk_size):
+            requests, failures = parse_lines(chunk)
+            store.append(normalize_requests(requests))
+            counts["appended"] += len(requests)
+            counts["skipped"] += len(failures)
+    return counts
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.store", description="Columnar feature store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="append an NDJSON request file or a .frec record file")
+    importer.add_argument("store", help="store directory (created if needed)")
+    importer.add_argument("input", help="input .jsonl or .frec file, or - for NDJSON on stdin")
+    importer.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    whatif = commands.add_parser("whatif", help="re-score the store against alternate rules")
+    whatif.add_argument("store", help="store directory")
+    whatif.add_argument("--rules", required=True, help="alternate rule definition (JSON or YAML)")
+    whatif.add_argument("--baseline", help="rule definition to compare against (default: the active rules)")
+    whatif.add_argument("--changes", help="write the rows whose score changes to this NDJSON file")
+    whatif.add_argument("--output", help="write the JSON report here instead of stdout")
+
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    store = FeatureStore(args.store)
+
+    if args.command == "import":
+        counts = import_file(store, args.input, args.chunk_size)
+        print(
+            f"appended {counts['appended']} rows, skipped {counts['skipped']} invalid lines "
+            f"in {time.perf_counter() - start:.2f}s ({len(store)} rows in store)",
+            file=sys.stderr,
+        )
+        return 0
+
+    rules = load_rules(args.rules)
+    baseline = load_rules(args.baseline) if args.baseline else DEFAULT_RULES
+    changes = open(args.changes, "wb") if args.changes else None
+    try:
+        report = what_if(store, rules, baseline, changes=changes)
+    finally:
+        if changes is not None:
+            changes.close()
+    report["elapsed_s"] = round(time.perf_counter() - start, 3)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Warmup and readiness of a serving worker
+
+A fresh worker pays for first use on its first requests: pydantic builds its
+validators' caches, NumPy initializes its ufunc machinery, the JSON codecs
+load, and the generated scorers, the fast-path checker and the multi-source
+engine run for the first time. `warm_up()` exercises every scoring path once
+on a built-in payload so that cost is paid before traffic arrives.
+
+`Readiness` runs the warmup in a background thread at startup. The worker is
+live (`/health/live`) as soon as it answers at all, but only ready
+(`/health/ready`) once the warmup has finished, and no longer ready once it
+starts shutting down, so a load balancer or platform health check only sends
+traffic to workers that will answer at full speed.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.batch import score_requests
+from app.fastpath import dumps, loads, parse_fast
+from app.models import CreditAnalysisRequest, CreditResponse, MultiSourceRequest, ScoringRequest
+from app.rules import DEFAULT_RULES, extract_row
+from app.sources import source_engine
+
+WARMUP_ASSET = {
+    "asset_type": "car",
+    "asset_count": 1,
+    "asset_category": "Transport",
+    "condition_score": 5.7,
+    "estimated_value": 2509.03,
+    "gps_coordinates": None,
+    "device_model": "Galaxy S25",
+    "timestamp": "2025-07-26T14:29:18",
+    "camera_make": "samsung",
+    "camera_model": "Galaxy S25",
+    "image_source": "warmup.jpg",
+    "detection_confidence": 0.93,
+    "exif_verified": True,
+}
+
+WARMUP_PAYLOAD = {
+    "message": "warmup",
+    "batch_id": "warmup",
+    "user_id": "warmup",
+    "status": "completed",
+    "total_files": 1,
+    "estimated_completion_time": "Completed",
+    "status_check_url": "",
+    "loan_id": "warmup",
+    "analysis_result": {
+        "batch_id": "warmup",
+        "loan_id": "warmup",
+        "analysis_timestamp": "2025-09-04T13:41:10.738326",
+        "total_images_processed": 1,
+        "total_assets_detected": 1,
+        "credit_features": {
+            "total_asset_value": 2509.03,
+            "asset_diversity_score": 1,
+            "asset_categories": {"Transport": 1},
+            "has_transport_asset": True,
+            "has_electronics_asset": False,
+            "has_livestock_asset": False,
+            "has_property_asset": False,
+            "has_high_value_assets": True,
+            "high_value_asset_count": 1,
+            "average_asset_condition": 5.7,
+            "location_stability_score": 10,
+            "primary_device_model": "Galaxy S25",
+            "primary_device_tier_score": 50,
+            "unique_devices_count": 1,
+            "asset_to_device_ratio": 50.18,
+            "image_span_days": 0,
+            "images_per_day": 1,
+            "has_recent_images": False,
+            "asset_concentration_score": 100,
+            "average_detection_confidence": 0.93,
+        },
+        "detected_assets": [WARMUP_ASSET],
+        "summary": {
+            "unique_asset_types": 1,
+            "asset_categories_found": ["Transport"],
+            "total_estimated_value": 2509.03,
+            "has_location_data": False,
+            "devices_detected": ["Galaxy S25"],
+            "exif_verification_rate": "100.0%",
+            "authenticity_verification": {
+                "images_with_exif": 1,
+                "images_without_exif": 0,
+                "evaluation_policy": "",
+                "note": "",
+            },
+        },
+    },
+}
+
+def warm_up() -> int:
+    """
+    Run every scoring path once on WARMUP_PAYLOAD, without recording metrics
+    Returns the credit score, so a broken scorer fails the warmup
+    """
+    payload = loads(dumps(WARMUP_PAYLOAD))
+    request = ScoringRequest.parse_obj(payload)
+    row = extract_row(request)
+    credit_score = DEFAULT_RULES.score(row)
+    DEFAULT_RULES.score_components(row)
+    DEFAULT_RULES.explain(row).components()
+    if parse_fast(payload) is None:
+        raise RuntimeError("warmup payload did not take the fast path")
+    batch = score_requests([request, request])
+    if batch[0].credit_score != credit_score:
+        raise RuntimeError("batch and single-request scores disagree on the warmup payload")
+    multi = MultiSourceRequest(user_id="warmup", loan_id="warmup", assets=CreditAnalysisRequest.parse_obj(payload))
+    source_engine.evaluate_batch([multi, multi])
+    source_engine.evaluate(multi)
+    dumps(CreditResponse(user_id="warmup", loan_id="warmup", credit_score=credit_score).dict())
+    return credit_score
+
+class Readiness:
+    """
+    Whether this worker has warmed up and is not shutting down
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.ready = False
+        self.stopping = False
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, warmup: bool = True) -> None:
+        """
+        Warm up in a background thread (so liveness answers meanwhile)
+        """
+        self.stopping = False
+        self.error = None
+        if not warmup:
+            self.ready = True
+            return
+        self._thread = threading.Thread(target=self._warm_up, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _warm_up(self) -> None:
+        start = time.perf_counter()
+        try:
+            warm_up()
+        except Exception as e:
+            # A worker that cannot score must never report ready
+            self.error = f"{type(e).__name__}: {e}"
+            return
+        self.warmup_seconds = time.perf_counter() - start
+        self.ready = True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def stop(self) -> None:
+        self.stopping = True
+
+    def status(self) -> Dict[str, Any]:
+        if self.stopping:
+            state = "stopping"
+        elif self.ready:
+            state = "ready"
+        elif self.error is not None:
+            state = "failed"
+        else:
+            state = "starting"
+        status = {"status": state, "uptime_seconds": round(time.time() - self.started_at, 3)}
+        if self.warmup_seconds is not None:
+            status["warmup_seconds"] = round(self.warmup_seconds, 4)
+        if self.error is not None:
+            status["error"] = self.error
+        return status
+
+    @property
+    def serving(self) -> bool:
+        return self.ready and not self.stopping
+
+readiness = Readiness()
@@ -0,0 +1,61 @@
+"""
+Audit log throughput: request-path cost, writer throughput and query scans
+
+    python -m benchmarks.bench_audit [--records 1000000] [--segment-mb 64]
+
+In a temporary directory: times `AuditLog.add` (all a request handler pays),
+the background writer turning the queued entries into records on disk
+(hashing, component points, fsync per flush), and `query` finding one
+loan_id among every record across the segments. Prints one JSON line.
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from app.audit import AUDIT_DTYPE, AuditLog, query, segments
+from app.models import CreditAnalysisRequest
+from app.rules import DEFAULT_RULES, extract_row
+from benchmarks.payloads import random_payloads
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--segment-mb", type=int, default=64)
+    parser.add_argument("--flush-every", type=int, default=10000, help="records per writer flush")
+    args = parser.parse_args()
+
+    rows = [extract_row(CreditAnalysisRequest.parse_obj(p)) for p in random_payloads(1000, seed=5)]
+    scores = [DEFAULT_RULES.score(row) for row in rows]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(tmp, segment_bytes=args.segment_mb << 20, max_buffer=args.records + 1)
+        add_s = write_s = 0.0
+        for start in range(0, args.records, args.flush_every):
+            stop = min(args.records, start + args.flush_every)
+            began = time.perf_counter()
+            for i in range(start, stop):
+                log.add(str(i), f"loan-{i}", rows[i % 1000], scores[i % 1000])
+            added = time.perf_counter()
+            log.flush()
+            add_s += added - began
+            write_s += time.perf_counter() - added
+        log.stop()
+
+        began = time.perf_counter()
+        found = list(query(tmp, loan_id=f"loan-{args.records // 2}"))
+        query_s = time.perf_counter() - began
+        assert len(found) == 1 and found[0]["valid"]
+
+        print(json.dumps({
+            "records": args.records,
+            "record_bytes": AUDIT_DTYPE.itemsize,
+            "segments": len(segments(tmp)),
+            "add_ns_per_record": round(add_s / args.records * 1e9),
+            "writer_records_per_s": round(args.records / write_s),
+            "query_ms": round(query_s * 1e3, 1),
+            "scanned_records_per_s": round(args.records / query_s),
+        }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Bytes on the wire and latency of the MessagePack interface against JSON
+
+    python -m benchmarks.bench_binary [--requests 2000] [--stream-requests 20000]
+
+For requests of 1, 10 and 100 assets: the request and response sizes as JSON
+and MessagePack, the cost of decoding a request body with orjson and with
+msgpack, and the latency of /evaluate_credit/fast against /internal/score,
+sent one at a time through the ASGI app in-process (no network). Then the
+throughput of /evaluate_credit/stream against /internal/score/stream for
+one body of `--stream-requests` requests. Prints one JSON line per case.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import timeit
+
+import httpx
+import msgpack
+import orjson
+
+from app.main import app
+from benchmarks.payloads import make_payload, synthetic_payloads
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def _decode_us(decode, body: bytes) -> float:
+    timer = timeit.Timer(lambda: decode(body))
+    number, _ = timer.autorange()
+    return round(min(timer.repeat(3, number)) / number * 1e6, 2)
+
+async def _measure(client: httpx.AsyncClient, path: str, body: bytes, content_type: str, requests: int):
+    headers = {"content-type": content_type}
+    for _ in range(min(50, requests)):
+        await client.post(path, content=body, headers=headers)
+
+    samples = []
+    response = None
+    start = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        response = await client.post(path, content=body, headers=headers)
+        samples.append(time.perf_counter() - t0)
+        assert response.status_code == 200, response.content
+    elapsed = time.perf_counter() - start
+    return {
+        "response_bytes": len(response.content),
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 3),
+        "rps": round(requests / elapsed, 1),
+    }
+
+async def _stream(client: httpx.AsyncClient, path: str, body: bytes, content_type: str, count: int):
+    start = time.perf_counter()
+    response = await client.post(path, content=body, headers={"content-type": content_type})
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200
+    return {
+        "path": path,
+        "requests": count,
+        "request_bytes": len(body),
+        "response_bytes": len(response.content),
+        "requests_per_s": round(count / elapsed),
+    }
+
+async def run(requests: int, stream_requests: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for n_assets in (1, 10, 100):
+            payload = make_payload(n_assets)
+            json_body, msgpack_body = orjson.dumps(payload), msgpack.packb(payload)
+            cases = (
+                ("/evaluate_credit/fast", json_body, "application/json", orjson.loads),
+                ("/internal/score", msgpack_body, "application/msgpack", msgpack.unpackb),
+            )
+            for path, body, content_type, decode in cases:
+                result = await _measure(client, path, body, content_type, requests)
+                print(json.dumps({
+                    "path": path,
+                    "assets": n_assets,
+                    "request_bytes": len(body),
+                    "decode_us": _decode_us(decode, body),
+                    **result,
+                }))
+
+        payloads = synthetic_payloads(stream_requests, seed=3)
+        ndjson = b"".join(orjson.dumps(payload) + b"\n" for payload in payloads)
+        packed = b"".join(msgpack.packb(payload) for payload in payloads)
+        print(json.dumps(await _stream(client, "/evaluate_credit/stream", ndjson, "application/x-ndjson", stream_requests)))
+        print(json.dumps(await _stream(client, "/internal/score/stream", packed, "application/msgpack", stream_requests)))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--stream-requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.stream_requests))
+
+if __name__ == "__main__":
+    main()
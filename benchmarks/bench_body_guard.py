@@ -0,0 +1,157 @@
+"""
+Worker memory under adversarial request bodies, with and without the body guard
+
+    python -m benchmarks.bench_body_guard [--sizes 1,4,16] [--chunk 65536]
+
+Sends /evaluate_credit bodies of each `--sizes` megabytes, generated lazily
+and delivered in `--chunk`-byte pieces without a Content-Length (as a client
+streaming a chunked upload would), straight to the ASGI app in process:
+
+- assets: one request with as many detected assets as fit
+- padding: one detected asset and an oversized user_id string
+- deep: gps_coordinates nested as deep as the size allows
+
+For each it reports the status, the time to answer and the peak of Python
+memory allocated while the request was handled (tracemalloc). The cases run
+twice, in child interpreters (settings are read at import): with the limits
+from the environment, and unguarded (every CREDIT_MAX_* limit 0). With the
+guard the peak stays bounded by CREDIT_MAX_BODY_BYTES whatever the size;
+without it, it grows with the payload. Prints one JSON line per case.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator
+
+import orjson
+
+# The score cache would keep the oversized bodies around
+os.environ.setdefault("CREDIT_CACHE_BACKEND", "none")
+
+from benchmarks.payloads import make_payload
+
+UNGUARDED = {
+    "CREDIT_MAX_BODY_BYTES": "0",
+    "CREDIT_MAX_BATCH_BODY_BYTES": "0",
+    "CREDIT_MAX_DETECTED_ASSETS": "0",
+    "CREDIT_MAX_JSON_DEPTH": "0",
+}
+
+def _rechunk(pieces: Iterator[bytes], chunk: int) -> Iterator[bytes]:
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        while len(buffer) >= chunk:
+            yield bytes(buffer[:chunk])
+            del buffer[:chunk]
+    if buffer:
+        yield bytes(buffer)
+
+def adversarial_body(kind: str, size: int, chunk: int) -> Iterator[bytes]:
+    """
+    Chunks of a JSON body of about `size` bytes, never held whole
+    """
+    payload = make_payload(1)
+    encoded = orjson.dumps(payload)
+    if kind == "assets":
+        asset = orjson.dumps(payload["analysis_result"]["detected_assets"][0])
+        head, tail = encoded.split(b'"detected_assets":[' + asset + b"]")
+        count = max(1, (size - len(encoded)) // (len(asset) + 1))
+        return _rechunk(_concat([head, b'"detected_assets":[', asset], (b"," + asset for _ in range(count - 1)),
+                                [b"]", tail]), chunk)
+    if kind == "padding":
+        head, tail = encoded.split(b'"user_id":"' + payload["user_id"].encode() + b'"')
+        filler = max(1, size - len(encoded))
+        padding = (b"u" * min(chunk, filler - offset) for offset in range(0, filler, chunk))
+        return _rechunk(_concat([head, b'"user_id":"'], padding, [b'"', tail]), chunk)
+    if kind == "deep":
+        head, tail = encoded.split(b'"gps_coordinates":null')
+        # Nesting generated a chunk's worth of levels at a time
+        block = max(1, chunk // 6)
+        blocks = max(1, (size - len(encoded)) // (6 * block))
+        return _rechunk(_concat([head, b'"gps_coordinates":'], (b'{"a":' * block for _ in range(blocks)), [b"1"],
+                                (b"}" * block for _ in range(blocks)), [tail]), chunk)
+    raise ValueError(f"unknown payload kind {kind!r}")
+
+def _concat(*parts) -> Iterator[bytes]:
+    for part in parts:
+        yield from part
+
+async def send(app, body: Iterator[bytes]) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/evaluate_credit", "raw_path": b"/evaluate_credit", "query_string": b"",
+        "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+    status = 0
+    pending = next(body, b"")
+
+    async def receive():
+        nonlocal pending
+        if pending is None:
+            await asyncio.sleep(3600)
+            return {"type": "http.disconnect"}
+        chunk, pending = pending, next(body, None)
+        return {"type": "http.request", "body": chunk, "more_body": pending is not None}
+
+    async def respond(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, respond)
+    return status
+
+def measure(kind: str, megabytes: float, chunk: int) -> Dict[str, Any]:
+    from app.main import app
+
+    body = adversarial_body(kind, int(megabytes * (1 << 20)), chunk)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    began = time.perf_counter()
+    status = asyncio.run(send(app, body))
+    elapsed = time.perf_counter() - began
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "payload": kind,
+        "body_mb": megabytes,
+        "status": status,
+        "ms": round(elapsed * 1e3, 1),
+        "peak_mb": round(peak / (1 << 20), 2),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1,4,16", help="body sizes in MB, comma-separated")
+    parser.add_argument("--chunk", type=int, default=65536)
+    parser.add_argument("--kinds", default="assets,padding,deep")
+    parser.add_argument("--in-process", action="store_true", help="one run, with the limits from the environment")
+    args = parser.parse_args()
+
+    if not args.in_process:
+        argv = [sys.executable, "-m", "benchmarks.bench_body_guard", "--in-process",
+                "--sizes", args.sizes, "--chunk", str(args.chunk), "--kinds", args.kinds]
+        subprocess.run(argv, check=True)
+        subprocess.run(argv, check=True, env=dict(os.environ, **UNGUARDED))
+        return
+
+    from app.settings import settings
+
+    guard = "on" if settings.max_body_bytes else "off"
+    kinds = args.kinds.split(",")
+    # Import (and warm) the app before measuring
+    for kind in kinds:
+        measure(kind, 0.1, args.chunk)
+    for kind in kinds:
+        for megabytes in (float(size) for size in args.sizes.split(",")):
+            print(json.dumps({"guard": guard, **measure(kind, megabytes, args.chunk)}), flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measure offline bulk scoring throughput in-process and with 1..N worker processes
+
+    python -m benchmarks.bench_bulk [records] [max_workers]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app.bulk import score_file, score_file_parallel
+from benchmarks.payloads import random_payloads
+
+def write_input(path: str, records: int) -> None:
+    template = random_payloads(1000, seed=3)
+    with open(path, "w") as f:
+        for i in range(records):
+            f.write(json.dumps(template[i % len(template)]) + "\n")
+
+def run(records: int = 200000, max_workers: int = 0) -> None:
+    max_workers = max_workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "in.jsonl")
+        target = os.path.join(tmp, "out.jsonl")
+        write_input(source, records)
+
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            start = time.perf_counter()
+            score_file(src, dst)
+            baseline = time.perf_counter() - start
+        print(f"single process: {records / baseline:10,.0f} records/s")
+
+        workers = 1
+        while workers <= max_workers:
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                start = time.perf_counter()
+                counts = score_file_parallel(src, dst, workers=workers, chunk_size=1000)
+                elapsed = time.perf_counter() - start
+            per_worker = [s["records_per_second"] for s in counts["workers"].values()]
+            print(
+                f"{workers:3d} workers:    {records / elapsed:10,.0f} records/s "
+                f"(speedup {baseline / elapsed:5.2f}x, "
+                f"mean per worker {sum(per_worker) / len(per_worker):,.0f} records/s)"
+            )
+            workers *= 2
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 0,
+    )
@@ -0,0 +1,84 @@
+"""
+Lookup latency of the duplicate index at scale
+
+    python -m benchmarks.bench_duplicates [--assets 1000000] [--capacity 4194304]
+                                          [--lookups 20000]
+
+Fills a fresh index (in a temporary directory) with `--assets` photo and
+place keys, then times `DuplicateIndex.check` for requests of 1 and 10
+assets: new assets (misses) and assets another applicant already submitted
+(hits). Prints one JSON line per case with the p50/p99 latency per request
+and the index file size on disk (files are sparse; blocks are only
+allocated for slots in use).
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.duplicates import DuplicateIndex
+from app.models import DetectedAsset
+from benchmarks.payloads import synthetic_asset
+
+def _percentile_us(samples, q: float) -> float:
+    return round(statistics.quantiles(samples, n=100)[int(q) - 1] * 1e6, 1)
+
+def fill(index: DuplicateIndex, count: int, seed: int = 0) -> float:
+    """
+    Add `count` random keys to both tables (bypassing asset hashing); returns seconds
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    now = int(time.time())
+    for _ in range(count):
+        owner = rng.getrandbits(64) or 1
+        index.photos.add(rng.getrandbits(64) or 1, owner, now)
+        index.places.add(rng.getrandbits(64) or 1, owner, now)
+    return time.perf_counter() - start
+
+def time_checks(index: DuplicateIndex, requests, user_prefix: str):
+    samples = []
+    for i, assets in enumerate(requests):
+        start = time.perf_counter()
+        index.check(f"{user_prefix}-{i}", assets)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--assets", type=int, default=1_000_000)
+    parser.add_argument("--capacity", type=int, default=1 << 22)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = DuplicateIndex(tmp, capacity=args.capacity)
+        fill_s = fill(index, args.assets)
+        disk_bytes = sum(os.stat(os.path.join(tmp, name)).st_blocks * 512 for name in ("photos.idx", "places.idx"))
+        print(json.dumps({"assets": args.assets, "capacity": args.capacity, "fill_s": round(fill_s, 2),
+                          "keys_per_s": round(args.assets / fill_s), "disk_bytes": disk_bytes}))
+
+        for n_assets in (1, 10):
+            count = max(1, args.lookups // n_assets)
+            requests = [
+                [DetectedAsset.parse_obj(synthetic_asset(rng, j)) for j in range(n_assets)]
+                for _ in range(count)
+            ]
+            misses = time_checks(index, requests, "first")
+            hits = time_checks(index, requests, "second")
+            for case, samples in (("miss", misses), ("hit", hits)):
+                print(json.dumps({
+                    "case": case,
+                    "assets_per_request": n_assets,
+                    "requests": count,
+                    "p50_us": _percentile_us(samples, 50),
+                    "p99_us": _percentile_us(samples, 99),
+                }))
+        print(json.dumps({"stats": index.stats()}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+End-to-end throughput of /jobs: submit an NDJSON batch, poll until it has
+succeeded, download the result
+
+    python -m benchmarks.bench_jobs [--records 1000000] [--workers 0]
+                                    [--url http://127.0.0.1:8000] [--path]
+
+Writes `--records` lines (1,000 distinct boundary payloads repeated) to a
+temporary file. In-process (no --url), the file is uploaded through the ASGI
+app to a job queue in a temporary directory with `--workers` scoring
+processes. Against a running server the file is uploaded, or with `--path`
+submitted by path (it must then be under the server's CREDIT_JOBS_INPUT_DIR;
+use --input-dir to write it there). Prints one JSON line: upload seconds,
+seconds until the job succeeded, download seconds and records per second
+end to end.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+
+import httpx
+
+from benchmarks.bench_bulk import write_input
+
+async def run_job(client: httpx.AsyncClient, source: str, by_path: bool, poll_seconds: float = 0.25) -> dict:
+    start = time.perf_counter()
+    if by_path:
+        response = await client.post("/jobs", params={"path": source})
+    else:
+        async def body():
+            with open(source, "rb") as f:
+                while True:
+                    block = f.read(1 << 20)
+                    if not block:
+                        return
+                    yield block
+        response = await client.post("/jobs", content=body(), headers={"content-type": "application/x-ndjson"})
+    response.raise_for_status()
+    job = response.json()
+    submitted = time.perf_counter()
+
+    while job["status"] not in ("succeeded", "failed"):
+        await asyncio.sleep(poll_seconds)
+        job = (await client.get(job["status_url"])).json()
+    finished = time.perf_counter()
+    if job["status"] == "failed":
+        raise RuntimeError(job["error"])
+
+    size = 0
+    async with client.stream("GET", job["result_url"]) as result:
+        async for block in result.aiter_bytes():
+            size += len(block)
+    downloaded = time.perf_counter()
+    return {
+        "lines": job["lines"],
+        "scored": job["scored"],
+        "errors": job["errors"],
+        "submit_s": round(submitted - start, 3),
+        "scoring_s": round(finished - submitted, 3),
+        "download_s": round(downloaded - finished, 3),
+        "result_bytes": size,
+        "records_per_s": round(job["lines"] / (downloaded - start)),
+    }
+
+async def main_async(args: argparse.Namespace, source: str, jobs_dir: Optional[str]) -> dict:
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+            return await run_job(client, source, args.path)
+
+    from app import main
+    from app.jobs import JobQueue
+
+    main.job_queue = JobQueue(jobs_dir, workers=args.workers, chunk_size=args.chunk_size, poll_seconds=0.1)
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return await run_job(client, source, by_path=False)
+    finally:
+        main.job_queue.stop()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=0, help="scoring processes in-process (0: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--url", help="base URL of a running server (default: in-process)")
+    parser.add_argument("--path", action="store_true", help="submit by local path instead of uploading")
+    parser.add_argument("--input-dir", help="directory to write the input file to (default: a temporary one)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(os.path.abspath(args.input_dir or tmp), "bench_jobs.jsonl")
+        write_input(source, args.records)
+        input_bytes = os.path.getsize(source)
+        try:
+            result = asyncio.run(main_async(args, source, os.path.join(tmp, "jobs")))
+        finally:
+            if args.input_dir:
+                os.unlink(source)
+    print(json.dumps({"records": args.records, "workers": args.workers, "input_bytes": input_bytes, **result}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Latency and throughput of /evaluate_credit against /evaluate_credit/fast
+
+    python -m benchmarks.bench_json_path [requests]
+
+Requests are sent one at a time through the ASGI app in-process (no network),
+so the numbers isolate decoding, validation, scoring and serialization.
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.main import app
+from benchmarks.payloads import make_payload
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def _measure(client: httpx.AsyncClient, path: str, body: bytes, requests: int):
+    headers = {"content-type": "application/json"}
+    for _ in range(min(50, requests)):
+        await client.post(path, content=body, headers=headers)
+
+    samples = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        response = await client.post(path, content=body, headers=headers)
+        samples.append(time.perf_counter() - t0)
+        assert response.status_code == 200, response.text
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 3),
+        "rps": round(requests / elapsed, 1),
+    }
+
+async def main(requests: int = 2000) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for n_assets in (1, 100):
+            body = json.dumps(make_payload(n_assets)).encode()
+            for path in ("/evaluate_credit", "/evaluate_credit/fast"):
+                result = await _measure(client, path, body, requests)
+                print(json.dumps({"path": path, "assets": n_assets, **result}))
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
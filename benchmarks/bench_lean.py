@@ -0,0 +1,39 @@
+"""
+Request latency against payload size, full vs lazy detected_assets validation
+
+    python -m benchmarks.bench_lean
+
+For 1, 100 and 1000 detected assets, times decoding the JSON body, parsing it
+into CreditAnalysisRequest (every asset validated) or LeanCreditAnalysisRequest
+(assets kept raw), and scoring it.
+"""
+import json
+import statistics
+import time
+
+from app.main import calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest, LeanCreditAnalysisRequest
+from benchmarks.payloads import make_payload
+
+ASSET_COUNTS = (1, 100, 1000)
+
+def _latency_us(model, body: bytes, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        request = model.parse_obj(json.loads(body))
+        calculate_comprehensive_credit_score(request)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+def run() -> None:
+    print(f"{'assets':>7} {'body KB':>8} {'full us':>10} {'lean us':>10} {'speedup':>8}")
+    for n_assets in ASSET_COUNTS:
+        body = json.dumps(make_payload(n_assets)).encode()
+        repeat = max(20, 20000 // n_assets)
+        full = _latency_us(CreditAnalysisRequest, body, repeat)
+        lean = _latency_us(LeanCreditAnalysisRequest, body, repeat)
+        print(f"{n_assets:7d} {len(body) / 1024:8.1f} {full:10.1f} {lean:10.1f} {full / lean:7.1f}x")
+
+if __name__ == "__main__":
+    run()
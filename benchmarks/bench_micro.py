@@ -0,0 +1,60 @@
+"""
+pytest-benchmark micro-benchmarks for the scoring core and request models
+
+    python -m pytest benchmarks/bench_micro.py [--benchmark-json out.json]
+
+The file is not named test_*.py, so the regular test run does not collect it;
+pass it to pytest explicitly. Requires `pip install pytest-benchmark`.
+"""
+import json
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.batch import score_requests
+from app.fastpath import loads, parse_fast
+from app.main import calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest, LeanCreditAnalysisRequest
+from app.rules import DEFAULT_RULES, extract_row
+from benchmarks.payloads import synthetic_payloads
+
+ASSET_COUNTS = [1, 100]
+
+def _payload(n_assets):
+    return synthetic_payloads(1, asset_counts=(n_assets,))[0]
+
+@pytest.fixture(scope="module")
+def request_1():
+    return CreditAnalysisRequest.parse_obj(_payload(1))
+
+def test_calculate_comprehensive_credit_score(benchmark, request_1):
+    benchmark(calculate_comprehensive_credit_score, request_1)
+
+def test_compiled_rules_score(benchmark, request_1):
+    row = extract_row(request_1)
+    benchmark(DEFAULT_RULES.score, row)
+
+def test_compiled_rules_explain(benchmark, request_1):
+    row = extract_row(request_1)
+    benchmark(DEFAULT_RULES.explain, row)
+
+@pytest.mark.parametrize("n_assets", ASSET_COUNTS)
+def test_validate_full_model(benchmark, n_assets):
+    payload = _payload(n_assets)
+    benchmark(CreditAnalysisRequest.parse_obj, payload)
+
+@pytest.mark.parametrize("n_assets", ASSET_COUNTS)
+def test_validate_lean_model(benchmark, n_assets):
+    payload = _payload(n_assets)
+    benchmark(LeanCreditAnalysisRequest.parse_obj, payload)
+
+@pytest.mark.parametrize("n_assets", ASSET_COUNTS)
+def test_decode_and_check_fast_path(benchmark, n_assets):
+    body = json.dumps(_payload(n_assets)).encode()
+    benchmark(lambda: parse_fast(loads(body)))
+
+def test_score_batch_1000(benchmark):
+    requests = [CreditAnalysisRequest.parse_obj(p) for p in synthetic_payloads(1000, asset_counts=(1,))]
+    results = benchmark(score_requests, requests)
+    assert len(results) == 1000
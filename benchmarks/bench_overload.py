@@ -0,0 +1,91 @@
+"""
+Tail latency under overload: threadpool endpoint against the bounded async one
+
+    python -m benchmarks.bench_overload [--url http://127.0.0.1:8000] [--rate 400]
+                                        [--duration 5] [--assets 100]
+
+Offers /evaluate_credit (a plain `def` endpoint on AnyIO's 40-thread pool) and
+/evaluate_credit/async (bounded executor with admission control) the same
+open-loop load: requests arrive at `--rate` per second whether or not earlier
+ones have finished, as they do from many independent clients. Pick a rate
+above what the service can score. Prints one JSON line per endpoint with the
+latency percentiles of the requests that were scored and the share turned
+away with 503/429. Tune the async pool with CREDIT_ASYNC_* (e.g.
+CREDIT_ASYNC_MAX_QUEUE=16).
+
+In-process runs share one CPU between load generator and service; use --url
+against a uvicorn server for numbers that reflect a deployment. The score
+cache is disabled so every request does the full work.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+os.environ.setdefault("CREDIT_CACHE_BACKEND", "none")
+
+from benchmarks.loadgen import _client, run, summarize
+from benchmarks.payloads import synthetic_payloads
+
+PATHS = ("/evaluate_credit", "/evaluate_credit/async")
+
+async def offer_load(client: httpx.AsyncClient, path: str, bodies: List[bytes], rate: float, duration: float) -> Dict[str, Any]:
+    """
+    Send `rate` requests per second for `duration` seconds (open loop)
+    """
+    headers = {"content-type": "application/json"}
+    scored: List[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+
+    async def send(body: bytes) -> None:
+        t0 = time.perf_counter()
+        try:
+            response = await client.post(path, content=body, headers=headers)
+        except httpx.HTTPError as e:
+            errors[type(e).__name__] += 1
+            return
+        statuses[response.status_code] += 1
+        if response.status_code == 200:
+            scored.append(time.perf_counter() - t0)
+
+    tasks = []
+    start = time.perf_counter()
+    total = int(rate * duration)
+    for i in range(total):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(send(bodies[i % len(bodies)])))
+    await asyncio.gather(*tasks)
+    result = summarize(scored, statuses, errors, time.perf_counter() - start)
+    rejected = statuses[429] + statuses[503]
+    result["offered"] = total
+    result["rejected_share"] = round(rejected / total, 3) if total else 0.0
+    return result
+
+async def main_async(args: argparse.Namespace) -> None:
+    bodies = [json.dumps(p).encode() for p in synthetic_payloads(50, asset_counts=(args.assets,))]
+    async with _client(args.url, 1024) as client:
+        for path in PATHS:
+            await run(client, path, bodies, concurrency=4, requests=40)
+            result = await offer_load(client, path, bodies, args.rate, args.duration)
+            print(json.dumps({"path": path, "rate": args.rate, "assets": args.assets, **result}))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_overload")
+    parser.add_argument("--url", help="base URL of a running server (default: the ASGI app in-process)")
+    parser.add_argument("--rate", type=float, default=400.0, help="requests offered per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load per endpoint")
+    parser.add_argument("--assets", type=int, default=100, help="detected assets per payload")
+    asyncio.run(main_async(parser.parse_args(argv)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
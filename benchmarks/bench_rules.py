@@ -0,0 +1,195 @@
+"""
+Benchmark the compiled rule tables against the original hand-written ladders
+
+    python -m benchmarks.bench_rules [rows]
+
+branchy_credit_score is the scorer exactly as it was before the rules were
+compiled into tables; it is also used to confirm both agree on every row.
+"""
+import sys
+import time
+
+from app.models import CreditAnalysisRequest
+from app.main import calculate_comprehensive_credit_score
+from app.batch import pack_requests, score_matrix
+from benchmarks.payloads import random_payloads
+
+def branchy_credit_score(analysis_data: CreditAnalysisRequest) -> int:
+    """
+    Calculate comprehensive credit score using all available asset analysis data
+    Score breakdown (out of 100):
+    - Asset Value & Coverage (30 points)
+    - Asset Quality & Condition (20 points)
+    - Asset Diversity & Portfolio (15 points)
+    - Data Authenticity & Verification (15 points)
+    - Technology & Device Quality (10 points)
+    - Temporal & Behavioral Factors (10 points)
+    """
+    score = 0
+    credit_features = analysis_data.analysis_result.credit_features
+    summary = analysis_data.analysis_result.summary
+    
+    # Fixed loan amount for comparison
+    LOAN_AMOUNT = 100000.0
+    
+    # 1. Asset Value & Coverage (30 points)
+    asset_value_score = 0
+    coverage_ratio = credit_features.total_asset_value / LOAN_AMOUNT if LOAN_AMOUNT > 0 else 0
+    
+    if coverage_ratio >= 1.0:
+        asset_value_score = 30  # Full coverage
+    elif coverage_ratio >= 0.8:
+        asset_value_score = 25  # 80%+ coverage
+    elif coverage_ratio >= 0.6:
+        asset_value_score = 20  # 60%+ coverage
+    elif coverage_ratio >= 0.4:
+        asset_value_score = 15  # 40%+ coverage
+    elif coverage_ratio >= 0.2:
+        asset_value_score = 10  # 20%+ coverage
+    else:
+        asset_value_score = 5   # Minimal coverage
+    
+    # Bonus for high-value assets
+    if credit_features.has_high_value_assets:
+        asset_value_score += min(5, credit_features.high_value_asset_count * 2)
+    
+    score += min(30, asset_value_score)
+    
+    # 2. Asset Quality & Condition (20 points)
+    condition_score = 0
+    avg_condition = credit_features.average_asset_condition
+    
+    if avg_condition >= 8.0:
+        condition_score = 20  # Excellent condition
+    elif avg_condition >= 7.0:
+        condition_score = 17  # Very good condition
+    elif avg_condition >= 6.0:
+        condition_score = 14  # Good condition
+    elif avg_condition >= 5.0:
+        condition_score = 11  # Fair condition
+    elif avg_condition >= 4.0:
+        condition_score = 8   # Poor condition
+    else:
+        condition_score = 4   # Very poor condition
+    
+    # Detection confidence bonus
+    confidence_bonus = min(3, int(credit_features.average_detection_confidence * 3))
+    condition_score += confidence_bonus
+    
+    score += min(20, condition_score)
+    
+    # 3. Asset Diversity & Portfolio (15 points)
+    diversity_score = 0
+    
+    # Base diversity score
+    diversity_score += min(8, credit_features.asset_diversity_score * 2)
+    
+    # Category bonuses
+    category_bonuses = 0
+    if credit_features.has_transport_asset:
+        category_bonuses += 2
+    if credit_features.has_electronics_asset:
+        category_bonuses += 2
+    if credit_features.has_livestock_asset:
+        category_bonuses += 2
+    if credit_features.has_property_asset:
+        category_bonuses += 3  # Property is most valuable
+    
+    diversity_score += min(7, category_bonuses)
+    score += min(15, diversity_score)
+    
+    # 4. Data Authenticity & Verification (15 points)
+    authenticity_score = 0
+    
+    # EXIF verification rate
+    exif_rate_str = summary.exif_verification_rate.replace('%', '')
+    exif_rate = float(exif_rate_str) if exif_rate_str else 0
+    authenticity_score += int(exif_rate / 100 * 10)  # Up to 10 points for 100% EXIF
+    
+    # Multiple images and processing
+    if analysis_data.analysis_result.total_images_processed > 1:
+        authenticity_score += 2
+    if analysis_data.analysis_result.total_assets_detected > 1:
+        authenticity_score += 2
+    
+    # Location stability
+    location_bonus = min(1, credit_features.location_stability_score / 10)
+    authenticity_score += location_bonus
+    
+    score += min(15, authenticity_score)
+    
+    # 5. Technology & Device Quality (10 points)
+    tech_score = 0
+    
+    # Device tier score
+    device_tier_bonus = min(6, credit_features.primary_device_tier_score * 1.5)
+    tech_score += device_tier_bonus
+    
+    # Asset to device ratio (indicates ownership patterns)
+    if credit_features.asset_to_device_ratio > 2.0:
+        tech_score += 2  # High asset-to-device ratio is positive
+    elif credit_features.asset_to_device_ratio > 1.0:
+        tech_score += 1
+    
+    # Multiple unique devices
+    if credit_features.unique_devices_count > 1:
+        tech_score += 2
+    
+    score += min(10, tech_score)
+    
+    # 6. Temporal & Behavioral Factors (10 points)
+    temporal_score = 0
+    
+    # Recent images indicate active engagement
+    if credit_features.has_recent_images:
+        temporal_score += 3
+    
+    # Asset concentration (focused vs scattered approach)
+    if credit_features.asset_concentration_score >= 80:
+        temporal_score += 2  # Focused asset strategy
+    
+    # Image frequency patterns
+    if credit_features.images_per_day >= 1:
+        temporal_score += 2
+    
+    # Image span indicates documentation consistency
+    if credit_features.image_span_days > 0:
+        temporal_score += min(3, credit_features.image_span_days / 10)
+    
+    score += min(10, temporal_score)
+    
+    # Final adjustments and caps
+    final_score = min(100, max(0, score))
+    
+    return int(final_score)
+
+def _time(fn, requests) -> float:
+    start = time.perf_counter()
+    for request in requests:
+        fn(request)
+    return time.perf_counter() - start
+
+def run(rows: int = 50000) -> None:
+    requests = [CreditAnalysisRequest.parse_obj(p) for p in random_payloads(rows, seed=11)]
+
+    mismatches = sum(
+        1 for request in requests
+        if branchy_credit_score(request) != calculate_comprehensive_credit_score(request)
+    )
+
+    branchy = min(_time(branchy_credit_score, requests) for _ in range(3))
+    compiled = min(_time(calculate_comprehensive_credit_score, requests) for _ in range(3))
+
+    start = time.perf_counter()
+    matrix, errors = pack_requests(requests)
+    score_matrix(matrix, errors)
+    vectorized = time.perf_counter() - start
+
+    print(f"rows:                 {rows}")
+    print(f"mismatches:           {mismatches}")
+    print(f"branchy (original):   {branchy / rows * 1e6:6.2f} us/row")
+    print(f"compiled tables:      {compiled / rows * 1e6:6.2f} us/row")
+    print(f"compiled, vectorized: {vectorized / rows * 1e6:6.2f} us/row (including packing)")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
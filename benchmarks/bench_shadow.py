@@ -0,0 +1,106 @@
+"""
+Overhead of shadow scoring on the request path and throughput of the worker
+
+    python -m benchmarks.bench_shadow [--rows 100000] [--candidates 1,4] [--requests 3000]
+
+Times `ShadowScorer.add` (all a request handler pays) and the worker
+comparing queued rows with 1 and 4 candidate versions. Then sends requests
+one at a time to /evaluate_credit/fast in-process, without shadow scoring
+and with the worker running at its default CPU budget, and reports p50/p99
+latency and how much shadow work was dropped. Prints one JSON line per case.
+"""
+import argparse
+import asyncio
+import copy
+import json
+import statistics
+import time
+
+import httpx
+
+from app import main
+from app.models import CreditAnalysisRequest
+from app.rules import DEFAULT_RULES, compile_rules, extract_row
+from app.shadow import ShadowScorer
+from benchmarks.payloads import random_payloads
+
+def candidates(count: int):
+    rules = []
+    for i in range(count):
+        definition = copy.deepcopy(DEFAULT_RULES.definition)
+        definition["version"] = f"candidate-{i}"
+        definition["components"][0]["max_points"] = 30 - i
+        rules.append(compile_rules(definition))
+    return rules
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def _latency(bodies, requests: int):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        samples = []
+        for i in range(requests):
+            t0 = time.perf_counter()
+            response = await client.post("/evaluate_credit/fast", content=bodies[i % len(bodies)])
+            samples.append(time.perf_counter() - t0)
+            assert response.status_code == 200
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 3),
+    }
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--candidates", default="1,4")
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    payloads = random_payloads(1000, seed=7)
+    rows = [extract_row(CreditAnalysisRequest.parse_obj(p)) for p in payloads]
+    scores = [DEFAULT_RULES.score(row) for row in rows]
+
+    for count in (int(n) for n in args.candidates.split(",")):
+        shadow = ShadowScorer(candidates(count), budget=1.0, max_queue=args.rows)
+        began = time.perf_counter()
+        for i in range(args.rows):
+            shadow.add(rows[i % 1000], scores[i % 1000])
+        add_s = time.perf_counter() - began
+        shadow._tokens = float("inf")
+        began = time.perf_counter()
+        shadow.process()
+        process_s = time.perf_counter() - began
+        print(json.dumps({
+            "candidates": count,
+            "rows": args.rows,
+            "add_ns_per_score": round(add_s / args.rows * 1e9),
+            "worker_rows_per_s": round(args.rows / process_s),
+        }))
+
+    # The score cache would turn repeated bodies into cache hits
+    main.score_cache = None
+    bodies = [json.dumps(p).encode() for p in payloads]
+    print(json.dumps({"shadow": "off", **asyncio.run(_latency(bodies, args.requests))}))
+    shadow = ShadowScorer(candidates(4))
+    main.shadow_scorer = shadow
+    shadow.start()
+    began = time.perf_counter()
+    result = asyncio.run(_latency(bodies, args.requests))
+    elapsed = time.perf_counter() - began
+    shadow.stop()
+    busy_s = shadow.busy_seconds
+    shadow.process()
+    report = shadow.report()
+    print(json.dumps({
+        "shadow": "on",
+        "candidates": 4,
+        **result,
+        "compared": report["processed"],
+        "dropped": report["dropped_over_budget"] + report["dropped_queue_full"],
+        "worker_cpu_fraction": round(busy_s / elapsed, 4),
+    }))
+
+if __name__ == "__main__":
+    main_()
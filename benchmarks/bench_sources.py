@@ -0,0 +1,65 @@
+"""
+Multi-source scoring latency as sources are added
+
+    python -m benchmarks.bench_sources [--requests 2000] [--batch 10000]
+
+For 1 to 4 sources present (assets, then bank, M-Pesa and call logs), times
+one request end to end through /evaluate_credit/multi (in-process
+TestClient), the engine alone on a parsed request, and the batch engine per
+request. Prints one JSON line per source count.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import MultiSourceRequest
+from app.sources import source_engine
+from benchmarks.payloads import random_multi_source_payloads
+
+SOURCES = ("assets", "bank", "mpesa", "call_logs")
+
+def _median_us(samples) -> float:
+    return round(statistics.median(samples) * 1e6, 1)
+
+def run(n_requests: int, batch_size: int) -> None:
+    client = TestClient(app)
+    for n_sources in range(1, len(SOURCES) + 1):
+        payloads = random_multi_source_payloads(max(n_requests, batch_size), seed=n_sources, sources=SOURCES[:n_sources])
+        requests = [MultiSourceRequest.parse_obj(p) for p in payloads]
+
+        http = []
+        for payload in payloads[:n_requests]:
+            start = time.perf_counter()
+            client.post("/evaluate_credit/multi", json=payload)
+            http.append(time.perf_counter() - start)
+
+        engine = []
+        for request in requests[:n_requests]:
+            start = time.perf_counter()
+            source_engine.evaluate(request)
+            engine.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        source_engine.evaluate_batch(requests[:batch_size])
+        batch_us = (time.perf_counter() - start) / batch_size * 1e6
+
+        print(json.dumps({
+            "sources": n_sources,
+            "http_median_us": _median_us(http),
+            "engine_median_us": _median_us(engine),
+            "batch_us_per_request": round(batch_us, 2),
+        }))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+    run(args.requests, args.batch)
+
+if __name__ == "__main__":
+    main()
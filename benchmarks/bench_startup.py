@@ -0,0 +1,121 @@
+"""
+Cold-start cost: import time of the app and time until a served worker is ready
+
+    python -m benchmarks.bench_startup [--runs 5] [--workers 1]
+                                       [--max-import-s 2.0] [--max-ready-s 10.0]
+
+Import: in `--runs` fresh interpreters, times `import app.main` (interpreter
+start excluded) and lists the slowest modules by self time (python -X
+importtime). Startup: launches `python -m app.serve` on a free port and times
+until /health/live and /health/ready answer 200 and the first
+/evaluate_credit request returns. Prints one JSON line; exits 1 when a median
+exceeds its --max-* budget, so a cold-start regression fails the run.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.payloads import make_payload
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+def import_seconds(runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], check=True, capture_output=True, text=True)
+        samples.append(float(output.stdout.strip().splitlines()[-1]))
+    return samples
+
+def slowest_imports(top: int = 10) -> List[Dict[str, object]]:
+    """
+    Modules with the largest self import time (microseconds)
+    """
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], check=True, capture_output=True, text=True)
+    modules = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    modules.sort(key=lambda module: module["self_us"], reverse=True)
+    return modules[:top]
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _wait_for(client: httpx.Client, path: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{path} did not answer 200 in time")
+
+def startup_seconds(workers: int, timeout: float = 60.0) -> Dict[str, float]:
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=dict(os.environ, CREDIT_JOBS_DIR=os.environ.get("CREDIT_JOBS_DIR", "/tmp/bench_startup_jobs")),
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5.0) as client:
+            deadline = start + timeout
+            live = _wait_for(client, "/health/live", deadline)
+            ready = _wait_for(client, "/health/ready", deadline)
+            sent = time.perf_counter()
+            client.post("/evaluate_credit", json=make_payload(1)).raise_for_status()
+            first = time.perf_counter()
+        return {
+            "live_s": live - start,
+            "ready_s": ready - start,
+            "first_request_ms": (first - sent) * 1e3,
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-import-s", type=float, help="fail when the median import time exceeds this")
+    parser.add_argument("--max-ready-s", type=float, help="fail when the median time to ready exceeds this")
+    args = parser.parse_args()
+
+    imports = import_seconds(args.runs)
+    startups = [startup_seconds(args.workers) for _ in range(args.runs)]
+    result = {
+        "runs": args.runs,
+        "workers": args.workers,
+        "import_median_s": round(statistics.median(imports), 4),
+        "import_max_s": round(max(imports), 4),
+        "live_median_s": round(statistics.median(s["live_s"] for s in startups), 4),
+        "ready_median_s": round(statistics.median(s["ready_s"] for s in startups), 4),
+        "first_request_median_ms": round(statistics.median(s["first_request_ms"] for s in startups), 2),
+        "slowest_imports": slowest_imports(),
+    }
+    print(json.dumps(result))
+
+    failed = []
+    if args.max_import_s is not None and result["import_median_s"] > args.max_import_s:
+        failed.append(f"import {result['import_median_s']}s > {args.max_import_s}s")
+    if args.max_ready_s is not None and result["ready_median_s"] > args.max_ready_s:
+        failed.append(f"ready {result['ready_median_s']}s > {args.max_ready_s}s")
+    if failed:
+        sys.exit("Cold-start budget exceeded: " + "; ".join(failed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Differential check of every scoring path against the reference scorer
+
+    python -m benchmarks.differential [--count 20000] [--http 1000] [--seed 0]
+
+Every payload is scored with `calculate_comprehensive_credit_score` (the
+reference) and through each alternate path, which must give the same score:
+
+- in process: the component scorer, the explainer, the lean request model,
+  the fast-path row (`parse_fast`), `evaluate_body` (the async pool), the
+  batch engine (`score_requests`), the vectorized matrix scorer and the bulk
+  NDJSON chunk scorer (/evaluate_credit/stream, jobs, the CLI)
+- over HTTP, in process through the ASGI test client: /evaluate_credit,
+  /evaluate_credit_detailed, /evaluate_credit/fast, /evaluate_credit/async,
+  /internal/score, /evaluate_credit/batch, /evaluate_credit/stream and
+  /internal/score/stream
+
+The command line checks the rule boundary corpus and `--count` bulk payloads
+(benchmarks.payloads.bulk_features) in process, the HTTP paths on the first
+`--http` of them, and prints one JSON line; it exits with status 1 when any
+path disagrees.
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import msgpack
+import orjson
+from fastapi.testclient import TestClient
+
+from app.batch import rows_to_matrix, score_requests
+from app.bulk import score_chunk
+from app.fastpath import loads, parse_fast
+from app.main import app, calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest, LeanCreditAnalysisRequest
+from app.offload import evaluate_body
+from app.rules import DEFAULT_RULES, extract_row
+from benchmarks.payloads import boundary_payloads, bulk_features, iter_bulk_payloads
+
+class Mismatch(NamedTuple):
+    path: str
+    index: int
+    expected: int
+    got: Any
+
+def _compare(mismatches: List[Mismatch], path: str, expected: Sequence[int], got: Sequence[Any]) -> None:
+    if len(got) != len(expected):
+        mismatches.append(Mismatch(path, -1, len(expected), f"{len(got)} results"))
+        return
+    for index, (want, have) in enumerate(zip(expected, got)):
+        if want != have:
+            mismatches.append(Mismatch(path, index, want, have))
+
+def reference_scores(payloads: Sequence[Dict[str, Any]]) -> List[int]:
+    return [calculate_comprehensive_credit_score(CreditAnalysisRequest.parse_obj(p)) for p in payloads]
+
+def check_in_process(payloads: Sequence[Dict[str, Any]], expected: Optional[List[int]] = None) -> List[Mismatch]:
+    """
+    Compare the in-process scoring paths with the reference scores
+    """
+    expected = reference_scores(payloads) if expected is None else expected
+    requests = [CreditAnalysisRequest.parse_obj(p) for p in payloads]
+    rows = [extract_row(request) for request in requests]
+    bodies = [orjson.dumps(p) for p in payloads]
+    mismatches: List[Mismatch] = []
+
+    _compare(mismatches, "score_components", expected, [DEFAULT_RULES.score_components(row)[0] for row in rows])
+    _compare(mismatches, "explain", expected, [DEFAULT_RULES.explain(row).credit_score for row in rows])
+    _compare(mismatches, "lean_model", expected, [
+        calculate_comprehensive_credit_score(LeanCreditAnalysisRequest.parse_obj(p)) for p in payloads
+    ])
+    fast_rows = [parse_fast(loads(body)) for body in bodies]
+    _compare(mismatches, "parse_fast", expected, [
+        DEFAULT_RULES.score(parsed.row) if parsed is not None else "not taken" for parsed in fast_rows
+    ])
+    _compare(mismatches, "evaluate_body", expected, [evaluate_body(body)[1].get("credit_score") for body in bodies])
+    _compare(mismatches, "score_requests", expected, [result.credit_score for result in score_requests(requests)])
+    scores, errors = DEFAULT_RULES.score_matrix(rows_to_matrix(rows))
+    _compare(mismatches, "score_matrix", expected, [
+        errors.get(index, score) for index, score in enumerate(scores.tolist())
+    ])
+    _compare(mismatches, "score_chunk", expected, [
+        record.get("credit_score", record.get("error")) for record in score_chunk(list(bodies), 1)
+    ])
+    return mismatches
+
+def check_http(payloads: Sequence[Dict[str, Any]], expected: Optional[List[int]] = None,
+               client: Optional[TestClient] = None) -> List[Mismatch]:
+    """
+    Compare the HTTP endpoints (in process, through the ASGI app) with the
+    reference scores
+    """
+    expected = reference_scores(payloads) if expected is None else expected
+    client = TestClient(app) if client is None else client
+    bodies = [orjson.dumps(p) for p in payloads]
+    mismatches: List[Mismatch] = []
+
+    def score_of(response) -> Any:
+        if response.status_code != 200:
+            return f"HTTP {response.status_code}"
+        if response.headers["content-type"] == "application/msgpack":
+            return msgpack.unpackb(response.content)["credit_score"]
+        return response.json()["credit_score"]
+
+    json_headers = {"content-type": "application/json"}
+    for path in ("/evaluate_credit", "/evaluate_credit_detailed", "/evaluate_credit/fast", "/evaluate_credit/async"):
+        _compare(mismatches, path, expected, [
+            score_of(client.post(path, content=body, headers=json_headers)) for body in bodies
+        ])
+    _compare(mismatches, "/internal/score", expected, [
+        score_of(client.post("/internal/score", content=msgpack.packb(p), headers={"content-type": "application/msgpack"}))
+        for p in payloads
+    ])
+
+    batch = client.post("/evaluate_credit/batch", content=b"[" + b",".join(bodies) + b"]", headers=json_headers)
+    _compare(mismatches, "/evaluate_credit/batch", expected, [
+        result.get("credit_score", result.get("error")) for result in batch.json()
+    ])
+    stream = client.post("/evaluate_credit/stream", content=b"\n".join(bodies))
+    _compare(mismatches, "/evaluate_credit/stream", expected, [
+        record.get("credit_score", record.get("error")) for record in map(json.loads, stream.text.splitlines())
+    ])
+    packed = client.post("/internal/score/stream", content=b"".join(msgpack.packb(p) for p in payloads))
+    _compare(mismatches, "/internal/score/stream", expected, [
+        record.get("credit_score", record.get("error")) for record in _unpack_all(packed.content)
+    ])
+    return mismatches
+
+def _unpack_all(data: bytes) -> List[Dict[str, Any]]:
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(data)
+    return list(unpacker)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=20_000, help="bulk payloads checked in process")
+    parser.add_argument("--http", type=int, default=1000, help="of which checked over HTTP too")
+    parser.add_argument("--chunk", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    corpus = [payload for _, _, payload in boundary_payloads()]
+    mismatches = check_in_process(corpus) + check_http(corpus)
+    columns = bulk_features(args.count, args.seed)
+    for start in range(0, args.count, args.chunk):
+        payloads = list(iter_bulk_payloads(columns, start, min(args.count, start + args.chunk), args.seed))
+        expected = reference_scores(payloads)
+        mismatches += check_in_process(payloads, expected)
+        if start < args.http:
+            sample = min(len(payloads), args.http - start)
+            mismatches += check_http(payloads[:sample], expected[:sample])
+
+    print(json.dumps({
+        "boundary_payloads": len(corpus),
+        "bulk_payloads": args.count,
+        "http_payloads": min(args.count, args.http) + len(corpus),
+        "seconds": round(time.perf_counter() - began, 1),
+        "mismatches": len(mismatches),
+        "first_mismatches": [m._asdict() for m in mismatches[:10]],
+    }))
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
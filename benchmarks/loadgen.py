@@ -0,0 +1,156 @@
+"""
+Async load generator for the scoring API
+
+    python -m benchmarks.loadgen [--url http://127.0.0.1:8000] [--path /evaluate_credit]
+                                 [--concurrency 32] [--requests 5000 | --duration 30]
+                                 [--assets 1,10,100] [--payloads 200] [--output results.jsonl]
+
+Without --url the requests go through the ASGI app in-process (no network or
+server needed); with --url they go to a running server. `--concurrency`
+clients send requests back to back, each picking the next body from a pool of
+synthetic payloads whose detected-asset counts cycle through `--assets`.
+
+One JSON object is printed (and appended to --output when given) with the
+configuration, throughput, latency percentiles and status code counts, so
+runs from different commits can be compared.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.payloads import synthetic_payloads
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize(latencies: List[float], statuses: Counter, errors: Counter, elapsed: float) -> Dict[str, Any]:
+    """
+    Throughput and latency percentiles (milliseconds) for one run
+    """
+    ordered = sorted(latencies)
+    total = len(ordered)
+    result: Dict[str, Any] = {
+        "requests": total,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "status": {str(code): count for code, count in sorted(statuses.items())},
+        "errors": dict(errors),
+    }
+    if ordered:
+        result.update(
+            p50_ms=round(_percentile(ordered, 0.50) * 1000, 3),
+            p95_ms=round(_percentile(ordered, 0.95) * 1000, 3),
+            p99_ms=round(_percentile(ordered, 0.99) * 1000, 3),
+            max_ms=round(ordered[-1] * 1000, 3),
+        )
+    return result
+
+async def run(client: httpx.AsyncClient, path: str, bodies: List[bytes], concurrency: int,
+              requests: Optional[int] = None, duration: Optional[float] = None, warmup: int = 0) -> Dict[str, Any]:
+    """
+    Drive `path` with `concurrency` concurrent clients until `requests` have
+    been sent or `duration` seconds have passed
+    """
+    headers = {"content-type": "application/json"}
+    for i in range(warmup):
+        await client.post(path, content=bodies[i % len(bodies)], headers=headers)
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    sent = 0
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    def next_body() -> Optional[bytes]:
+        nonlocal sent
+        if requests is not None and sent >= requests:
+            return None
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+        sent += 1
+        return bodies[sent % len(bodies)]
+
+    async def worker() -> None:
+        while True:
+            body = next_body()
+            if body is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                response = await client.post(path, content=body, headers=headers)
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - t0)
+            statuses[response.status_code] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, errors, time.perf_counter() - start)
+
+def _client(url: Optional[str], concurrency: int) -> httpx.AsyncClient:
+    if url:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        return httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0)
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadgen")
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    asset_counts = [int(n) for n in args.assets.split(",")]
+    bodies = [json.dumps(p).encode() for p in synthetic_payloads(args.payloads, asset_counts, seed=args.seed)]
+    async with _client(args.url, args.concurrency) as client:
+        result = await run(
+            client, args.path, bodies, args.concurrency,
+            requests=None if args.duration else args.requests,
+            duration=args.duration, warmup=args.warmup,
+        )
+    return {
+        "target": args.url or "asgi",
+        "path": args.path,
+        "concurrency": args.concurrency,
+        "assets": asset_counts,
+        "commit": _git_commit(),
+        **result,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadgen", description="Load test the scoring API")
+    parser.add_argument("--url", help="base URL of a running server (default: the ASGI app in-process)")
+    parser.add_argument("--path", default="/evaluate_credit", help="endpoint to POST to")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=5000, help="total requests to send")
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead of --requests")
+    parser.add_argument("--assets", default="1,10,100", help="comma separated detected-asset counts to cycle through")
+    parser.add_argument("--payloads", type=int, default=200, help="distinct synthetic payloads")
+    parser.add_argument("--warmup", type=int, default=50, help="requests sent before measuring")
+    parser.add_argument("--seed", type=int, default=0, help="payload generator seed")
+    parser.add_argument("--output", help="append the JSON result to this file")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.payloads < 1:
+        parser.error("--concurrency and --payloads must be positive")
+
+    result = asyncio.run(main_async(args))
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
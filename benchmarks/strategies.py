@@ -0,0 +1,81 @@
+"""
+Hypothesis strategies for scoring request payloads (pip install hypothesis)
+
+`credit_payloads()` draws JSON-ready CreditAnalysisRequest payloads whose
+scoring inputs mix arbitrary values with the threshold boundaries of the
+rules (benchmarks.payloads.rule_boundaries), so shrinking lands on the
+values where scoring paths are most likely to disagree.
+"""
+from typing import Any, Dict
+
+from hypothesis import strategies as st
+
+from app.rules import DEFAULT_RULES, FEATURE_INPUTS, LOAN_PRODUCTS, CompiledRules
+from benchmarks.payloads import BOOLEAN_INPUTS, INTEGER_INPUTS, make_payload, rule_boundaries, set_input
+
+# Upper bound of generated magnitudes: far past every threshold, still exact
+# in a float64 for the integer inputs
+MAX_VALUE = 1e12
+
+def input_values(name: str, boundaries: Dict[str, Any]) -> st.SearchStrategy:
+    """
+    Values of one scoring input: its boundaries, or anything of its type
+    """
+    if name in BOOLEAN_INPUTS:
+        return st.booleans()
+    if name in INTEGER_INPUTS:
+        values = st.integers(min_value=-10, max_value=10**6)
+    else:
+        values = st.floats(min_value=0.0, max_value=MAX_VALUE, allow_nan=False, allow_infinity=False)
+    if name in boundaries:
+        values = st.one_of(st.sampled_from(boundaries[name]), values)
+    return values
+
+def detected_assets(max_assets: int = 3) -> st.SearchStrategy:
+    asset = st.fixed_dictionaries({
+        "asset_type": st.sampled_from(["car", "tv", "cow", "house", "laptop"]),
+        "asset_count": st.integers(min_value=1, max_value=5),
+        "asset_category": st.sampled_from(["Transport", "Electronics", "Livestock", "Property"]),
+        "condition_score": st.floats(min_value=0.0, max_value=10.0),
+        "estimated_value": st.floats(min_value=0.0, max_value=MAX_VALUE),
+        "gps_coordinates": st.none() | st.fixed_dictionaries({
+            "lat": st.floats(min_value=-90.0, max_value=90.0),
+            "lon": st.floats(min_value=-180.0, max_value=180.0),
+        }),
+        "device_model": st.text(max_size=12),
+        "timestamp": st.just("2025-07-26T14:29:18"),
+        "camera_make": st.text(max_size=12),
+        "camera_model": st.text(max_size=12),
+        "image_source": st.text(min_size=1, max_size=24),
+        "detection_confidence": st.floats(min_value=0.0, max_value=1.0),
+        "exif_verified": st.booleans(),
+    })
+    return st.lists(asset, min_size=1, max_size=max_assets)
+
+@st.composite
+def credit_payloads(draw, rules: CompiledRules = DEFAULT_RULES, max_assets: int = 3) -> Dict[str, Any]:
+    """
+    A valid request payload that every scoring endpoint accepts (at least one
+    detected asset, no negative asset value)
+    """
+    boundaries = rule_boundaries(rules)
+    payload = make_payload(0)
+    payload["user_id"] = draw(st.text(min_size=1, max_size=16))
+    payload["loan_id"] = draw(st.text(min_size=1, max_size=16))
+    payload["analysis_result"]["detected_assets"] = draw(detected_assets(max_assets))
+    for name in FEATURE_INPUTS:
+        set_input(payload, name, draw(input_values(name, boundaries)), rules)
+    rate = draw(st.floats(min_value=0.0, max_value=100.0) | st.sampled_from(boundaries.get("exif_verification_rate", [0.0])))
+    set_input(payload, "exif_verification_rate", rate, rules)
+    for name in ("total_images_processed", "total_assets_detected"):
+        set_input(payload, name, draw(input_values(name, boundaries)), rules)
+    if draw(st.booleans()):
+        # The coverage ladder, hit at its boundaries against the default amount
+        set_input(payload, "coverage_ratio", draw(input_values("coverage_ratio", boundaries)), rules)
+    else:
+        amount = draw(st.none() | st.floats(min_value=1.0, max_value=MAX_VALUE))
+        if amount is not None:
+            payload["loan_amount"] = amount
+        elif LOAN_PRODUCTS and draw(st.booleans()):
+            payload["product_code"] = draw(st.sampled_from(sorted(LOAN_PRODUCTS)))
+    return payload
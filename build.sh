@@ -8,4 +8,7 @@ echo "📦 Installing dependencies..."
 pip install --upgrade pip==23.2.1
 pip install --no-cache-dir -r requirements.txt
 
+echo "⚙️ Precompiling bytecode..."
+python -m compileall -q app
+
 echo "✅ Build completed successfully!"
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for /evaluate_credit/async and the bounded executor behind it
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.main import app
+from app.offload import BoundedExecutor, Overloaded, evaluate_body
+from benchmarks.payloads import make_payload, random_payloads
+
+client = TestClient(app)
+
+def test_async_endpoint_matches_evaluate_credit():
+    for payload in random_payloads(100, seed=4):
+        expected = client.post("/evaluate_credit/fast", json=payload)
+        response = client.post("/evaluate_credit/async", json=payload)
+        assert (response.status_code, response.json()) == (expected.status_code, expected.json())
+
+@pytest.mark.parametrize("body", [
+    b"{not json",
+    b'{"user_id": "1"}',
+])
+def test_async_endpoint_reports_validation_errors_like_fast_path(body):
+    expected = client.post("/evaluate_credit/fast", content=body)
+    response = client.post("/evaluate_credit/async", content=body)
+    assert response.status_code == expected.status_code == 422
+    assert response.json() == expected.json()
+
+def test_async_endpoint_rejects_requests_without_assets():
+    response = client.post("/evaluate_credit/async", json=make_payload(0))
+    assert response.status_code == 400
+    assert response.json() == {"detail": "No assets detected in analysis"}
+
+def test_evaluate_body_returns_component_points():
+    status, content, points = evaluate_body(b'{"user_id": 1}')
+    assert status == 422 and points is None
+    status, content, points = evaluate_body(json.dumps(make_payload(1)).encode())
+    assert status == 200 and len(points) == len(main.DEFAULT_RULES.components)
+
+def test_executor_rejects_beyond_capacity():
+    executor = BoundedExecutor("thread", workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run(release.wait, 5))
+        second = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            await executor.run(lambda: "rejected")
+        assert excinfo.value.retry_after >= 1
+        release.set()
+        return await first, await second
+
+    try:
+        assert asyncio.run(scenario()) == (True, "queued")
+    finally:
+        executor.shutdown()
+    assert executor.stats()["rejected"] == 1
+    assert executor.in_flight == 0
+
+def test_overloaded_endpoint_returns_retry_after(monkeypatch):
+    executor = BoundedExecutor("thread", workers=1, max_queue=0)
+    executor.in_flight = executor.capacity
+    monkeypatch.setattr(main, "scoring_executor", executor)
+    monkeypatch.setattr(main, "score_cache", None)
+    response = client.post("/evaluate_credit/async", json=make_payload(1))
+    assert response.status_code == main.settings.async_overload_status
+    assert int(response.headers["retry-after"]) >= 1
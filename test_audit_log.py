@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Score audit log: records carry the issued score, component points, input hash
+and rules version; segments rotate, and queries find every record of a loan
+"""
+import hashlib
+import json
+import time
+
+import msgpack
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.audit import AUDIT_DTYPE, AuditLog, encode_id, main as audit_main, query, segments
+from app.jobs import JobQueue
+from app.models import CreditAnalysisRequest
+from app.rules import DEFAULT_RULES, INPUT_FIELDS, extract_row
+from benchmarks.payloads import make_payload, random_payloads
+
+client = TestClient(main.app)
+
+def test_records_match_the_issued_scores(tmp_path):
+    log = AuditLog(tmp_path)
+    requests = [CreditAnalysisRequest.parse_obj(p) for p in random_payloads(50, seed=20)]
+    rows = [extract_row(r) for r in requests]
+    for request, row in zip(requests, rows):
+        log.add(request.user_id, request.loan_id, row, DEFAULT_RULES.score(row))
+    assert log.flush() == 50
+
+    found = list(query(tmp_path, loan_id=requests[7].loan_id))
+    assert len(found) == 1
+    record = found[0]
+    credit_score, points = DEFAULT_RULES.score_components(rows[7])
+    assert record["credit_score"] == credit_score
+    assert list(record["points"]) == [c.name for c in DEFAULT_RULES.components]
+    assert list(record["points"].values()) == [float(p) for p in points]
+    assert record["rules_version"] == DEFAULT_RULES.version
+    assert record["input_hash"] == hashlib.blake2b(np.array(rows[7], dtype=np.float64).tobytes(), digest_size=16).hexdigest()
+    assert record["valid"]
+
+def test_segments_rotate_and_queries_span_them(tmp_path):
+    payload = make_payload(1)
+    row = extract_row(CreditAnalysisRequest.parse_obj(payload))
+    log = AuditLog(tmp_path, segment_bytes=20 * AUDIT_DTYPE.itemsize)
+    for i in range(100):
+        log.add(str(i), "loan-a" if i % 10 == 0 else f"loan-{i}", row, 47)
+        if i % 7 == 0:
+            log.flush()
+    log.stop()
+    assert len(segments(tmp_path)) >= 5
+    found = list(query(tmp_path, loan_id="loan-a"))
+    assert [r["user_id"] for r in found] == [str(i) for i in range(0, 100, 10)]
+    assert len(list(query(tmp_path, user_id="3"))) == 1
+
+def test_damaged_and_partial_records(tmp_path):
+    log = AuditLog(tmp_path)
+    long_id = "x" * 200
+    log.add("u", long_id, [0.0] * len(INPUT_FIELDS), 10, [0] * 6)
+    log.add("u", "other", [0.0] * len(INPUT_FIELDS), 11, [0] * 6)
+    log.stop()
+    path = segments(tmp_path)[0]
+    assert len(encode_id(long_id)) == 64
+    with open(path, "ab") as f:
+        # A record cut short by a crash is ignored
+        f.write(b"\0" * (AUDIT_DTYPE.itemsize // 2))
+    data = bytearray(path.read_bytes())
+    data[-AUDIT_DTYPE.itemsize // 2 - 10] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert [r["valid"] for r in query(tmp_path, user_id="u")] == [True, False]
+    assert [r["credit_score"] for r in query(tmp_path, loan_id=long_id)] == [10]
+
+def test_endpoints_are_audited(tmp_path, monkeypatch, capsys):
+    log = AuditLog(tmp_path)
+    monkeypatch.setattr(main, "audit_log", log)
+    payload = make_payload(1)
+    payload["loan_id"] = "audited-loan"
+    scores = [
+        client.post("/evaluate_credit", json=payload).json()["credit_score"],
+        client.post("/evaluate_credit_detailed", json=payload).json()["credit_score"],
+        client.post("/evaluate_credit/fast", json=payload).json()["credit_score"],
+        client.post("/evaluate_credit/batch", json=[payload]).json()[0]["credit_score"],
+    ]
+    assert client.post("/evaluate_credit", json=make_payload(0)).status_code in (400, 500)
+    log.flush()
+    assert client.get("/audit/stats").json()["written"] == 4
+
+    assert audit_main(["query", str(tmp_path), "--loan-id", "audited-loan"]) == 0
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["credit_score"] for r in records] == scores
+    assert len({r["input_hash"] for r in records}) == 1
+    assert len({json.dumps(r["points"]) for r in records}) == 1
+
+def test_bulk_and_multi_source_paths_are_audited(tmp_path, monkeypatch, capsys):
+    log = AuditLog(tmp_path / "audit")
+    monkeypatch.setattr(main, "audit_log", log)
+    payload = make_payload(1)
+    payload["loan_id"] = "bulk-loan"
+    single = client.post("/evaluate_credit", json=payload).json()["credit_score"]
+    stream = json.dumps(payload) + "\n{not json}\n"
+    assert client.post("/evaluate_credit/stream", content=stream).status_code == 200
+    packed = msgpack.packb(payload) * 2
+    response = client.post("/internal/score/stream", content=packed, headers={"content-type": "application/msgpack"})
+    assert response.status_code == 200
+
+    # In the dispatcher thread and on the process pool
+    for workers in (1, 2):
+        queue = JobQueue(str(tmp_path / f"jobs-{workers}"), workers=workers, chunk_size=1, audit_log=log)
+        job_id, upload = queue.new_upload()
+        upload.write_text(stream)
+        queue.store.create(job_id, str(upload), True, len(stream))
+        queue.run(queue.store.claim(queue.owner))
+        queue.stop()
+        assert queue.get(job_id)["status"] == "succeeded"
+
+    multi = {"user_id": "1", "loan_id": "multi-loan", "assets": payload}
+    issued = client.post("/evaluate_credit/multi", json=multi).json()["credit_score"]
+    results = client.post("/evaluate_credit/multi/batch", json=[multi, {"user_id": "1", "loan_id": "none"}]).json()
+    assert results[0]["credit_score"] == issued and results[1]["credit_score"] is None
+    log.flush()
+    assert log.written == 8
+
+    assert audit_main(["query", str(tmp_path / "audit"), "--loan-id", "bulk-loan"]) == 0
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["credit_score"] for r in records] == [single] * 6
+    # Chunk rows hash and score like the row of a single request
+    assert len({r["input_hash"] for r in records}) == 1
+    assert len({json.dumps(r["points"]) for r in records}) == 1
+
+    assert audit_main(["query", str(tmp_path / "audit"), "--loan-id", "multi-loan"]) == 0
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["credit_score"] for r in records] == [issued, issued]
+    assert {r["rules_version"] for r in records} == {f"multi:{main.source_engine.version}"}
+    assert all(r["valid"] and not r["points"] for r in records)
+
+def test_failed_writes_are_retried_and_counted(tmp_path):
+    log = AuditLog(tmp_path, flush_seconds=0.01, max_buffer=3)
+    rotate = log._rotate
+    failures = iter([OSError("No space left on device")])
+
+    def failing_rotate():
+        for error in failures:
+            raise error
+        rotate()
+
+    log._rotate = failing_rotate
+    row = [0.0] * len(INPUT_FIELDS)
+    for i in range(2):
+        log.add("u", f"loan-{i}", row, 10 + i)
+    with pytest.raises(OSError):
+        log.flush()
+    # Put back in front of the queue; beyond max_buffer the newest are dropped
+    for i in range(2, 4):
+        log.add("u", f"loan-{i}", row, 10 + i)
+    assert log.stats()["queued"] == 3 and log.dropped == 1
+
+    # The writer thread survives another failure and writes on a later tick
+    failures = iter([OSError("No space left on device")])
+    log.start()
+    for _ in range(200):
+        if log.written:
+            break
+        time.sleep(0.01)
+    log.stop()
+    stats = log.stats()
+    assert (stats["written"], stats["failures"], stats["last_error"]) == (3, 2, "OSError: No space left on device")
+    assert [r["credit_score"] for r in query(tmp_path, user_id="u")] == [10, 11, 12]
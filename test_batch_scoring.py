@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Equivalence tests: the vectorized batch engine must return exactly the scores
+of the scalar calculate_comprehensive_credit_score path
+"""
+from fastapi.testclient import TestClient
+
+from app.main import app, calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest
+from app.batch import score_requests
+from benchmarks.payloads import make_payload, random_payloads
+
+client = TestClient(app)
+
+def scalar_result(request):
+    """Score through the scalar path, returning (score, error) like the batch engine"""
+    if request.analysis_result.credit_features.total_asset_value < 0:
+        return None, "Asset value cannot be negative"
+    if not request.analysis_result.detected_assets:
+        return None, "No assets detected in analysis"
+    try:
+        return calculate_comprehensive_credit_score(request), None
+    except (ValueError, OverflowError) as e:
+        return None, str(e)
+
+def assert_equivalent(payloads):
+    requests = [CreditAnalysisRequest.parse_obj(p) for p in payloads]
+    results = score_requests(requests)
+    assert len(results) == len(requests)
+    for request, result in zip(requests, results):
+        assert (result.credit_score, result.error) == scalar_result(request), request.analysis_result.credit_features
+        assert result.user_id == request.user_id
+        assert result.loan_id == request.loan_id
+
+def test_sample_payload():
+    assert_equivalent([make_payload()])
+
+def test_random_boundary_corpus():
+    assert_equivalent(random_payloads(5000, seed=7))
+
+def test_extreme_values():
+    payloads = [
+        make_payload(total_asset_value=float("inf")),
+        make_payload(total_asset_value=float("nan")),
+        make_payload(average_asset_condition=float("nan")),
+        make_payload(asset_to_device_ratio=float("nan")),
+        make_payload(average_detection_confidence=-0.5),
+        make_payload(average_detection_confidence=float("nan")),
+        make_payload(average_detection_confidence=1e308),
+        make_payload(asset_diversity_score=-10 ** 30),
+        make_payload(high_value_asset_count=10 ** 400),
+        make_payload(location_stability_score=-3, image_span_days=-10 ** 20),
+        make_payload(primary_device_tier_score=2 ** 60 + 1),
+        make_payload(total_asset_value=-1.0),
+        make_payload(n_assets=0),
+    ]
+    for rate in ["inf%", "nan%", "abc", "-50%", "1e300%"]:
+        payload = make_payload()
+        payload["analysis_result"]["summary"]["exif_verification_rate"] = rate
+        payloads.append(payload)
+    assert_equivalent(payloads)
+
+def test_empty_batch():
+    assert score_requests([]) == []
+
+def test_batch_endpoint_matches_single_endpoint():
+    payloads = random_payloads(50, seed=3) + [make_payload(total_asset_value=-5.0)]
+    response = client.post("/evaluate_credit/batch", json=payloads)
+    assert response.status_code == 200
+    results = response.json()
+    assert len(results) == len(payloads)
+
+    for payload, result in zip(payloads[:-1], results):
+        single = client.post("/evaluate_credit", json=payload).json()
+        assert result["credit_score"] == single["credit_score"]
+        assert result["error"] is None
+
+    assert results[-1]["credit_score"] is None
+    assert results[-1]["error"] == "Asset value cannot be negative"
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the MessagePack internal interface: /internal/score,
+/internal/score/stream and /internal/schema
+"""
+import asyncio
+import io
+
+import msgpack
+from fastapi.testclient import TestClient
+
+from app.main import app, calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest
+from app.binary import StreamDecodeError, aiter_message_chunks
+from benchmarks.payloads import make_payload, random_payloads
+
+client = TestClient(app)
+HEADERS = {"content-type": "application/msgpack"}
+
+def unpack_all(content: bytes):
+    return list(msgpack.Unpacker(io.BytesIO(content), raw=False))
+
+def test_unary_matches_evaluate_credit():
+    for payload in random_payloads(10, seed=21):
+        response = client.post("/internal/score", content=msgpack.packb(payload), headers=HEADERS)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == client.post("/evaluate_credit", json=payload).json()
+
+def test_unary_errors_keep_status_codes():
+    invalid = client.post("/internal/score", content=b"\xc1", headers=HEADERS)
+    assert invalid.status_code == 422
+    assert msgpack.unpackb(invalid.content)["detail"][0]["msg"].startswith("Invalid MessagePack")
+
+    schema_error = client.post("/internal/score", content=msgpack.packb({"user_id": "1"}), headers=HEADERS)
+    assert schema_error.status_code == 422
+
+    negative = make_payload(total_asset_value=-1.0)
+    rejected = client.post("/internal/score", content=msgpack.packb(negative), headers=HEADERS)
+    assert rejected.status_code == 400
+    assert msgpack.unpackb(rejected.content) == {"detail": "Asset value cannot be negative"}
+
+def test_stream_matches_evaluate_credit():
+    payloads = random_payloads(12, seed=22)
+    messages = [msgpack.packb(p) for p in payloads]
+    messages[4] = msgpack.packb({"user_id": "333", "loan_id": "3333"})
+    body = b"".join(messages)
+
+    def chunked():
+        for start in range(0, len(body), 700):
+            yield body[start:start + 700]
+
+    response = client.post("/internal/score/stream?chunk_size=3", content=chunked(), headers=HEADERS)
+    assert response.status_code == 200
+    records = unpack_all(response.content)
+    assert len(records) == len(payloads)
+    for number, (payload, record) in enumerate(zip(payloads, records), start=1):
+        if number == 5:
+            assert record["line"] == 5 and record["user_id"] == "333"
+            assert "analysis_result: field required" in record["error"]
+            continue
+        request = CreditAnalysisRequest.parse_obj(payload)
+        assert record == {
+            "user_id": request.user_id,
+            "loan_id": request.loan_id,
+            "credit_score": calculate_comprehensive_credit_score(request),
+        }
+
+def test_stream_reports_malformed_and_truncated_input():
+    good = msgpack.packb(make_payload())
+    records = unpack_all(client.post("/internal/score/stream", content=good + b"\xc1" + good).content)
+    assert [set(r) for r in records] == [{"user_id", "loan_id", "credit_score"}, {"line", "error"}]
+    assert records[1]["line"] == 2
+
+    records = unpack_all(client.post("/internal/score/stream", content=good + good[:50]).content)
+    assert records[1] == {"line": 2, "error": "Invalid MessagePack: stream ended in the middle of a message"}
+
+def test_messages_are_yielded_per_network_read():
+    async def reads():
+        yield msgpack.packb({"a": 1}) + msgpack.packb({"b": 2})[:2]
+        yield msgpack.packb({"b": 2})[2:]
+        yield b"\xc1"
+
+    async def collect():
+        chunks = []
+        try:
+            async for chunk in aiter_message_chunks(reads(), chunk_size=256):
+                chunks.append(chunk)
+        except StreamDecodeError as e:
+            return chunks, e.message_number
+        return chunks, None
+
+    chunks, failed_at = asyncio.run(collect())
+    assert chunks == [([{"a": 1}], 1), ([{"b": 2}], 2)]
+    assert failed_at == 3
+
+def test_schema_endpoint():
+    schema = client.get("/internal/schema").json()
+    assert schema["media_type"] == "application/msgpack"
+    assert "analysis_result" in schema["request"]["properties"]
+    assert schema["response"]["required"] == ["user_id", "loan_id", "credit_score"]
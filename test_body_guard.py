@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the request body guard (app.guard): byte, asset-count and
+nesting-depth limits answered with 413 before the body is parsed
+"""
+import msgpack
+import orjson
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.guard import BodyGuardMiddleware, BodyTooLarge, check_json_shape
+from app.main import app
+from benchmarks.payloads import make_payload
+
+client = TestClient(app)
+HEADERS = {"content-type": "application/json"}
+
+def guarded_client(**limits) -> TestClient:
+    echo = FastAPI()
+
+    @echo.post("/echo")
+    @echo.post("/echo/batch")
+    @echo.post("/stream")
+    async def length(request: Request):
+        return {"bytes": len(await request.body())}
+
+    echo.add_middleware(BodyGuardMiddleware, exempt_paths=["/stream"], **limits)
+    return TestClient(echo)
+
+def chunks(body: bytes, size: int = 4096):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+def shape_error(body: bytes, **limits):
+    try:
+        check_json_shape(body, **limits)
+    except BodyTooLarge as e:
+        return str(e)
+    return None
+
+def test_shape_check_counts_assets_and_depth_outside_strings():
+    assert shape_error(orjson.dumps(make_payload(1000))) is None
+    assert shape_error(orjson.dumps(make_payload(1001))) == "more than 1000 detected_assets"
+    # Every request of a batch is counted on its own
+    assert shape_error(orjson.dumps([make_payload(3), make_payload(1001)])) == "more than 1000 detected_assets"
+    assert shape_error(orjson.dumps([make_payload(999)] * 3)) is None
+
+    payload = make_payload(2)
+    payload["analysis_result"]["detected_assets"][0]["gps_coordinates"] = {"trail": [1] * 50}
+    payload["analysis_result"]["detected_assets"][1]["device_model"] = 'a"[,{' * 40
+    assert shape_error(orjson.dumps(payload), max_assets=2) is None
+    assert shape_error(orjson.dumps(payload), max_assets=1) == "more than 1 detected_assets"
+
+    assert shape_error(b"[" * 32 + b"]" * 32) is None
+    assert shape_error(b"[" * 33 + b"]" * 33) == "JSON nesting deeper than 32 levels"
+    assert shape_error(orjson.dumps({"note": "[{" * 40})) is None
+    assert shape_error(orjson.dumps({"note": '\\"' + "[" * 40, "deep": [[[[1]]]]}), max_depth=3) == (
+        "JSON nesting deeper than 3 levels"
+    )
+    assert shape_error(orjson.dumps([[[[1]]]]), max_depth=0, max_assets=0) is None
+
+def test_declared_and_chunked_bodies_over_the_limit_get_413():
+    guarded = guarded_client(max_body_bytes=1000, max_batch_body_bytes=5000)
+    declared = guarded.post("/echo", content=b"x" * 1001)
+    assert declared.status_code == 413
+    assert declared.json() == {"detail": "Request too large: body larger than 1000 bytes"}
+    assert declared.headers["connection"] == "close"
+
+    # No Content-Length: cut off once the received chunks pass the limit
+    assert guarded.post("/echo", content=chunks(b"x" * 1001, 100)).status_code == 413
+    assert guarded.post("/echo", content=chunks(b"x" * 1000, 100)).json() == {"bytes": 1000}
+    assert guarded.post("/echo/batch", content=b"x" * 5000).json() == {"bytes": 5000}
+    assert guarded.post("/echo/batch", content=chunks(b"x" * 5001, 100)).status_code == 413
+    # Exempt paths are passed through
+    assert guarded.post("/stream", content=chunks(b"x" * 20000)).json() == {"bytes": 20000}
+
+def test_scoring_endpoints_reject_oversized_payloads_with_413():
+    for path in ("/evaluate_credit", "/evaluate_credit_detailed", "/evaluate_credit/fast", "/evaluate_credit/async"):
+        response = client.post(path, content=orjson.dumps(make_payload(1001)), headers=HEADERS)
+        assert response.status_code == 413, path
+        assert response.json() == {"detail": "Request too large: more than 1000 detected_assets"}
+        assert client.post(path, content=orjson.dumps(make_payload(10)), headers=HEADERS).status_code == 200
+
+    deep = make_payload(1)
+    deep["analysis_result"]["detected_assets"][0]["gps_coordinates"] = orjson.loads(b'{"a":' * 40 + b"1" + b"}" * 40)
+    response = client.post("/evaluate_credit", content=chunks(orjson.dumps(deep), 64), headers=HEADERS)
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request too large: JSON nesting deeper than 32 levels"}
+
+    padded = make_payload(1)
+    padded["user_id"] = "u" * (1 << 20)
+    assert client.post("/evaluate_credit", content=chunks(orjson.dumps(padded)), headers=HEADERS).status_code == 413
+    packed = msgpack.packb(padded)
+    response = client.post("/internal/score", content=packed, headers={"content-type": "application/msgpack"})
+    assert response.status_code == 413
+
+    batch = b"[" + b",".join([orjson.dumps(make_payload(1))] * 3) + b"]"
+    assert client.post("/evaluate_credit/batch", content=batch, headers=HEADERS).status_code == 200
+    stream = b"\n".join([orjson.dumps(make_payload(1))] * 600)
+    assert len(stream) > 1 << 20
+    assert len(client.post("/evaluate_credit/stream", content=chunks(stream)).text.splitlines()) == 600
+
+@pytest.mark.parametrize("path", ["/evaluate_credit/fast", "/evaluate_credit/async"])
+@pytest.mark.parametrize("content_type", ["application/msgpack", "application/x-msgpack"])
+def test_msgpack_content_type_does_not_skip_the_shape_check(path, content_type):
+    # JSON endpoints parse the body as JSON whatever the Content-Type says
+    response = client.post(path, content=orjson.dumps(make_payload(1500)), headers={"content-type": content_type})
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request too large: more than 1000 detected_assets"}
+
+@pytest.mark.parametrize("path", ["/evaluate_credit", "/evaluate_credit_detailed", "/evaluate_credit/fast"])
+def test_evaluate_credit_rejections_stay_400(path):
+    negative = client.post(path, json=make_payload(total_asset_value=-1.0))
+    assert negative.status_code == 400
+    assert negative.json() == {"detail": "Asset value cannot be negative"}
+    no_assets = client.post(path, json=make_payload(0))
+    assert no_assets.status_code == 400
+    assert no_assets.json() == {"detail": "No assets detected in analysis"}
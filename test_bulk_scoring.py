@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for NDJSON bulk scoring: the /evaluate_credit/stream endpoint and the
+python -m app.bulk command line tool
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app, calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest
+from app.bulk import iter_lines, main
+from benchmarks.payloads import make_payload, random_payloads
+
+client = TestClient(app)
+
+def ndjson_input():
+    payloads = random_payloads(20, seed=5)
+    lines = [json.dumps(p) for p in payloads]
+    # Bad lines: invalid JSON, a schema error, a blank line, a rejected request
+    lines[3] = '{"user_id": "broken"'
+    lines[7] = json.dumps({"user_id": "333", "loan_id": "3333"})
+    lines[11] = ""
+    lines[15] = json.dumps(make_payload(total_asset_value=-1.0))
+    return payloads, "\n".join(lines) + "\n"
+
+def check_records(payloads, records):
+    # the blank line produces no record
+    assert len(records) == len(payloads) - 1
+    by_line = {}
+    line_numbers = [n for n in range(1, len(payloads) + 1) if n != 12]
+    for line_number, record in zip(line_numbers, records):
+        by_line[line_number] = record
+
+    assert by_line[4]["line"] == 4 and by_line[4]["error"].startswith("Invalid JSON")
+    assert by_line[8] == {"line": 8, "error": by_line[8]["error"], "user_id": "333", "loan_id": "3333"}
+    assert "analysis_result: field required" in by_line[8]["error"]
+    assert by_line[16]["error"] == "Asset value cannot be negative"
+
+    for line_number, record in by_line.items():
+        if line_number in (4, 8, 16):
+            continue
+        request = CreditAnalysisRequest.parse_obj(payloads[line_number - 1])
+        assert record == {
+            "user_id": request.user_id,
+            "loan_id": request.loan_id,
+            "credit_score": calculate_comprehensive_credit_score(request),
+        }
+
+def test_iter_lines_reassembles_split_chunks():
+    chunks = [b'{"a"', b': 1}\n{"b": 2}\n{"c"', b"", b": 3}"]
+    assert list(iter_lines(chunks)) == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+
+def test_stream_endpoint():
+    payloads, body = ndjson_input()
+    encoded = body.encode()
+
+    def chunked():
+        for start in range(0, len(encoded), 1000):
+            yield encoded[start:start + 1000]
+
+    response = client.post("/evaluate_credit/stream?chunk_size=4", content=chunked())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    check_records(payloads, records)
+
+def test_cli(tmp_path, capsys):
+    payloads, body = ndjson_input()
+    source = tmp_path / "in.jsonl"
+    target = tmp_path / "out.jsonl"
+    source.write_text(body)
+
+    assert main(["score", str(source), str(target), "--chunk-size", "3"]) == 0
+    records = [json.loads(line) for line in target.read_text().splitlines()]
+    check_records(payloads, records)
+    assert "scored 16 lines, 3 errors" in capsys.readouterr().err
+
+def test_cli_with_worker_pool_matches_single_process(tmp_path, capsys):
+    _, body = ndjson_input()
+    source = tmp_path / "in.jsonl"
+    source.write_text(body * 5)
+
+    assert main(["score", str(source), str(tmp_path / "single.jsonl")]) == 0
+    assert main(["score", str(source), str(tmp_path / "pool.jsonl"), "--workers", "2", "--chunk-size", "7"]) == 0
+    assert (tmp_path / "pool.jsonl").read_text() == (tmp_path / "single.jsonl").read_text()
+    assert "worker " in capsys.readouterr().err
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the explained score (/evaluate_credit_detailed, explain_credit_score)
+"""
+from fastapi.testclient import TestClient
+
+from app.main import app, calculate_comprehensive_credit_score, explain_credit_score
+from app.models import CreditAnalysisRequest
+from app.rules import DEFAULT_RULES
+from benchmarks.payloads import make_payload, random_payloads
+
+client = TestClient(app)
+
+def test_explanation_matches_score_and_components():
+    for payload in random_payloads(1000, seed=11):
+        request = CreditAnalysisRequest.parse_obj(payload)
+        try:
+            expected = calculate_comprehensive_credit_score(request)
+        except (ValueError, OverflowError):
+            continue
+        explanation = explain_credit_score(request)
+        assert explanation.credit_score == expected
+        for component in explanation.components():
+            assert component["points"] == min(component["max_points"], sum(t["points"] for t in component["terms"]))
+
+def test_ladder_terms_report_the_threshold_reached():
+    explanation = explain_credit_score(CreditAnalysisRequest.parse_obj(make_payload(1, average_asset_condition=7.0)))
+    condition = next(c for c in explanation.components() if c["name"] == "condition")
+    ladder = condition["terms"][0]
+    assert (ladder["input"], ladder["value"], ladder["points"]) == ("average_asset_condition", 7.0, 17)
+    assert (ladder["comparison"], ladder["threshold"], ladder["next_threshold"]) == (">=", 7.0, 8.0)
+
+def test_linear_and_flag_terms_report_why():
+    payload = make_payload(1, asset_diversity_score=5, has_high_value_assets=False, has_property_asset=True)
+    components = {c["name"]: c for c in explain_credit_score(CreditAnalysisRequest.parse_obj(payload)).components()}
+    high_value = components["asset_value"]["terms"][1]
+    assert (high_value["applied"], high_value["points"]) == (False, 0)
+    diversity, flags = components["diversity"]["terms"]
+    assert (diversity["points"], diversity["at_cap"]) == (8, True)
+    assert flags["inputs"] == ["has_transport_asset", "has_property_asset"] and flags["points"] == 5
+
+def test_detailed_endpoint():
+    payload = make_payload(1)
+    response = client.post("/evaluate_credit_detailed", json=payload)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["credit_score"] == client.post("/evaluate_credit", json=payload).json()["credit_score"]
+    breakdown = result["score_breakdown"]
+    assert breakdown["asset_coverage_ratio"] == 2509.03 / DEFAULT_RULES.loan_amount
+    assert breakdown["asset_condition"] == 5.7
+    assert breakdown["exif_verification_rate"] == 100.0
+    assert [c["name"] for c in result["components"]] == [c.name for c in DEFAULT_RULES.components]
+    assert all(breakdown[f"{c['name']}_score"] == c["points"] for c in result["components"])
+
+def test_detailed_endpoint_rejects_requests_without_assets():
+    response = client.post("/evaluate_credit_detailed", json=make_payload(0))
+    assert response.status_code == 400
+    assert response.json() == {"detail": "No assets detected in analysis"}
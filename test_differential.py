@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Differential tests: every scoring path against the reference
+calculate_comprehensive_credit_score, on the rule boundary corpus, the
+bulk generator and Hypothesis-generated payloads (see benchmarks.differential)
+"""
+import pytest
+
+from app.models import CreditAnalysisRequest
+from app.rules import DEFAULT_RULES, extract_row
+from benchmarks.differential import check_http, check_in_process, reference_scores
+from benchmarks.payloads import (
+    boundary_payloads,
+    bulk_features,
+    feature_matrix,
+    iter_bulk_payloads,
+    random_payloads,
+    rule_boundaries,
+    synthetic_payloads,
+)
+
+try:
+    from hypothesis import HealthCheck, given, settings, strategies as st
+    from benchmarks.strategies import credit_payloads
+except ImportError:
+    given = None
+
+def test_boundary_corpus_reaches_every_ladder_rung_and_cap():
+    rows = [extract_row(CreditAnalysisRequest.parse_obj(payload)) for _, _, payload in boundary_payloads()]
+    boundaries = rule_boundaries()
+    for component in DEFAULT_RULES.components:
+        for term in component.terms:
+            if term.kind == "ladder":
+                rungs = {term.index(term._get(row)) for row in rows}
+                assert rungs == set(range(len(term.points))), term.input_name
+            elif term.kind == "linear" and term.cap is not None:
+                assert {term.evaluate(row) == term.cap for row in rows} == {True, False}, term.input_name
+            elif term.kind == "flags":
+                assert all(boundaries[name] == [False, True] for name in term.weights)
+
+def test_every_path_matches_reference_on_boundaries():
+    payloads = [payload for _, _, payload in boundary_payloads()]
+    expected = reference_scores(payloads)
+    assert check_in_process(payloads, expected) == []
+    assert check_http(payloads, expected) == []
+
+def test_every_path_matches_reference_on_sample_corpora():
+    payloads = random_payloads(60, seed=41) + synthetic_payloads(30, asset_counts=(1, 10), seed=42)
+    expected = reference_scores(payloads)
+    assert check_in_process(payloads, expected) == []
+    assert check_http(payloads, expected) == []
+
+def test_bulk_generator_matches_its_payloads():
+    columns = bulk_features(20000, seed=43)
+    scores, errors = DEFAULT_RULES.score_matrix(feature_matrix(columns))
+    assert not errors
+    # Realistic spread rather than one saturated score
+    assert len(set(scores.tolist())) > 30
+    payloads = list(iter_bulk_payloads(columns, 0, 300, seed=43))
+    expected = reference_scores(payloads)
+    assert expected == scores[:300].tolist()
+    assert check_in_process(payloads, expected) == []
+
+@pytest.mark.skipif(given is None, reason="requires hypothesis")
+def test_every_path_matches_reference_on_generated_payloads():
+    @settings(max_examples=40, deadline=None, derandomize=True, suppress_health_check=[HealthCheck.too_slow])
+    @given(st.lists(credit_payloads(), min_size=1, max_size=4))
+    def check(payloads):
+        expected = reference_scores(payloads)
+        assert check_in_process(payloads, expected) == []
+        assert check_http(payloads, expected) == []
+
+    check()
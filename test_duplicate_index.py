@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Duplicate index: the same photos under another applicant, assets of the same
+type photographed at the same place, persistence and the bounded table size
+"""
+import os
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.duplicates import DUPLICATE_PHOTO, MAX_PROBES, NEARBY_ASSET, DuplicateIndex
+from app.models import DetectedAsset
+from benchmarks.payloads import SAMPLE_ASSET, make_payload
+
+client = TestClient(main.app)
+
+def asset(**overrides):
+    return DetectedAsset.parse_obj(dict(SAMPLE_ASSET, **overrides))
+
+def test_same_photos_under_another_applicant_are_flagged(tmp_path):
+    index = DuplicateIndex(tmp_path, capacity=1024)
+    photos = [asset(image_source=f"bike-{i}.jpg", timestamp=f"2025-07-26T14:2{i}:18") for i in range(3)]
+    assert index.check("alice", photos) == []
+    # The same applicant resubmitting is not a duplicate
+    assert index.check("alice", photos) == []
+    renamed = [a.copy(update={"image_source": f"renamed-{i}.jpg"}) for i, a in enumerate(photos)]
+    flags = index.check("bob", renamed)
+    assert [f["flag"] for f in flags] == [DUPLICATE_PHOTO] * 3
+    assert [f["image_source"] for f in flags] == ["renamed-0.jpg", "renamed-1.jpg", "renamed-2.jpg"]
+    assert flags[0]["previous_submissions"] == 2
+    # A different timestamp is a different photo
+    assert index.check("carol", [photos[0].copy(update={"timestamp": "2025-07-27T09:00:00"})]) == []
+
+def test_nearby_assets_of_the_same_type_are_flagged(tmp_path):
+    index = DuplicateIndex(tmp_path, capacity=1024, grid_degrees=0.001)
+    here = asset(gps_coordinates={"lat": -1.28641, "lon": 36.81723}, timestamp="1")
+    assert index.check("alice", [here]) == []
+    # Next grid cell over, photographed by someone else
+    next_door = asset(gps_coordinates={"lat": -1.28561, "lon": 36.81723}, timestamp="2")
+    assert [f["flag"] for f in index.check("bob", [next_door])] == [NEARBY_ASSET]
+    far_away = asset(gps_coordinates=[-1.30, 36.90], timestamp="3")
+    other_type = asset(gps_coordinates=[-1.28641, 36.81723], asset_type="tv", timestamp="4")
+    assert index.check("carol", [far_away, other_type]) == []
+
+def test_index_persists_and_stays_bounded(tmp_path):
+    index = DuplicateIndex(tmp_path, capacity=256)
+    size = os.path.getsize(tmp_path / "photos.idx")
+    for i in range(5000):
+        index.check(f"user-{i}", [asset(timestamp=str(i))])
+    assert index.stats()["photos"] <= 256 + MAX_PROBES
+    assert os.path.getsize(tmp_path / "photos.idx") == size
+    index.flush()
+
+    # Recent submissions are kept across a restart
+    reopened = DuplicateIndex(tmp_path, capacity=256)
+    assert reopened.stats()["photos"] == index.stats()["photos"]
+    flags = reopened.check("someone-else", [asset(timestamp="4999")], record=False)
+    assert [f["flag"] for f in flags] == [DUPLICATE_PHOTO]
+
+def test_evaluate_credit_reports_duplicate_flags(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "duplicate_index", DuplicateIndex(tmp_path, capacity=1024))
+    payload = make_payload(2)
+    first = client.post("/evaluate_credit", json=payload).json()
+    assert "duplicate_flags" not in first
+    payload["user_id"] = "222222"
+    second = client.post("/evaluate_credit", json=payload).json()
+    assert second["credit_score"] == first["credit_score"]
+    # make_payload repeats one photo under two file names: both are flagged
+    assert [f["flag"] for f in second["duplicate_flags"]] == [DUPLICATE_PHOTO, DUPLICATE_PHOTO]
+    assert client.get("/duplicates/stats").json()["flagged_assets"] == 2
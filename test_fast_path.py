@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+The orjson fast path must answer exactly like /evaluate_credit
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.fastpath import parse_fast
+from benchmarks.payloads import make_payload, random_payloads
+
+client = TestClient(app)
+
+def post_both(payload=None, content=None):
+    kwargs = {"json": payload} if content is None else {"content": content, "headers": {"content-type": "application/json"}}
+    return client.post("/evaluate_credit", **kwargs), client.post("/evaluate_credit/fast", **kwargs)
+
+def test_scores_match_classic_endpoint():
+    for payload in random_payloads(200, seed=21, n_assets=2):
+        assert parse_fast(payload) is not None
+        classic, fast = post_both(payload)
+        assert fast.status_code == 200
+        assert fast.json() == classic.json()
+
+def test_coercible_payloads_fall_back_to_validation():
+    payload = make_payload(total_asset_value="150000", has_property_asset="true", image_span_days=12.0)
+    assert parse_fast(payload) is None
+    classic, fast = post_both(payload)
+    assert fast.status_code == 200
+    assert fast.json() == classic.json()
+
+def test_integer_values_for_float_fields_take_the_fast_path():
+    payload = make_payload(total_asset_value=100000, average_asset_condition=8)
+    assert parse_fast(payload) is not None
+    classic, fast = post_both(payload)
+    assert fast.json() == classic.json()
+
+def test_validation_errors_match():
+    payload = make_payload(average_asset_condition="worn")
+    del payload["analysis_result"]["summary"]["devices_detected"]
+    classic, fast = post_both(payload)
+    assert fast.status_code == classic.status_code == 422
+    assert fast.json() == classic.json()
+
+def test_invalid_json_is_rejected():
+    _, fast = post_both(content=b'{"user_id": ')
+    assert fast.status_code == 422
+    assert fast.json()["detail"][0]["type"] == "value_error.jsondecode"
+
+def test_rejected_requests_are_400():
+    _, fast = post_both(make_payload(total_asset_value=-1.0))
+    assert fast.status_code == 400
+    assert fast.json() == {"detail": "Asset value cannot be negative"}
+    _, fast = post_both(make_payload(n_assets=0))
+    assert fast.status_code == 400
+    assert fast.json() == {"detail": "No assets detected in analysis"}
+
+def test_openapi_documents_same_contract():
+    paths = app.openapi()["paths"]
+    classic, fast = paths["/evaluate_credit"]["post"], paths["/evaluate_credit/fast"]["post"]
+    assert fast["requestBody"] == classic["requestBody"]
+    assert fast["responses"]["200"]["content"]["application/json"]["schema"] == \
+        classic["responses"]["200"]["content"]["application/json"]["schema"]
+    assert "422" in fast["responses"]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for normalized feature records and record files
+"""
+import json
+
+import numpy as np
+import pytest
+
+from app.batch import score_requests
+from app.features import (
+    FEATURE_DTYPE,
+    append_records,
+    main,
+    normalize_requests,
+    parse_lines,
+    read_records,
+    score_records,
+)
+from app.models import CreditAnalysisRequest, LeanCreditAnalysisRequest
+from app.rules import INPUT_INDEX, compile_rules, DEFAULT_RULES
+from benchmarks.payloads import make_payload, random_payloads, synthetic_payloads
+
+def _requests(payloads):
+    return [CreditAnalysisRequest.parse_obj(p) for p in payloads]
+
+def test_records_score_like_the_batch_path(tmp_path):
+    requests = _requests(random_payloads(1500, seed=21) + [make_payload(0), make_payload(1, total_asset_value=-1.0)])
+    path = tmp_path / "book.frec"
+    append_records(path, normalize_requests(requests[:700]))
+    append_records(path, normalize_requests(requests[700:]))
+
+    records = read_records(path)
+    assert isinstance(records, np.memmap) and len(records) == len(requests)
+    scores, errors = score_records(records)
+    for expected, score, error in zip(score_requests(requests), scores.tolist(), errors):
+        assert (expected.credit_score, expected.error) == ((None if error else score), error)
+
+def test_exif_rate_is_stored_parsed():
+    request = CreditAnalysisRequest.parse_obj(make_payload(1))
+    request.analysis_result.summary.exif_verification_rate = "87.5%"
+    record = normalize_requests([request])[0]
+    assert record["inputs"][INPUT_INDEX["exif_verification_rate"]] == 87.5
+    assert record["user_id"] == b"111111" and record["error"] == 0
+
+def test_asset_count_is_stored():
+    payload = synthetic_payloads(1, asset_counts=(25,))[0]
+    assert normalize_requests([CreditAnalysisRequest.parse_obj(payload)])[0]["asset_count"] == 25
+
+def test_lean_requests_normalize_to_the_same_records():
+    payloads = synthetic_payloads(20, asset_counts=(1, 3))
+    full = normalize_requests(_requests(payloads))
+    lean = normalize_requests([LeanCreditAnalysisRequest.parse_obj(p) for p in payloads])
+    assert full.tobytes() == lean.tobytes()
+
+def test_rescoring_with_alternate_rules(tmp_path):
+    path = tmp_path / "book.frec"
+    requests = _requests(random_payloads(200, seed=2))
+    append_records(path, normalize_requests(requests))
+    definition = dict(DEFAULT_RULES.definition, loan_amount=50000.0)
+    rules = compile_rules(definition)
+    scores, errors = score_records(read_records(path), rules)
+    for expected, score, error in zip(score_requests(requests, rules), scores.tolist(), errors):
+        assert (expected.credit_score, expected.error) == ((None if error else score), error)
+
+def test_long_ids_are_rejected():
+    request = CreditAnalysisRequest.parse_obj(make_payload(1))
+    request.loan_id = "x" * 65
+    with pytest.raises(ValueError):
+        normalize_requests([request])
+
+def test_long_ids_are_skipped_as_invalid_lines(tmp_path, capsys):
+    payloads = random_payloads(5, seed=3)
+    payloads[2]["batch_id"] = "b" * 65
+    lines = [json.dumps(p).encode() for p in payloads] + [b"{"]
+    requests, failures = parse_lines(lines)
+    assert len(requests) == 4
+    assert failures == ["batch_id is longer than 64 bytes", failures[1]]
+    assert failures[1].startswith("Invalid JSON")
+
+    source = tmp_path / "requests.jsonl"
+    source.write_bytes(b"\n".join(lines) + b"\n")
+    assert main(["normalize", str(source), str(tmp_path / "book.frec"), "--chunk-size", "2"]) == 0
+    assert len(read_records(tmp_path / "book.frec")) == 4
+    assert "wrote 4 records, skipped 2 invalid lines" in capsys.readouterr().err
+
+def test_record_files_check_their_layout(tmp_path):
+    path = tmp_path / "other.frec"
+    path.write_bytes(b"not a record file")
+    with pytest.raises(ValueError):
+        read_records(path)
+    assert FEATURE_DTYPE.itemsize < 512
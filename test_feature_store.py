@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar feature store and the what-if runner
+"""
+import io
+import json
+import time
+
+import numpy as np
+import pytest
+
+from app.features import append_records, normalize_requests
+from app.models import CreditAnalysisRequest
+from app.rules import DEFAULT_RULES, INPUT_FIELDS, ColumnMatrix, compile_rules
+from app.store import BufferedAppender, FeatureStore, import_file, what_if
+from benchmarks.payloads import make_payload, random_payloads
+
+def _records(payloads):
+    return normalize_requests([CreditAnalysisRequest.parse_obj(p) for p in payloads])
+
+def test_columns_round_trip_records(tmp_path):
+    records = _records(random_payloads(300, seed=5))
+    store = FeatureStore(tmp_path / "book")
+    store.append(records[:100])
+    assert store.append(records[100:]) == 300
+
+    columns = FeatureStore(tmp_path / "book").columns()
+    assert isinstance(columns["loan_id"], np.memmap)
+    assert columns["loan_id"].tolist() == records["loan_id"].tolist()
+    assert columns["error"].tolist() == records["error"].tolist()
+    for i, name in enumerate(INPUT_FIELDS):
+        assert columns[name].tobytes() == np.ascontiguousarray(records["inputs"][:, i]).tobytes()
+
+def test_column_matrix_scores_like_the_row_matrix():
+    inputs = _records(random_payloads(500, seed=6))["inputs"]
+    columns = [np.ascontiguousarray(inputs[:, i]) for i in range(len(INPUT_FIELDS))]
+    scores, errors = DEFAULT_RULES.score_matrix(ColumnMatrix(columns))
+    expected_scores, expected_errors = DEFAULT_RULES.score_matrix(inputs)
+    assert scores.tolist() == expected_scores.tolist() and errors == expected_errors
+
+def test_interrupted_append_is_truncated(tmp_path):
+    records = _records(random_payloads(2, seed=9))
+    store = FeatureStore(tmp_path / "book")
+    store.append(records[:1])
+    with open(tmp_path / "book" / "loan_id.bin", "ab") as f:
+        f.write(b"partial")
+    store.append(records[1:])
+    assert store.column("loan_id").tolist() == records["loan_id"].tolist()
+
+def test_what_if_reports_deltas(tmp_path):
+    payloads = random_payloads(2000, seed=7) + [make_payload(0)]
+    records = _records(payloads)
+    store = FeatureStore(tmp_path / "book")
+    store.append(records)
+    rules = compile_rules(dict(DEFAULT_RULES.definition, loan_amount=50000.0))
+    changes = io.BytesIO()
+    report = what_if(store, rules, chunk_rows=512, changes=changes)
+
+    before, _ = DEFAULT_RULES.score_matrix(records["inputs"])
+    after, _ = rules.score_matrix(records["inputs"])
+    ok = records["error"] == 0
+    delta = (after - before)[ok]
+    assert report["rows"] == len(payloads) and report["errors"] == int((~ok).sum())
+    assert report["changed"] == int((delta != 0).sum()) == len(changes.getvalue().splitlines())
+    assert report["decreased"] == int((delta < 0).sum()) and report["increased"] == int((delta > 0).sum())
+    assert sum(report["histogram"].values()) == sum(report["baseline_histogram"].values()) == report["scored"]
+    assert report["delta_histogram"].get("0", 0) == int((delta == 0).sum())
+    change = json.loads(changes.getvalue().splitlines()[0])
+    assert change["after"] - change["before"] != 0
+
+def test_import_and_buffered_appends(tmp_path):
+    lines = tmp_path / "requests.jsonl"
+    lines.write_text("\n".join(json.dumps(p) for p in random_payloads(50, seed=8)) + "\nnot json\n")
+    book = tmp_path / "book.frec"
+    append_records(book, _records([make_payload(1)]))
+    store = FeatureStore(tmp_path / "store")
+    assert import_file(store, str(lines)) == {"appended": 50, "skipped": 1}
+    assert import_file(store, str(book))["appended"] == 1
+
+    appender = BufferedAppender(store, flush_seconds=60)
+    appender.start()
+    request = CreditAnalysisRequest.parse_obj(make_payload(2))
+    appender.add_requests([request])
+    request.loan_id = "x" * 100
+    appender.add_requests([request])
+    appender.stop()
+    assert len(store) == 52 and appender.dropped == 1
+
+def test_failed_appends_are_kept_for_the_next_flush(tmp_path, monkeypatch):
+    store = FeatureStore(tmp_path / "store")
+    appender = BufferedAppender(store, flush_seconds=0.01, max_buffer=3)
+    append = store.append
+    failures = iter([OSError("No space left on device")] * 2)
+
+    def failing_append(records):
+        for error in failures:
+            raise error
+        return append(records)
+
+    monkeypatch.setattr(store, "append", failing_append)
+    appender.add(_records([make_payload(1)] * 2))
+    with pytest.raises(OSError):
+        appender.flush()
+    # Put back in front of the buffer; what no longer fits is dropped
+    appender.add(_records([make_payload(2)]))
+    appender.add(_records([make_payload(3)]))
+    assert (appender.failures, appender.dropped) == (1, 1)
+
+    # The flush thread survives the next failure and appends on a later tick
+    appender.start()
+    for _ in range(200):
+        if len(store):
+            break
+        time.sleep(0.01)
+    appender.stop()
+    assert len(store) == 3 and appender.failures == 2
+    assert store.column("asset_count").tolist() == [1, 1, 2]
+
+def test_layout_mismatch_is_rejected(tmp_path):
+    FeatureStore(tmp_path / "book")
+    meta = tmp_path / "book" / "meta.json"
+    meta.write_text(json.dumps({"rows": 0, "columns": {"user_id": "|S64"}}))
+    with pytest.raises(ValueError):
+        FeatureStore(tmp_path / "book")
+    with pytest.raises(ValueError):
+        FeatureStore(tmp_path / "other").append(np.zeros(1, dtype=[("x", "f8")]))
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Tests for the /jobs queue: submission, polling, results and resuming
+"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+
+from app import jobs, main
+from app.bulk import encode_records, score_lines
+from app.jobs import QUEUED, RUNNING, SUCCEEDED, JobQueue
+from benchmarks.payloads import make_payload, random_payloads
+
+client = TestClient(main.app)
+
+def ndjson(count=40, seed=4):
+    lines = [json.dumps(p) for p in random_payloads(count, seed=seed)]
+    lines[2] = '{"user_id": "broken"'
+    lines[5] = ""
+    lines[9] = json.dumps(make_payload(total_asset_value=-1.0))
+    return ("\n".join(lines) + "\n").encode()
+
+def expected_result(body):
+    return encode_records(score_lines(body.splitlines(keepends=True)))
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs"), workers=1, chunk_size=7, poll_seconds=0.05, input_dir=str(tmp_path))
+    monkeypatch.setattr(main, "job_queue", queue)
+    yield queue
+    queue.stop()
+
+def wait_for(job_id, status=SUCCEEDED):
+    for _ in range(200):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] == status:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} is {job['status']}")
+
+def test_upload_job(queue):
+    body = ndjson()
+    response = client.post("/jobs", content=body, headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["location"] == f"/jobs/{job_id}"
+
+    job = wait_for(job_id)
+    assert (job["progress"], job["lines"], job["scored"], job["errors"]) == (1.0, 40, 37, 2)
+    result = client.get(job["result_url"])
+    assert result.headers["content-type"] == "application/x-ndjson"
+    assert result.content == expected_result(body)
+    assert [j["job_id"] for j in client.get("/jobs").json()] == [job_id]
+
+def test_local_file_job(queue, tmp_path):
+    path = tmp_path / "batch.jsonl"
+    path.write_bytes(ndjson(seed=5))
+    job = wait_for(client.post("/jobs", params={"path": str(path)}).json()["job_id"])
+    assert client.get(job["result_url"]).content == expected_result(path.read_bytes())
+    assert path.exists()
+
+    assert client.post("/jobs", params={"path": str(tmp_path / "missing.jsonl")}).status_code == 404
+    assert client.post("/jobs", params={"path": "/etc/passwd"}).status_code == 403
+    queue.input_dir = None
+    assert client.post("/jobs", params={"path": str(path)}).status_code == 403
+
+def test_unknown_and_unfinished_jobs(queue):
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.get("/jobs/nope/result").status_code == 404
+    job_id, upload = queue.new_upload()
+    upload.write_bytes(ndjson())
+    queue.store.create(job_id, str(upload), True, upload.stat().st_size)
+    response = client.get(f"/jobs/{job_id}/result")
+    assert response.status_code == 409 and response.json() == {"detail": "Job is queued"}
+
+def test_interrupted_job_resumes_from_checkpoint(tmp_path):
+    body = ndjson(60, seed=6)
+    first = JobQueue(str(tmp_path / "jobs"), workers=1, chunk_size=7)
+    job_id, upload = first.new_upload()
+    upload.write_bytes(body)
+    first.store.create(job_id, str(upload), True, len(body))
+
+    # Stop after the first chunk, with a torn write after the checkpoint
+    first._stopped.set()
+    first.run(first.store.claim(first.owner))
+    job = first.store.get(job_id)
+    assert (job["status"], job["lines"]) == (QUEUED, 7)
+    with open(first.result_path(job_id), "ab") as f:
+        f.write(b'{"user_id": "torn')
+
+    second = JobQueue(str(tmp_path / "jobs"), workers=1, chunk_size=7, poll_seconds=0.05)
+    second.start(resume=True)
+    try:
+        for _ in range(200):
+            if second.get(job_id)["status"] == SUCCEEDED:
+                break
+            time.sleep(0.05)
+    finally:
+        second.stop()
+    assert second.result_path(job_id).read_bytes() == expected_result(body)
+    assert not upload.exists()
+
+def test_process_pool_job(tmp_path):
+    body = ndjson(100, seed=7)
+    queue = JobQueue(str(tmp_path / "jobs"), workers=2, chunk_size=9)
+    job_id, upload = queue.new_upload()
+    upload.write_bytes(body)
+    queue.store.create(job_id, str(upload), True, len(body))
+    try:
+        queue.run(queue.store.claim(queue.owner))
+    finally:
+        queue.stop()
+    assert queue.get(job_id)["status"] == SUCCEEDED
+    assert queue.result_path(job_id).read_bytes() == expected_result(body)
+
+def test_requeued_job_is_not_run_twice(tmp_path):
+    body = ndjson(30, seed=8)
+    first = JobQueue(str(tmp_path / "jobs"), workers=1, chunk_size=7)
+    second = JobQueue(str(tmp_path / "jobs"), workers=1, chunk_size=7)
+    job_id, upload = first.new_upload()
+    upload.write_bytes(body)
+    first.store.create(job_id, str(upload), True, len(body))
+
+    # The first runner stalls past the stale limit and the job is handed over
+    stalled = first.store.claim(first.owner)
+    assert second.store.requeue_stale(-1) == 1
+    taken = second.store.claim(second.owner)
+    assert taken["owner"] != stalled["owner"]
+    assert not first.store.checkpoint(job_id, stalled["owner"], 0, 0, 0, 0, 0)
+    assert not first.store.finish(job_id, stalled["owner"], SUCCEEDED)
+    assert not first.store.release(job_id, stalled["owner"])
+
+    # When it wakes up it stops before writing anything
+    first.run(stalled)
+    job = second.get(job_id)
+    assert (job["status"], job["lines"], job["owner"]) == (RUNNING, 0, taken["owner"])
+    assert not first.result_path(job_id).read_bytes()
+    second.run(taken)
+    assert second.get(job_id)["status"] == SUCCEEDED
+    assert second.result_path(job_id).read_bytes() == expected_result(body)
+
+def test_heartbeat_keeps_slow_chunks_claimed(tmp_path, monkeypatch):
+    score_chunk = jobs.score_chunk
+
+    def slow_chunk(chunk, first_line, audit=None):
+        time.sleep(0.3)
+        return score_chunk(chunk, first_line, audit)
+
+    monkeypatch.setattr(jobs, "score_chunk", slow_chunk)
+    body = ndjson(21, seed=9)
+    queue = JobQueue(str(tmp_path / "jobs"), workers=1, chunk_size=7, stale_seconds=0.2)
+    job_id, upload = queue.new_upload()
+    upload.write_bytes(body)
+    queue.store.create(job_id, str(upload), True, len(body))
+    runner = threading.Thread(target=queue.run, args=(queue.store.claim(queue.owner),))
+    runner.start()
+    requeued = 0
+    while runner.is_alive():
+        requeued += queue.store.requeue_stale(queue.stale_seconds)
+        time.sleep(0.02)
+    runner.join()
+    assert requeued == 0
+    assert queue.get(job_id)["status"] == SUCCEEDED
+    assert queue.result_path(job_id).read_bytes() == expected_result(body)
+
+def test_interrupted_upload_leaves_no_file(queue):
+    messages = iter([
+        {"type": "http.request", "body": ndjson()[:500], "more_body": True},
+        {"type": "http.disconnect"},
+    ])
+    sent = []
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/jobs", "raw_path": b"/jobs", "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+    try:
+        asyncio.run(main.app(scope, receive, send))
+    except ClientDisconnect:
+        pass
+    assert list((queue.directory / "inputs").iterdir()) == []
+    assert queue.list() == []
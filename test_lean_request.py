@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for LeanCreditAnalysisRequest (lazy validation of detected_assets)
+"""
+import pytest
+from pydantic import ValidationError
+
+from app.main import calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest, DetectedAsset, LeanCreditAnalysisRequest
+from benchmarks.payloads import make_payload, random_payloads
+
+def test_lean_and_full_models_score_identically():
+    for payload in random_payloads(200, seed=9, n_assets=3):
+        full = CreditAnalysisRequest.parse_obj(payload)
+        lean = LeanCreditAnalysisRequest.parse_obj(payload)
+        assert calculate_comprehensive_credit_score(lean) == calculate_comprehensive_credit_score(full)
+
+def test_assets_are_validated_on_demand():
+    payload = make_payload(n_assets=2)
+    payload["analysis_result"]["detected_assets"][1]["condition_score"] = "scratched"
+
+    with pytest.raises(ValidationError):
+        CreditAnalysisRequest.parse_obj(payload)
+
+    lean = LeanCreditAnalysisRequest.parse_obj(payload)
+    assert len(lean.analysis_result.detected_assets) == 2
+    with pytest.raises(ValidationError):
+        lean.analysis_result.detected_assets.validated()
+    with pytest.raises(ValidationError):
+        lean.to_full()
+
+def test_validated_assets_match_full_model():
+    payload = make_payload(n_assets=3)
+    lean = LeanCreditAnalysisRequest.parse_obj(payload)
+    assets = lean.analysis_result.detected_assets.validated()
+    assert all(isinstance(asset, DetectedAsset) for asset in assets)
+    assert lean.to_full() == CreditAnalysisRequest.parse_obj(payload)
+
+def test_detected_assets_must_still_be_a_list():
+    payload = make_payload()
+    payload["analysis_result"]["detected_assets"] = {"asset_type": "car"}
+    with pytest.raises(ValidationError):
+        LeanCreditAnalysisRequest.parse_obj(payload)
+
+def test_schema_documents_asset_items():
+    schema = LeanCreditAnalysisRequest.schema()
+    assets = schema["definitions"]["LeanAnalysisResult"]["properties"]["detected_assets"]
+    assert assets["type"] == "array"
+    assert set(assets["items"]["properties"]) == set(DetectedAsset.__fields__)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental per-loan feature aggregator and /loans endpoints
+"""
+import random
+
+from fastapi.testclient import TestClient
+
+from app.aggregator import LoanAggregate, LoanAggregator
+from app.main import app
+from app.models import DetectedAsset
+from benchmarks.payloads import SAMPLE_ASSET, SAMPLE_PAYLOAD, synthetic_asset
+
+client = TestClient(app)
+
+SIGNALS = {"location_stability_score": 10, "primary_device_tier_score": 50}
+
+def assets(count, seed=0):
+    rng = random.Random(seed)
+    return [DetectedAsset.parse_obj(synthetic_asset(rng, i)) for i in range(count)]
+
+def test_sample_assets_reproduce_upstream_features():
+    response = client.post("/loans/sample/assets", json={"user_id": "111111", "detected_assets": [SAMPLE_ASSET], **SIGNALS})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["credit_features"] == SAMPLE_PAYLOAD["analysis_result"]["credit_features"]
+    assert result["credit_score"] == client.post("/evaluate_credit", json=SAMPLE_PAYLOAD).json()["credit_score"]
+    assert client.get("/loans/sample/features").json() == dict(result, new_assets=0)
+
+def test_incremental_updates_match_one_batch():
+    batch = assets(50, seed=1)
+    whole = LoanAggregate("L", "U")
+    whole.add(batch)
+    incremental = LoanAggregate("L", "U")
+    for start in range(0, 50, 7):
+        incremental.add(batch[start:start + 7])
+    assert incremental.snapshot().row == whole.snapshot().row
+    assert incremental.credit_features() == whole.credit_features()
+
+def test_retried_assets_are_not_counted_twice():
+    aggregator = LoanAggregator(max_loans=10, idle_seconds=3600)
+    batch = assets(10, seed=2)
+    aggregator.update("L1", "U1", batch[:6], {})
+    loan, added, skipped = aggregator.update("L1", "U1", batch[4:], {"loan_amount": 5000.0})
+    assert (added, skipped, loan.images) == (4, 2, 10)
+    assert loan.row[-1] == 5000.0
+
+def test_loans_are_bounded_and_idle_ones_evicted():
+    aggregator = LoanAggregator(max_loans=2, idle_seconds=60)
+    for loan_id in ("L1", "L2", "L3"):
+        aggregator.update(loan_id, "U", assets(1), {})
+    assert aggregator.get("L1") is None and aggregator.get("L3") is not None
+    aggregator._loans["L2"].updated_at -= 120
+    aggregator.update("L3", "U", [], {})
+    assert aggregator.get("L2") is None
+    assert aggregator.stats()["loans"] == 1 and aggregator.evictions == 2
+
+def test_loans_without_assets():
+    assert client.get("/loans/unknown/features").status_code == 404
+    response = client.post("/loans/empty/assets", json={"user_id": "1", "detected_assets": []})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "No assets detected in analysis"}
+
+def test_timestamps_with_offsets_and_exif_form():
+    stamps = ["2024-01-15T10:00:00Z", "2024-01-20T12:00:00+02:00", "2024:01:25 10:00:00", "2024-01-17T08:00:00"]
+    batch = [dict(SAMPLE_ASSET, image_source=f"tz-{i}.jpg", timestamp=stamp) for i, stamp in enumerate(stamps)]
+    response = client.post("/loans/L9/assets", json={"user_id": "9", "detected_assets": batch[:1], **SIGNALS})
+    assert response.status_code == 200
+    response = client.post("/loans/L9/assets", json={"user_id": "9", "detected_assets": batch[1:], **SIGNALS})
+    assert response.status_code == 200
+    assert response.json()["credit_features"]["image_span_days"] == 10
+    features = client.get("/loans/L9/features")
+    assert features.status_code == 200
+    assert features.json()["credit_features"]["has_recent_images"] is False
+
+def test_failed_update_leaves_the_loan_unchanged():
+    aggregator = LoanAggregator(max_loans=10, idle_seconds=3600)
+    aggregator.update("L1", "U1", assets(3, seed=3), {})
+    before = aggregator.get("L1").row
+    try:
+        aggregator.update("L1", "U1", assets(5, seed=4), {"credit_limit": 1})
+    except ValueError:
+        pass
+    assert aggregator.get("L1").row == before
+    try:
+        aggregator.update("L2", "U2", assets(1), {"credit_limit": 1})
+    except ValueError:
+        pass
+    assert aggregator.get("L2") is None
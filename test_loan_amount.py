@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Per-request loan amounts and product codes: coverage is taken against the
+request's amount in every scoring path, and the default stays the rules' amount
+"""
+import random
+
+from fastapi.testclient import TestClient
+
+from app.batch import score_requests
+from app.fastpath import parse_fast
+from app.main import app, calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest
+from app.rules import DEFAULT_RULES, LOAN_PRODUCTS, compile_rules
+from benchmarks.payloads import make_payload, random_payloads
+
+client = TestClient(app)
+
+def with_loan_amounts(payloads, seed=0):
+    """
+    Give most payloads a loan amount, many of them putting the coverage ratio
+    exactly on a ladder breakpoint
+    """
+    rng = random.Random(seed)
+    for payload in payloads:
+        value = payload["analysis_result"]["credit_features"]["total_asset_value"]
+        choice = rng.random()
+        if choice < 0.5 and isinstance(value, float) and value > 0:
+            payload["loan_amount"] = value / rng.choice([0.2, 0.4, 0.6, 0.8, 1.0, 0.3])
+        elif choice < 0.8:
+            payload["loan_amount"] = rng.choice([500.0, 2500, 7999.99, 100000.0, 1e9])
+        elif choice < 0.9:
+            payload["product_code"] = rng.choice(list(LOAN_PRODUCTS))
+    return payloads
+
+def test_loan_amount_sets_coverage():
+    payload = make_payload(1, has_high_value_assets=False)
+    default = client.post("/evaluate_credit_detailed", json=payload).json()
+    payload["loan_amount"] = 2509.03
+    covered = client.post("/evaluate_credit_detailed", json=payload).json()
+    assert default["score_breakdown"]["asset_coverage_ratio"] == 2509.03 / DEFAULT_RULES.loan_amount
+    assert covered["score_breakdown"]["asset_coverage_ratio"] == 1.0
+    assert covered["score_breakdown"]["asset_value_score"] == 30
+    assert covered["credit_score"] == default["credit_score"] + 25
+
+def test_default_is_the_rules_loan_amount():
+    payload = make_payload(1)
+    explicit = dict(payload, loan_amount=DEFAULT_RULES.loan_amount)
+    by_product = dict(payload, product_code="standard")
+    scores = {client.post("/evaluate_credit", json=p).json()["credit_score"] for p in (payload, explicit, by_product)}
+    assert len(scores) == 1
+
+def test_batch_with_mixed_amounts_matches_scalar_path():
+    payloads = with_loan_amounts(random_payloads(3000, seed=14), seed=14)
+    requests = [CreditAnalysisRequest.parse_obj(p) for p in payloads]
+    for rules in (DEFAULT_RULES, compile_rules(dict(DEFAULT_RULES.definition, loan_amount=0))):
+        for request, result in zip(requests, score_requests(requests, rules)):
+            if result.error is None:
+                assert result.credit_score == calculate_comprehensive_credit_score(request, rules)
+
+def test_fast_path_reads_loan_amount_and_product():
+    for payload in with_loan_amounts(random_payloads(200, seed=15), seed=15):
+        assert parse_fast(payload) is not None
+        classic = client.post("/evaluate_credit", json=payload)
+        fast = client.post("/evaluate_credit/fast", json=payload)
+        assert fast.json() == classic.json()
+
+def test_invalid_amounts_and_products_are_rejected():
+    for extra in ({"loan_amount": 0}, {"loan_amount": -100.0}, {"product_code": "no-such-product"}):
+        payload = dict(make_payload(1), **extra)
+        assert parse_fast(payload) is None
+        assert client.post("/evaluate_credit", json=payload).status_code == 422
+        assert client.post("/evaluate_credit/fast", json=payload).status_code == 422
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the /metrics endpoint and the metrics registry
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics import MetricsRegistry
+from app.rules import DEFAULT_RULES, extract_row
+from app.models import CreditAnalysisRequest
+from benchmarks.payloads import make_payload, random_payloads
+
+client = TestClient(app)
+
+def _value(text, sample):
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_score_components_add_up_to_score():
+    for payload in random_payloads(300, seed=9):
+        row = extract_row(CreditAnalysisRequest.parse_obj(payload))
+        try:
+            expected = DEFAULT_RULES.score(row)
+        except (ValueError, OverflowError):
+            continue
+        credit_score, points = DEFAULT_RULES.score_components(row)
+        assert credit_score == expected
+        assert len(points) == len(DEFAULT_RULES.components)
+
+def test_metrics_record_requests_stages_and_components():
+    before = client.get("/metrics").text
+    payload = make_payload(2, total_asset_value=51234.5)
+    assert client.post("/evaluate_credit", json=payload).status_code == 200
+    assert client.post("/evaluate_credit", json={"user_id": "1"}).status_code == 422
+    text = client.get("/metrics").text
+
+    def delta(sample):
+        return _value(text, sample) - _value(before, sample)
+
+    assert delta('credit_requests_total{path="/evaluate_credit",method="POST",status="200"}') == 1
+    assert delta('credit_requests_total{path="/evaluate_credit",method="POST",status="422"}') == 1
+    assert delta('credit_request_size_bytes_sum{path="/evaluate_credit"}') > len(json.dumps(payload))
+    for stage in ("parse", "validation", "scoring", "serialization"):
+        expected = 2 if stage == "parse" else 1
+        assert delta(f'credit_stage_duration_seconds_count{{path="/evaluate_credit",stage="{stage}"}}') == expected
+    for component in DEFAULT_RULES.components:
+        assert f'credit_component_points_count{{component="{component.name}"}}' in text
+
+def test_unknown_paths_share_one_label():
+    client.get("/no/such/path")
+    assert 'credit_requests_total{path="unmatched",method="GET",status="404"}' in client.get("/metrics").text
+
+def test_templated_routes_are_labelled_with_their_template():
+    client.post("/loans/metrics-1/assets", json={"user_id": "1", "detected_assets": []})
+    client.post("/loans/metrics-2/assets", json={"user_id": "1", "detected_assets": []})
+    client.get("/jobs/no-such-job")
+    text = client.get("/metrics").text
+    assert _value(text, 'credit_requests_total{path="/loans/{loan_id}/assets",method="POST",status="400"}') >= 2
+    assert _value(text, 'credit_requests_total{path="/jobs/{job_id}",method="GET",status="404"}') >= 1
+    assert 'path="/loans/metrics-1/assets"' not in text
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    registry.histogram("latency", "test", ("path",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        registry.observe("latency", ("/x",), value)
+    text = registry.render()
+    assert 'latency_bucket{path="/x",le="0.1"} 2' in text
+    assert 'latency_bucket{path="/x",le="1"} 3' in text
+    assert 'latency_bucket{path="/x",le="+Inf"} 4' in text
+    assert 'latency_count{path="/x"} 4' in text
+
+def test_snapshots_of_other_workers_are_summed(tmp_path):
+    worker = MetricsRegistry(str(tmp_path))
+    worker.counter("requests_total", "test", ("path",))
+    worker.histogram("latency", "test", (), buckets=(1.0,))
+    worker.inc("requests_total", ("/a",), 3)
+    worker.observe("latency", (), 0.5)
+    # Another worker process's snapshot, as written by its flush()
+    (tmp_path / "metrics-999999.json").write_text(json.dumps({
+        "counters": [["requests_total", ["/a"], 4], ["requests_total", ["/b"], 1]],
+        "histograms": [["latency", [], [0, 2], 5.0, 2]],
+    }))
+    text = worker.render()
+    assert 'requests_total{path="/a"} 7' in text
+    assert 'requests_total{path="/b"} 1' in text
+    assert 'latency_bucket{le="1"} 1' in text
+    assert 'latency_count 3' in text
+
+    worker.flush()
+    assert json.loads((tmp_path / worker._snapshot_path().name).read_text())["counters"] == [["requests_total", ["/a"], 3]]
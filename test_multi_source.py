@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Multi-source scoring: the weighted combination, missing sources, and the
+vectorized batch path returning the same scores as the single-request path
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app, calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest, MultiSourceRequest
+from app.sources import DEFAULT_SOURCE_RULES_PATH, build_engine, source_engine
+from app.rules import load_definition
+from benchmarks.payloads import SOURCE_CHOICES, make_payload, random_multi_source_payloads
+
+client = TestClient(app)
+
+def test_single_source_scores_match_its_rules():
+    payload = make_payload(1)
+    response = client.post("/evaluate_credit/multi", json={"user_id": "1", "loan_id": "2", "assets": payload})
+    assert response.status_code == 200
+    result = response.json()
+    asset_score = calculate_comprehensive_credit_score(CreditAnalysisRequest.parse_obj(payload))
+    assert result["credit_score"] == asset_score
+    assert result["source_scores"] == {"assets": asset_score}
+    assert result["missing_sources"] == ["bank", "mpesa", "call_logs"]
+
+def test_weights_renormalize_over_present_sources():
+    payload = random_multi_source_payloads(1, seed=3)[0]
+    full = source_engine.evaluate(MultiSourceRequest.parse_obj(payload))
+    weights = {source.name: source.weight for source in source_engine.sources}
+    expected = sum(weights[name] * score for name, score in full.source_scores.items()) / sum(weights.values())
+    assert full.credit_score == int(expected)
+
+    without_bank = dict(payload)
+    del without_bank["bank"]
+    partial = source_engine.evaluate(MultiSourceRequest.parse_obj(without_bank))
+    assert partial.missing_sources == ["bank"]
+    present = [name for name in weights if name != "bank"]
+    expected = sum(weights[name] * full.source_scores[name] for name in present) / sum(weights[name] for name in present)
+    assert partial.credit_score == int(expected)
+
+def test_batch_matches_single_requests():
+    payloads = random_multi_source_payloads(3000, seed=17, presence=0.6)
+    requests = [MultiSourceRequest.parse_obj(p) for p in payloads]
+    for request, result in zip(requests, source_engine.evaluate_batch(requests)):
+        assert result == source_engine.evaluate(request)
+
+def test_source_errors_and_empty_requests():
+    rejected = {"user_id": "1", "loan_id": "2", "assets": make_payload(0)}
+    response = client.post("/evaluate_credit/multi", json=rejected)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "assets: No assets detected in analysis"
+
+    empty = {"user_id": "1", "loan_id": "3"}
+    assert client.post("/evaluate_credit/multi", json=empty).status_code == 400
+
+    results = client.post("/evaluate_credit/multi/batch", json=[rejected, empty, random_multi_source_payloads(1)[0]]).json()
+    assert [r["error"] for r in results[:2]] == ["assets: No assets detected in analysis", "No data sources in request"]
+    assert results[2]["credit_score"] is not None
+
+def test_engine_definition_is_validated():
+    definition = load_definition(DEFAULT_SOURCE_RULES_PATH)
+    with pytest.raises(ValueError, match="Unknown data source"):
+        build_engine({"sources": {"payslips": {"weight": 1}}})
+    with pytest.raises(ValueError, match="weight must be positive"):
+        build_engine({"sources": {"assets": {"weight": 0}}})
+    bad_input = {"weight": 1, "rules": {"components": [
+        {"name": "x", "max_points": 10, "terms": [{"type": "ladder", "input": "total_asset_value", "breakpoints": [1], "points": [0, 1]}]}
+    ]}}
+    with pytest.raises(ValueError, match="Unknown rule input"):
+        build_engine({"sources": {"bank": bad_input}})
+    assert set(SOURCE_CHOICES) <= set(definition["sources"])
+
+def test_non_finite_inputs_are_source_errors():
+    payload = make_payload(1)
+    payload["analysis_result"]["summary"]["exif_verification_rate"] = "inf%"
+    request = {"user_id": "1", "loan_id": "2", "assets": payload}
+    error = "assets: cannot convert float infinity to integer"
+    response = client.post("/evaluate_credit/multi", json=request)
+    assert response.status_code == 400
+    assert response.json()["detail"] == error
+    assert client.post("/evaluate_credit/multi/batch", json=[request]).json()[0]["error"] == error
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the idempotent score cache
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.cache import MemoryBackend, SQLiteBackend, ScoreCache, request_key, score_cache
+from benchmarks.payloads import make_payload
+
+client = TestClient(app)
+
+def test_memory_backend_evicts_least_recently_used():
+    cache = ScoreCache(MemoryBackend(max_entries=2, ttl_seconds=60))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (3, 1, 1, 2)
+
+def test_memory_backend_expires_entries():
+    cache = ScoreCache(MemoryBackend(max_entries=10, ttl_seconds=0.01))
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = ScoreCache(SQLiteBackend(path, max_entries=1000, ttl_seconds=60))
+    second = ScoreCache(SQLiteBackend(path, max_entries=1000, ttl_seconds=60))
+    first.set("key", [1, 2])
+    assert second.get("key") == [1, 2]
+    assert second.stats()["hits"] == 1
+
+def test_sqlite_backend_trims_to_max_entries(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_entries=100, ttl_seconds=60)
+    for i in range(512):
+        backend.set(str(i), i)
+    assert backend.size() == 100
+    assert backend.evictions == 412
+    assert backend.get("511") == 511
+
+def test_request_key_depends_on_inputs_and_ids():
+    row = [1.0, 2, True]
+    assert request_key("v1", "b", "l", row) == request_key("v1", "b", "l", list(row))
+    assert request_key("v1", "b", "l", row) != request_key("v1", "b", "l2", row)
+    assert request_key("v1", "b", "l", row) != request_key("v2", "b", "l", row)
+    assert request_key("v1", "b", "l", row) != request_key("v1", "b", "l", [1.0, 3, True])
+
+def test_retried_requests_hit_the_cache():
+    score_cache.backend.clear()
+    payload = make_payload(total_asset_value=123456.0)
+    payload["loan_id"] = payload["analysis_result"]["loan_id"] = "cache-test"
+
+    before = score_cache.stats()
+    responses = [client.post("/evaluate_credit", json=payload).json() for _ in range(3)]
+    responses += [client.post("/evaluate_credit/fast", json=payload).json() for _ in range(3)]
+    after = client.get("/cache/stats").json()
+
+    assert all(response == responses[0] for response in responses)
+    # classic: miss + 2 hits; fast: body miss + request-key hit, then 2 body hits
+    assert after["hits"] - before["hits"] == 5
+    assert after["misses"] - before["misses"] == 2
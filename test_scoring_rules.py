@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Golden-corpus tests for the compiled scoring rules
+
+testdata/golden_scores.jsonl was produced by the hand-written scorer before the
+rules were moved into app/scoring_rules.json; the compiled tables must
+reproduce it bit for bit through both the scalar and the batch path.
+"""
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from app.main import calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest
+from app.batch import score_requests
+from app.rules import DEFAULT_RULES, DEFAULT_RULES_PATH, compile_rules, load_rules
+from benchmarks.payloads import make_payload
+
+GOLDEN_PATH = Path(__file__).parent / "testdata" / "golden_scores.jsonl"
+
+def load_golden():
+    cases = []
+    with open(GOLDEN_PATH) as f:
+        for line in f:
+            record = json.loads(line)
+            payload = make_payload(**record["credit_features"])
+            result = payload["analysis_result"]
+            result["total_images_processed"] = record["total_images_processed"]
+            result["total_assets_detected"] = record["total_assets_detected"]
+            result["summary"]["exif_verification_rate"] = record["exif_verification_rate"]
+            cases.append((CreditAnalysisRequest.parse_obj(payload), record["credit_score"], record["error"]))
+    return cases
+
+GOLDEN = load_golden()
+
+def test_scalar_path_matches_golden_corpus():
+    for request, expected_score, expected_error in GOLDEN:
+        try:
+            score, error = calculate_comprehensive_credit_score(request), None
+        except (ValueError, OverflowError) as e:
+            score, error = None, str(e)
+        assert (score, error) == (expected_score, expected_error), request.analysis_result.credit_features
+
+def test_batch_path_matches_golden_corpus():
+    results = score_requests([request for request, _, _ in GOLDEN])
+    for (request, expected_score, expected_error), result in zip(GOLDEN, results):
+        assert (result.credit_score, result.error) == (expected_score, expected_error), request.analysis_result.credit_features
+
+def test_yaml_definition_compiles_to_same_scores(tmp_path):
+    yaml = pytest.importorskip("yaml")
+    path = tmp_path / "rules.yaml"
+    path.write_text(yaml.safe_dump(json.loads(DEFAULT_RULES_PATH.read_text())))
+    rules = load_rules(path)
+    for request, expected_score, _ in GOLDEN[:200]:
+        if expected_score is not None:
+            assert calculate_comprehensive_credit_score(request, rules) == expected_score
+
+def test_alternate_rules_are_used_by_both_paths():
+    definition = copy.deepcopy(DEFAULT_RULES.definition)
+    # Halve the loan amount: coverage ratios double
+    definition["loan_amount"] = 50000.0
+    rules = compile_rules(definition)
+    request = CreditAnalysisRequest.parse_obj(make_payload(total_asset_value=50000.0, has_high_value_assets=False))
+    assert calculate_comprehensive_credit_score(request) + 15 == calculate_comprehensive_credit_score(request, rules)
+    assert score_requests([request], rules)[0].credit_score == calculate_comprehensive_credit_score(request, rules)
+
+@pytest.mark.parametrize("change, message", [
+    (lambda d: d["components"][0]["terms"][0].update(breakpoints=[0.4, 0.2, 0.6, 0.8, 1.0]), "ascending"),
+    (lambda d: d["components"][0]["terms"][0].update(points=[1, 2]), "one more points entry"),
+    (lambda d: d["components"][1]["terms"][0].update(input="credit_rating"), "Unknown rule input"),
+    (lambda d: d["components"][2]["terms"][0].update(type="polynomial"), "unknown term type"),
+    (lambda d: d["components"][3].pop("max_points"), "missing 'max_points'"),
+])
+def test_invalid_definitions_are_rejected(change, message):
+    definition = copy.deepcopy(DEFAULT_RULES.definition)
+    change(definition)
+    with pytest.raises(ValueError, match=message):
+        compile_rules(definition)
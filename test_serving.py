@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Serving profile: liveness vs readiness around warmup and shutdown, the warmup
+scoring like the request path, and the worker count
+"""
+from fastapi.testclient import TestClient
+
+from app.main import app, calculate_comprehensive_credit_score
+from app.models import CreditAnalysisRequest
+from app.serve import available_cpus, multi_worker_warning, worker_count
+from app.settings import Settings
+from app.warmup import WARMUP_PAYLOAD, Readiness, readiness, warm_up
+
+def test_ready_only_after_warmup_and_until_shutdown():
+    with TestClient(app) as client:
+        assert readiness.wait(timeout=30)
+        live = client.get("/health/live")
+        ready = client.get("/health/ready")
+        assert live.status_code == 200 and live.json()["status"] == "alive"
+        assert ready.status_code == 200 and ready.json()["status"] == "ready"
+        assert ready.json()["warmup_seconds"] >= 0
+    # After shutdown the worker is still live but no longer ready
+    client = TestClient(app)
+    assert client.get("/health/live").status_code == 200
+    stopped = client.get("/health/ready")
+    assert stopped.status_code == 503 and stopped.json()["status"] == "stopping"
+
+def test_failed_warmup_never_reports_ready(monkeypatch):
+    import app.warmup
+
+    def broken():
+        raise RuntimeError("scorer broken")
+
+    monkeypatch.setattr(app.warmup, "warm_up", broken)
+    state = Readiness()
+    state.start()
+    assert not state.wait(timeout=30)
+    assert state.status()["status"] == "failed"
+    assert "scorer broken" in state.status()["error"]
+
+def test_warmup_scores_like_the_request_path():
+    expected = calculate_comprehensive_credit_score(CreditAnalysisRequest.parse_obj(WARMUP_PAYLOAD))
+    assert warm_up() == expected
+    response = TestClient(app).post("/evaluate_credit", json=WARMUP_PAYLOAD)
+    assert response.json()["credit_score"] == expected
+
+def test_worker_count():
+    assert worker_count(3) == 3
+    assert worker_count(0) == available_cpus() >= 1
+    assert Settings.__fields__["serve_workers"].default == 1
+    assert multi_worker_warning(1) is None
+    assert "/loans" in multi_worker_warning(4)
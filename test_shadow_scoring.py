@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for shadow scoring of candidate rule versions (app.shadow)
+"""
+import copy
+import json
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.models import CreditAnalysisRequest
+from app.rules import DEFAULT_RULES, compile_rules, extract_row
+from app.shadow import ShadowScorer
+from benchmarks.payloads import random_payloads
+
+client = TestClient(main.app)
+
+def candidate(version, **max_points):
+    definition = copy.deepcopy(DEFAULT_RULES.definition)
+    definition["version"] = version
+    for component in definition["components"]:
+        component["max_points"] = max_points.get(component["name"], component["max_points"])
+    return compile_rules(definition)
+
+def test_candidates_are_compared_with_the_issued_scores():
+    same = candidate("same")
+    lower = candidate("lower", asset_value=10)
+    shadow = ShadowScorer([same, lower], budget=1.0)
+    rows = [extract_row(CreditAnalysisRequest.parse_obj(p)) for p in random_payloads(200, seed=31)]
+    for row in rows:
+        shadow.add(row, DEFAULT_RULES.score(row))
+    assert shadow.process() == 200
+
+    report = shadow.report()
+    assert report["production_version"] == DEFAULT_RULES.version
+    assert report["processed"] == 200 and report["queued"] == 0
+    assert report["versions"]["same"]["agreed"] == 200
+    assert report["versions"]["same"]["delta_histogram"] == {"0": 200}
+
+    expected = [lower.score(row) - DEFAULT_RULES.score(row) for row in rows]
+    summary = report["versions"]["lower"]
+    assert summary["compared"] == 200
+    assert summary["agreed"] == expected.count(0)
+    assert summary["lower"] == sum(1 for delta in expected if delta < 0)
+    assert summary["higher"] == 0
+    assert summary["mean_delta"] == pytest.approx(sum(expected) / 200, abs=1e-4)
+    assert summary["min_delta"] == min(expected)
+    assert sum(summary["delta_histogram"].values()) == 200
+
+def test_work_beyond_the_budget_or_queue_is_dropped():
+    shadow = ShadowScorer([candidate("c")], budget=0.01, max_queue=50)
+    row = extract_row(CreditAnalysisRequest.parse_obj(random_payloads(1)[0]))
+    for _ in range(60):
+        shadow.add(row, DEFAULT_RULES.score(row))
+    assert shadow.report()["dropped_queue_full"] == 10
+
+    shadow._tokens = -1.0
+    assert shadow.process() == 0
+    report = shadow.report()
+    assert report["dropped_over_budget"] == 50 and report["queued"] == 0
+
+def test_failing_batches_are_counted_and_skipped():
+    def broken(body):
+        raise KeyError("user_id")
+
+    shadow = ShadowScorer([candidate("c")], budget=1.0, max_batch=2)
+    row = extract_row(CreditAnalysisRequest.parse_obj(random_payloads(1)[0]))
+    shadow.add(row, DEFAULT_RULES.score(row))
+    shadow.add_body(b"{}", 47, decode=broken)
+    for _ in range(3):
+        shadow.add(row, DEFAULT_RULES.score(row))
+    assert shadow.process() == 3
+    report = shadow.report()
+    assert (report["failed"], report["failed_batches"], report["processed"]) == (2, 1, 3)
+    assert report["versions"]["c"]["compared"] == 3
+
+def test_registering_a_duplicate_version_fails():
+    with pytest.raises(ValueError):
+        ShadowScorer([candidate(DEFAULT_RULES.version)])
+    with pytest.raises(ValueError):
+        ShadowScorer([candidate("x"), candidate("x")])
+
+def test_endpoints_feed_the_shadow_scorer(monkeypatch):
+    assert client.get("/shadow/report").json() == {"enabled": False}
+    shadow = ShadowScorer([candidate("same")], budget=1.0)
+    monkeypatch.setattr(main, "shadow_scorer", shadow)
+
+    payloads = random_payloads(3, seed=32)
+    assert client.post("/evaluate_credit", json=payloads[0]).status_code == 200
+    assert client.post("/evaluate_credit/fast", content=json.dumps(payloads[1])).status_code == 200
+    assert client.post("/evaluate_credit/async", content=json.dumps(payloads[2])).status_code == 200
+    assert client.post("/internal/score", content=msgpack.packb(payloads[0])).status_code == 200
+    shadow.process()
+
+    report = client.get("/shadow/report").json()
+    assert report["enabled"] is True
+    assert report["versions"]["same"]["compared"] == 4
+    assert report["versions"]["same"]["agreed"] == 4